@@ -1,18 +1,20 @@
 import logging
+import sys
 from argparse import ArgumentParser
 from dataclasses import asdict, dataclass
-from elftools.elf.elffile import ELFFile
 from pathlib import Path
-from typing import Optional, Union
+from typing import Dict, Optional, Union
 
-from ledgered.serializers import Jsonable
+from ledgered.devices import Device, Devices
+from ledgered.serializers import Jsonable, from_str_none, write_json
+from ledgered.utils.timing import add_instrumentation_arguments, instrumented, span
 
 LEDGER_PREFIX = "ledger."
 DEFAULT_GRAPHICS = "bagl"
 
 
 @dataclass
-class Sections(Jsonable):
+class Sections(Jsonable, memoize=True):
     api_level: Optional[str] = None
     app_name: Optional[str] = None
     app_version: Optional[str] = None
@@ -31,14 +33,45 @@ class Sections(Jsonable):
     def __str__(self) -> str:
         return "\n".join(f"{key} {value}" for key, value in sorted(asdict(self).items()))
 
+    @classmethod
+    def from_json(cls, data: Dict, trusted: bool = False) -> "Sections":
+        """
+        Rebuilds the sections from their `json` form. If `trusted` (the data was output by
+        `Sections.json`), the field names are not checked again.
+        """
+        values = {key: from_str_none(value) for key, value in data.items()}
+        if not trusted:
+            return cls(**values)
+        sections = cls.__new__(cls)
+        sections.__dict__.update(values)
+        return sections
+
+    @property
+    def device(self) -> Optional[Device]:
+        """
+        The device the application is built for, from its target ID (or target name), if known.
+        """
+        try:
+            if self.target_id is not None:
+                return Devices.get_by_target_id(self.target_id)
+            if self.target is not None:
+                return Devices.get_by_name(self.target)
+        except (KeyError, ValueError):
+            pass
+        return None
+
 
 class LedgerBinaryApp:
     def __init__(self, binary_path: Union[str, Path]):
         if isinstance(binary_path, str):
             binary_path = Path(binary_path)
         self._path = binary_path = binary_path.resolve()
+        # pyelftools is only imported when a binary is actually parsed
+        with span("import", "elftools"):
+            from elftools.elf.elffile import ELFFile
+
         logging.info("Parsing binary '%s'", self._path)
-        with self._path.open("rb") as filee:
+        with span("elf.parse"), self._path.open("rb") as filee:
             sections = {
                 s.name.replace(LEDGER_PREFIX, ""): s.data().decode().strip()
                 for s in ELFFile(filee).iter_sections()
@@ -61,6 +94,7 @@ def set_parser() -> ArgumentParser:
     parser.add_argument(
         "-j", "--json", required=False, action="store_true", help="outputs as JSON rather than text"
     )
+    add_instrumentation_arguments(parser)
     return parser
 
 
@@ -74,8 +108,17 @@ def main() -> None:
     elif args.verbose > 1:
         logging.root.setLevel(logging.DEBUG)
 
-    app = LedgerBinaryApp(args.binary)
-    if args.json:
-        print(app.sections.json)
-    else:
-        print(app.sections)
+    with instrumented(args.timings, args.profile):
+        # a running daemon may already hold the parsed sections
+        from ledgered import serve
+
+        cached = serve.query("binary", path=str(args.binary.resolve()))
+        sections = (
+            Sections(**cached) if cached is not None else LedgerBinaryApp(args.binary).sections
+        )
+        if args.json:
+            with span("output", "json"):
+                write_json(sections, sys.stdout)
+        else:
+            with span("output", "text"):
+                print(sections)
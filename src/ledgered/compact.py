@@ -0,0 +1,306 @@
+"""
+Compact binary encoding of the `Jsonable` records (`Manifest`, `Sections`), to store many of them.
+
+An encoded blob is made of:
+
+- a header: the `LGD` magic bytes and the format version (one byte),
+- a string table: every string of the records, stored once (SDK names, devices, dependency URLs,
+  `None` values, field names, ... are repeated between records),
+- the records: each one tagged with its schema (its class, see `SCHEMAS`) and length-prefixed, so
+  that a reader can skip the records of a schema it does not know. A record identical to a
+  previous one (the same manifest for many commits, ...) is stored as a reference to it.
+
+Records are stored in their `json` form (strings being references to the string table), and
+rebuilt with the `from_json` constructor of their class, trusting the data.
+
+Integers (lengths, counts, references) are encoded as LEB128 variable-length integers.
+
+Running this module compares the size and speed of this encoding against `json.dumps(value.json)`
+on the given manifest files.
+"""
+
+import json
+import logging
+import sys
+import timeit
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from ledgered.binary import Sections
+from ledgered.manifest.manifest import Manifest
+from ledgered.serializers import Jsonable
+
+MAGIC = b"LGD"
+FORMAT_VERSION = 1
+# schema tag -> record class (tags must never be reused, 0 is reserved)
+SCHEMAS: Dict[int, Type[Any]] = {1: Manifest, 2: Sections}
+
+# a record identical to a previous one: its payload is the index of this record
+_COPY = 0
+# value type tags
+_NONE, _FALSE, _TRUE, _INT, _NEGATIVE_INT, _STRING, _LIST, _DICT = range(8)
+
+
+def _write_int(output: bytearray, value: int) -> None:
+    while value > 0x7F:
+        output.append((value & 0x7F) | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+def _read_int(data: bytes, offset: int) -> Tuple[int, int]:
+    byte = data[offset]
+    if byte < 0x80:
+        return byte, offset + 1
+    value = byte & 0x7F
+    shift = 7
+    while True:
+        offset += 1
+        byte = data[offset]
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset + 1
+        shift += 7
+
+
+class _Encoder:
+    def __init__(self) -> None:
+        self.strings: Dict[str, int] = dict()
+        # (schema tag, payload) -> index of the first record encoded so
+        self.records: Dict[Tuple[int, bytes], int] = dict()
+        self.count = 0
+
+    def string(self, output: bytearray, value: str) -> None:
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        _write_int(output, index)
+
+    def value(self, output: bytearray, value: Any) -> None:
+        if isinstance(value, str):
+            output.append(_STRING)
+            self.string(output, value)
+        elif value is None:
+            output.append(_NONE)
+        elif value is True or value is False:
+            output.append(_TRUE if value else _FALSE)
+        elif isinstance(value, int):
+            output.append(_INT if value >= 0 else _NEGATIVE_INT)
+            _write_int(output, abs(value))
+        elif isinstance(value, (list, tuple)):
+            output.append(_LIST)
+            _write_int(output, len(value))
+            for element in value:
+                self.value(output, element)
+        elif isinstance(value, dict):
+            output.append(_DICT)
+            _write_int(output, len(value))
+            for key, element in value.items():
+                self.string(output, str(key))
+                self.value(output, element)
+        else:
+            raise TypeError(f"Can not encode '{value}' ({type(value)})")
+
+    def record(self, output: bytearray, record: Jsonable) -> None:
+        for tag, cls in SCHEMAS.items():
+            if type(record) is cls:
+                break
+        else:
+            raise TypeError(
+                f"No schema for {type(record)}. Must be one of {list(SCHEMAS.values())}"
+            )
+        payload = bytearray()
+        self.value(payload, record.json)
+        key = (tag, bytes(payload))
+        if key in self.records:
+            tag = _COPY
+            payload = bytearray()
+            _write_int(payload, self.records[key])
+        else:
+            self.records[key] = self.count
+        self.count += 1
+        _write_int(output, tag)
+        _write_int(output, len(payload))
+        output += payload
+
+
+class _Decoder:
+    def __init__(self, data: bytes, strings: List[str]) -> None:
+        self.data = data
+        self.strings = strings
+
+    def value(self, offset: int) -> Tuple[Any, int]:
+        data = self.data
+        kind = data[offset]
+        offset += 1
+        if kind == _STRING:
+            # most references fit in a byte
+            index = data[offset]
+            if index < 0x80:
+                return self.strings[index], offset + 1
+            index, offset = _read_int(data, offset)
+            return self.strings[index], offset
+        if kind == _DICT:
+            count, offset = _read_int(data, offset)
+            result = dict()
+            for _ in range(count):
+                index = data[offset]
+                if index < 0x80:
+                    offset += 1
+                else:
+                    index, offset = _read_int(data, offset)
+                result[self.strings[index]], offset = self.value(offset)
+            return result, offset
+        if kind == _LIST:
+            count, offset = _read_int(data, offset)
+            elements = list()
+            for _ in range(count):
+                element, offset = self.value(offset)
+                elements.append(element)
+            return elements, offset
+        if kind == _NONE:
+            return None, offset
+        if kind in (_TRUE, _FALSE):
+            return kind == _TRUE, offset
+        if kind in (_INT, _NEGATIVE_INT):
+            value, offset = _read_int(data, offset)
+            return (value if kind == _INT else -value), offset
+        raise ValueError(f"Unknown value type {kind} at offset {offset - 1}")
+
+
+def encode_many(records: Iterable[Jsonable]) -> bytes:
+    """
+    Encodes the records (`Manifest` or `Sections`) in a single blob, sharing their strings.
+    """
+    encoder = _Encoder()
+    body = bytearray()
+    for record in records:
+        encoder.record(body, record)
+    output = bytearray(MAGIC)
+    output.append(FORMAT_VERSION)
+    _write_int(output, len(encoder.strings))
+    for string in encoder.strings:
+        encoded = string.encode()
+        _write_int(output, len(encoded))
+        output += encoded
+    _write_int(output, encoder.count)
+    return bytes(output + body)
+
+
+def encode(record: Jsonable) -> bytes:
+    return encode_many([record])
+
+
+def decode_many(data: bytes) -> List[Jsonable]:
+    """
+    Decodes the records of a blob. Records of an unknown schema (written by a newer version) are
+    skipped. Raises a ValueError if the blob is invalid, or of an unsupported format version.
+    """
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not a compact ledgered blob")
+    version = data[len(MAGIC)]
+    if version > FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported compact format version {version} (up to {FORMAT_VERSION} supported)"
+        )
+    try:
+        offset = len(MAGIC) + 1
+        count, offset = _read_int(data, offset)
+        strings = list()
+        for _ in range(count):
+            length, offset = _read_int(data, offset)
+            strings.append(data[offset : offset + length].decode())
+            offset += length
+        decoder = _Decoder(data, strings)
+        # (schema tag, value) of every record, None if skipped. Copies reuse the value of their
+        # original record, as the `from_json` constructors copy the values they keep
+        values: List[Optional[Tuple[int, Any]]] = list()
+        records: List[Jsonable] = list()
+        count, offset = _read_int(data, offset)
+        for _ in range(count):
+            tag, offset = _read_int(data, offset)
+            length, offset = _read_int(data, offset)
+            end = offset + length
+            if end > len(data):
+                raise ValueError("Truncated record")
+            if tag == _COPY:
+                index, _ = _read_int(data, offset)
+                values.append(values[index])
+            elif tag not in SCHEMAS:
+                logging.warning("Skipping a record of unknown schema %d", tag)
+                values.append(None)
+            else:
+                values.append((tag, decoder.value(offset)[0]))
+            if values[-1] is not None:
+                tag, value = values[-1]
+                records.append(SCHEMAS[tag].from_json(value, trusted=True))
+            offset = end
+    except (IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid compact ledgered blob: {e}") from e
+    return records
+
+
+def decode(data: bytes) -> Jsonable:
+    records = decode_many(data)
+    if len(records) != 1:
+        raise ValueError(f"Expected a single record, found {len(records)}")
+    return records[0]
+
+
+def benchmark(records: List[Jsonable], number: int = 20) -> Dict[str, Dict[str, float]]:
+    """
+    Compares, on the given records, the compact encoding to the JSON encoding (`json.dumps` of
+    every `json`, decoded with `from_json`): size in bytes, encoding and decoding times in seconds
+    (averaged over `number` runs).
+    """
+    blob = encode_many(records)
+    documents = [json.dumps(record.json) for record in records]
+
+    classes: List[Any] = [type(record) for record in records]
+
+    def json_decode() -> None:
+        for cls, document in zip(classes, documents):
+            cls.from_json(json.loads(document), trusted=True)
+
+    return {
+        "compact": {
+            "size": len(blob),
+            "encode": timeit.timeit(lambda: encode_many(records), number=number) / number,
+            "decode": timeit.timeit(lambda: decode_many(blob), number=number) / number,
+        },
+        "json": {
+            "size": sum(len(document.encode()) for document in documents),
+            "encode": timeit.timeit(
+                lambda: [json.dumps(record.json) for record in records], number=number
+            )
+            / number,
+            "decode": timeit.timeit(json_decode, number=number) / number,
+        },
+    }
+
+
+def main() -> None:  # pragma: no cover
+    parser = ArgumentParser(
+        prog="python -m ledgered.compact",
+        description="Compares the compact and JSON encodings of the given manifests",
+    )
+    parser.add_argument("files", type=Path, nargs="+", help="manifest files")
+    parser.add_argument("-c", "--copies", type=int, default=1000, help="copies of each manifest")
+    parser.add_argument("-n", "--number", type=int, default=20, help="number of runs")
+    args = parser.parse_args()
+    records: List[Jsonable] = [
+        Manifest.from_path(path, use_cache=False) for path in args.files
+    ] * args.copies
+    results = benchmark(records, args.number)
+    for name, result in results.items():
+        print(
+            f"{name:<8} {result['size']:>12,} B {result['encode'] * 1e3:10.1f} ms encode "
+            f"{result['decode'] * 1e3:10.1f} ms decode"
+        )
+    if not records:
+        sys.exit(1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -1,9 +1,18 @@
-import dataclasses
 import json
+import logging
+import os
+import sys
+from dataclasses import dataclass
 from enum import IntEnum, auto
 from pathlib import Path
-from pydantic.dataclasses import dataclass
-from typing import Optional
+from threading import Lock
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, Optional, Tuple, Union
+
+# `slots` is only supported by dataclasses since Python 3.10
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+# device definition files overlaid on the known devices (separated with `os.pathsep`)
+DEVICES_OVERLAY_ENV = "LEDGERED_DEVICES"
 
 
 class DeviceType(IntEnum):
@@ -16,20 +25,47 @@ class DeviceType(IntEnum):
     APEX_M = auto()
 
 
-@dataclass
+_device_type_lock = Lock()
+
+
+def extend_device_type(name: str) -> DeviceType:
+    """
+    Returns the DeviceType of the given name, adding it to the enumeration if it is unknown (for
+    devices defined in overlay files, see `Devices.add_overlay`).
+    """
+    name = name.upper()
+    with _device_type_lock:
+        if name not in DeviceType.__members__:
+            value = max(DeviceType) + 1
+            member = int.__new__(DeviceType, value)
+            member._name_ = name
+            member._value_ = value
+            # what the Enum metaclass does when creating the class members. These internals are
+            # the same in the enum module of CPython 3.9 to 3.13 (the unit tests, which remove the
+            # added members afterwards, have been run on 3.11)
+            DeviceType._member_map_[name] = member
+            DeviceType._member_names_.append(name)
+            DeviceType._value2member_map_[value] = member
+            type.__setattr__(DeviceType, name, member)
+        return DeviceType[name]
+
+
+@dataclass(frozen=True, **_SLOTS)
 class Resolution:
     x: int
     y: int
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class Device:
     type: DeviceType
     resolution: Resolution
     touchable: bool = True
     deprecated: bool = False
-    names: list[str] = dataclasses.field(default_factory=lambda: [])
+    names: Tuple[str, ...] = ()
     _sdk_name: Optional[str] = None
+    # the `target_id` of the applications built for this device (see `ledgered.binary.Sections`)
+    target_id: Optional[int] = None
 
     @property
     def name(self) -> str:
@@ -55,29 +91,173 @@ class Device:
 
     @classmethod
     def from_dict(cls, dico: dict) -> "Device":
+        """
+        Builds a device from its JSON definition, validated by pydantic.
+        """
+        # pydantic is slow to import: only imported when device definitions are loaded
+        from pydantic import TypeAdapter
+
         type = dico.pop("type")
         dico["type"] = DeviceType[type.upper()]
-        return Device(**dico)
+        if isinstance(dico.get("target_id"), str):
+            # written in hexadecimal in JSON
+            dico["target_id"] = int(dico["target_id"], 0)
+        return TypeAdapter(Device).validate_python(dico)
+
+
+DeviceData = Mapping[DeviceType, Device]
+
+
+def load_devices_file(path: Path, extend_types: bool = False) -> DeviceData:
+    """
+    Loads and validates device definitions from a JSON file. If `extend_types`, unknown device
+    types are added to DeviceType, else they are rejected.
+    """
+    with path.open() as filee:
+        definitions = json.load(filee)
+    if extend_types:
+        for definition in definitions:
+            extend_device_type(definition["type"])
+    return MappingProxyType({item.type: item for item in map(Device.from_dict, definitions)})
+
+
+def _load_table() -> DeviceData:
+    """
+    Loads the precompiled device table, or `devices.json` if the table is out of date.
+    """
+    from . import _table
+    from .generate import DEVICES_FILE, json_hash
+
+    if _table.JSON_SHA256 == json_hash(DEVICES_FILE):
+        return MappingProxyType({device.type: device for device in _table.DEVICES})
+    logging.warning(
+        "The device table is out of date, loading %s (run `python -m ledgered.devices.generate`)",
+        DEVICES_FILE,
+    )
+    return load_devices_file(DEVICES_FILE)
+
+
+def _load_devices(overlays: Iterable[Path] = ()) -> DeviceData:
+    """
+    Loads the known devices, then the given overlay files, in order: an overlay device replaces
+    the device of the same type.
+    """
+    devices = dict(_load_table())
+    for overlay in overlays:
+        logging.info("Loading device definitions from '%s'", overlay)
+        devices.update(load_devices_file(overlay, extend_types=True))
+    return MappingProxyType(devices)
+
+
+def overlay_paths() -> List[Path]:
+    """
+    The overlay files given by the `LEDGERED_DEVICES` environment variable, then by
+    `Devices.add_overlay`.
+    """
+    paths = [Path(p) for p in os.environ.get(DEVICES_OVERLAY_ENV, "").split(os.pathsep) if p]
+    return paths + Devices._overlays
+
+
+class _LazyDeviceData:
+    """
+    `Devices.DEVICE_DATA`, loaded (with the overlays) on first access rather than when the module
+    is imported.
+    """
+
+    def __get__(self, instance: object, owner: type) -> DeviceData:
+        data = _load_devices(overlay_paths())
+        # replaces this descriptor: the devices are loaded only once
+        setattr(owner, "DEVICE_DATA", data)
+        return data
+
+
+@dataclass(frozen=True)
+class _DevicesIndex:
+    # the DEVICE_DATA this index was built from
+    source: DeviceData
+    by_name: Mapping[str, Device]
+    by_sdk_name: Mapping[str, Device]
+    by_target_id: Mapping[int, Device]
+
+    @classmethod
+    def build(cls, source: DeviceData) -> "_DevicesIndex":
+        by_name = dict()
+        for device in source.values():
+            for name in (device.name, device.sdk_name, *device.names):
+                by_name[name.casefold()] = device
+        return cls(
+            source=source,
+            by_name=MappingProxyType(by_name),
+            by_sdk_name=MappingProxyType({d.sdk_name: d for d in source.values()}),
+            by_target_id=MappingProxyType(
+                {d.target_id: d for d in source.values() if d.target_id is not None}
+            ),
+        )
 
 
 class Devices:
-    _devices_file = Path(__file__).absolute().parent / "devices.json"
-    with _devices_file.open() as filee:
-        _devices = json.load(filee)
+    """
+    The registry of the known devices, with constant time lookups by name (or alias), SDK name and
+    target ID.
+    """
+
+    DEVICE_DATA: DeviceData = _LazyDeviceData()  # type: ignore[assignment]
+    _index: Optional[_DevicesIndex] = None
+    _overlays: List[Path] = []
 
-    DEVICE_DATA = {item.type: item for item in [Device.from_dict(i) for i in _devices]}
+    @classmethod
+    def add_overlay(cls, path: Union[str, Path]) -> None:
+        """
+        Adds a device definition file (same format as `devices.json`), merged into the registry
+        on the next lookup. Its devices replace the known devices of the same type, and unknown
+        device types are added to DeviceType.
+        """
+        cls._overlays.append(Path(path))
+        # reloaded, with the overlays, on next access
+        cls.DEVICE_DATA = _LazyDeviceData()  # type: ignore[assignment]
 
     def __iter__(self):
         for d in self.DEVICE_DATA.values():
             yield d
 
+    @classmethod
+    def index(cls) -> _DevicesIndex:
+        index = cls._index
+        # rebuilt if DEVICE_DATA has been replaced
+        if index is None or index.source is not cls.DEVICE_DATA:
+            index = cls._index = _DevicesIndex.build(cls.DEVICE_DATA)
+        return index
+
     @classmethod
     def get_by_type(cls, device_type: DeviceType) -> Device:
         return cls.DEVICE_DATA[device_type]
 
     @classmethod
     def get_by_name(cls, name: str) -> Device:
-        for device in cls.DEVICE_DATA.values():
-            if name.lower() == device.name or name.lower() in device.names:
-                return device
-        raise KeyError(f"Device named '{name}' unknown")
+        """
+        Returns the device of the given name or alias (case insensitive)
+        """
+        try:
+            return cls.index().by_name[name.casefold()]
+        except KeyError:
+            raise KeyError(f"Device named '{name}' unknown")
+
+    @classmethod
+    def get_by_sdk_name(cls, sdk_name: str) -> Device:
+        try:
+            return cls.index().by_sdk_name[sdk_name]
+        except KeyError:
+            raise KeyError(f"Device with SDK name '{sdk_name}' unknown")
+
+    @classmethod
+    def get_by_target_id(cls, target_id: Union[int, str]) -> Device:
+        """
+        Returns the device of the given target ID, either an integer or a string as found in the
+        binary sections (ex: '0x33200004')
+        """
+        if isinstance(target_id, str):
+            target_id = int(target_id, 0)
+        try:
+            return cls.index().by_target_id[target_id]
+        except KeyError:
+            raise KeyError(f"Device with target ID '{target_id:#010x}' unknown")
@@ -0,0 +1,73 @@
+"""
+Generated from devices.json by `python -m ledgered.devices.generate`. Do not edit.
+"""
+
+from . import Device, DeviceType, Resolution
+
+JSON_SHA256 = "c64d8ed1547bca32ba506ee35d67ed3cc2859acbe6a6c5f2442d2464b92e84d4"
+
+DEVICES = (
+    Device(
+        type=DeviceType.NANOS,
+        resolution=Resolution(x=128, y=32),
+        touchable=False,
+        deprecated=True,
+        names=(),
+        _sdk_name=None,
+        target_id=0x31100004,
+    ),
+    Device(
+        type=DeviceType.NANOSP,
+        resolution=Resolution(x=128, y=64),
+        touchable=False,
+        deprecated=False,
+        names=("nanos+", "nanos2", "nanosplus"),
+        _sdk_name="nanos+",
+        target_id=0x33100004,
+    ),
+    Device(
+        type=DeviceType.NANOX,
+        resolution=Resolution(x=128, y=64),
+        touchable=False,
+        deprecated=False,
+        names=(),
+        _sdk_name=None,
+        target_id=0x33000004,
+    ),
+    Device(
+        type=DeviceType.FLEX,
+        resolution=Resolution(x=480, y=600),
+        touchable=True,
+        deprecated=False,
+        names=(),
+        _sdk_name=None,
+        target_id=0x33300004,
+    ),
+    Device(
+        type=DeviceType.STAX,
+        resolution=Resolution(x=400, y=670),
+        touchable=True,
+        deprecated=False,
+        names=(),
+        _sdk_name=None,
+        target_id=0x33200004,
+    ),
+    Device(
+        type=DeviceType.APEX_P,
+        resolution=Resolution(x=300, y=400),
+        touchable=True,
+        deprecated=False,
+        names=(),
+        _sdk_name=None,
+        target_id=0x33400004,
+    ),
+    Device(
+        type=DeviceType.APEX_M,
+        resolution=Resolution(x=300, y=400),
+        touchable=True,
+        deprecated=False,
+        names=(),
+        _sdk_name=None,
+        target_id=None,
+    ),
+)
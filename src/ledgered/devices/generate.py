@@ -0,0 +1,71 @@
+"""
+Generates `_table.py`, the precompiled (already validated) device table loaded by default, from
+`devices.json`:
+
+    python -m ledgered.devices.generate
+
+The table holds the hash of the JSON file it was generated from: if the JSON file is modified but
+the table is not generated again, the JSON file is loaded (and validated) instead.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Iterable
+
+DEVICES_FILE = Path(__file__).absolute().parent / "devices.json"
+TABLE_FILE = Path(__file__).absolute().parent / "_table.py"
+
+HEADER = '''"""
+Generated from devices.json by `python -m ledgered.devices.generate`. Do not edit.
+"""
+
+from . import Device, DeviceType, Resolution
+'''
+
+
+def json_hash(path: Path = DEVICES_FILE) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _tuple(values: Iterable[str]) -> str:
+    items = [json.dumps(value) for value in values]
+    return f"({items[0]},)" if len(items) == 1 else f"({', '.join(items)})"
+
+
+def render(devices: Iterable, source_hash: str) -> str:
+    """
+    Renders the Python source of the table of the given (validated) devices.
+    """
+    lines = [HEADER, f'JSON_SHA256 = "{source_hash}"\n', "DEVICES = ("]
+    for device in devices:
+        target_id = None if device.target_id is None else hex(device.target_id)
+        sdk_name = None if device._sdk_name is None else json.dumps(device._sdk_name)
+        lines += [
+            "    Device(",
+            f"        type=DeviceType.{device.type.name},",
+            f"        resolution=Resolution(x={device.resolution.x}, y={device.resolution.y}),",
+            f"        touchable={device.touchable!r},",
+            f"        deprecated={device.deprecated!r},",
+            f"        names={_tuple(device.names)},",
+            f"        _sdk_name={sdk_name},",
+            f"        target_id={target_id},",
+            "    ),",
+        ]
+    lines.append(")\n")
+    return "\n".join(lines)
+
+
+def generate() -> str:
+    from . import load_devices_file
+
+    return render(load_devices_file(DEVICES_FILE).values(), json_hash())
+
+
+def main() -> None:  # pragma: no cover
+    TABLE_FILE.write_text(generate())
+    print(f"{TABLE_FILE} generated")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
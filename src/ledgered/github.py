@@ -1,15 +1,65 @@
-import tomli
+import inspect
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime
+from dataclasses import FrozenInstanceError, dataclass
 from enum import IntEnum, auto
-from github import ContentFile as PyContentFile, Github as PyGithub, Repository as PyRepository
+from functools import partial
+from github import (
+    Consts,
+    ContentFile as PyContentFile,
+    Github as PyGithub,
+    PaginatedList as PyPaginatedList,
+    Repository as PyRepository,
+)
 from github.GithubException import UnknownObjectException, GithubException
+from github.GithubRetry import GithubRetry
+from github.Requester import Requester
 from pathlib import Path
-from typing import List, Optional
-from unittest.mock import patch
+from threading import Event, Lock
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+from urllib.parse import quote, urlparse
+from urllib3.util.retry import Retry
+from weakref import WeakSet
 
+from ledgered.devices import Devices
 from ledgered.manifest import MANIFEST_FILE_NAME, Manifest
+from ledgered.utils import toml
+from ledgered.utils.timing import span
 
 LEDGER_ORG_NAME = "ledgerhq"
 APP_PLUGIN_PREFIX = "app-plugin-"
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_RETRIES = 10
+# connection errors are not worth as many retries as server errors
+DEFAULT_CONNECT_RETRIES = 2
+# exponential backoff between retries (0.5s, 1s, 2s, ...), plus up to 0.5s of random jitter
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_BACKOFF_JITTER = 0.5
+# urllib3 < 2 has no backoff jitter
+_RETRY_JITTER_SUPPORTED = "backoff_jitter" in inspect.signature(Retry.__init__).parameters
+# a request is hedged only if its endpoint latency percentile is known from enough samples...
+HEDGE_MIN_SAMPLES = 20
+# ... computed on the latest samples only, and refreshed every few samples...
+HEDGE_WINDOW = 500
+HEDGE_REFRESH_SAMPLES = 20
+# ... and if hedging would not eat the last percents of the API rate limit
+HEDGE_RATE_LIMIT_RESERVE = 0.1
 
 # Rust applications declare their variants as Cargo features. Only two kinds of
 # features are considered app variants: the `default` one (the standard build)
@@ -142,8 +192,9 @@ class AppRepository(PyRepository.Repository):
         ```
         """
         try:
-            cargo = tomli.loads(self.makefile)
-        except tomli.TOMLDecodeError:
+            cargo = toml.loads(self.makefile)
+        except ValueError:
+            # whatever the TOML backend, decoding errors are ValueErrors
             return
         variants = [
             feature
@@ -185,10 +236,316 @@ class AppRepository(PyRepository.Repository):
             self._variant_values = []
 
 
+class AppSummary:
+    """
+    Compact, immutable summary of an application repository, meant to keep large listings in
+    memory. Unlike AppRepository, it holds neither the raw GitHub payload nor a Requester.
+    `sdk`, `devices`, `variants` and `head_sha` are None if they were not fetched. `devices` and
+    `variants` are empty if they were fetched, but the app has no manifest.
+    """
+
+    __slots__ = (
+        "name",
+        "archived",
+        "private",
+        "default_branch",
+        "pushed_at",
+        "head_sha",
+        "sdk",
+        "devices",
+        "variants",
+    )
+
+    name: str
+    archived: bool
+    private: bool
+    default_branch: str
+    pushed_at: Optional[datetime]
+    head_sha: Optional[str]
+    sdk: Optional[str]
+    devices: Optional[Tuple[str, ...]]
+    variants: Optional[Tuple[str, ...]]
+
+    def __init__(
+        self,
+        name: str,
+        archived: bool = False,
+        private: bool = False,
+        default_branch: str = "",
+        pushed_at: Optional[datetime] = None,
+        head_sha: Optional[str] = None,
+        sdk: Optional[str] = None,
+        devices: Optional[Iterable[str]] = None,
+        variants: Optional[Iterable[str]] = None,
+    ) -> None:
+        values = {
+            "name": name,
+            "archived": archived,
+            "private": private,
+            "default_branch": default_branch,
+            "pushed_at": pushed_at,
+            "head_sha": head_sha,
+            "sdk": sdk,
+            "devices": None if devices is None else tuple(sorted(devices)),
+            "variants": None if variants is None else tuple(variants),
+        }
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+
+    def __reduce__(self) -> Tuple[type, Tuple[Any, ...]]:
+        # the slots can not be restored by assignment
+        return AppSummary, tuple(getattr(self, key) for key in self.__slots__)
+
+    @classmethod
+    def from_repository(cls, repository: AppRepository, deep: bool = False) -> "AppSummary":
+        """
+        Summarizes an AppRepository. Only the manifest and variants already fetched are kept,
+        unless `deep` is True, in which case they are fetched, as well as the head commit SHA of
+        the current branch.
+        """
+        sdk: Optional[str] = None
+        devices: Optional[Iterable[str]] = None
+        variants: Optional[Iterable[str]] = None
+        try:
+            if deep or repository._manifest is not None:
+                sdk = repository.manifest.app.sdk
+                devices = repository.manifest.app.devices
+            if deep or repository._variant_values:
+                variants = repository.variants
+        except NoManifestException:
+            # fetched, but there is nothing to summarize
+            devices = () if devices is None else devices
+            variants = ()
+        return cls(
+            repository.name,
+            archived=repository.archived,
+            private=repository.private,
+            default_branch=repository.default_branch,
+            pushed_at=repository.pushed_at,
+            head_sha=(
+                repository.get_branch(repository.current_branch).commit.sha if deep else None
+            ),
+            sdk=sdk,
+            devices=devices,
+            variants=variants,
+        )
+
+    def rehydrate(self, github: "GitHubLedgerHQ") -> AppRepository:
+        """
+        Fetches back the full repository.
+        """
+        return github.get_app(self.name)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, AppSummary):
+            return False
+        return all(getattr(self, key) == getattr(other, key) for key in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, key) for key in self.__slots__))
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={getattr(self, key)!r}" for key in self.__slots__)
+        return f"AppSummary({fields})"
+
+
+App = Union[AppRepository, AppSummary]
+
+
+# (sdk, devices) of an app, from its manifest
+AppManifestValues = Tuple[Optional[str], Tuple[str, ...]]
+
+
+def _not_summarized(app: AppSummary, field: str) -> ValueError:
+    return ValueError(
+        f"The {field} of '{app.name}' were not fetched in its summary: filtering on them needs "
+        "`GitHubApps.compact(deep=True)` summaries, or `GitHubApps.rehydrate()`"
+    )
+
+
+def _app_manifest(app: App) -> Optional[AppManifestValues]:
+    """
+    The SDK and devices of the app, or None if it has no manifest.
+    """
+    if isinstance(app, AppSummary):
+        if app.devices is None:
+            raise _not_summarized(app, "SDK and devices")
+        if app.sdk is None and not app.devices:
+            return None
+        return app.sdk, app.devices
+    try:
+        manifest = app.manifest
+    except NoManifestException:
+        return None
+    return manifest.app.sdk, tuple(manifest.app.devices)
+
+
+def _app_has_variants(app: App) -> bool:
+    if isinstance(app, AppSummary):
+        if app.variants is None:
+            raise _not_summarized(app, "variants")
+        return bool(app.variants)
+    try:
+        return bool(app.variants)
+    except NoManifestException:
+        return False
+
+
+def _condition(condition: Condition, value: bool) -> bool:
+    if condition == Condition.WITHOUT:
+        return not value
+    if condition == Condition.ONLY:
+        return value
+    return True
+
+
+@dataclass(frozen=True)
+class AppQuery:
+    """
+    Immutable (and hashable) set of criteria on the apps of a GitHubApps listing. All the criteria
+    must be met. Queries can be combined with `&`.
+
+    - `names`: substrings of the app name (case insensitive)
+    - `archived`, `private`, `legacy`, `plugin`, `variants`: see `Condition`
+    - `only_list`: exact app names to keep (None means any)
+    - `exclude_list`: exact app names to discard
+    - `sdk`: the app SDK must be one of these (None means any)
+    - `devices`: the app must support all these devices
+    """
+
+    names: FrozenSet[str] = frozenset()
+    archived: Condition = Condition.WITH
+    private: Condition = Condition.WITH
+    legacy: Condition = Condition.WITH
+    plugin: Condition = Condition.WITH
+    variants: Condition = Condition.WITH
+    only_list: Optional[FrozenSet[str]] = None
+    exclude_list: FrozenSet[str] = frozenset()
+    sdk: Optional[FrozenSet[str]] = None
+    devices: FrozenSet[str] = frozenset()
+
+    @classmethod
+    def build(
+        cls,
+        name: Optional[str] = None,
+        archived: Condition = Condition.WITH,
+        private: Condition = Condition.WITH,
+        legacy: Condition = Condition.WITH,
+        plugin: Condition = Condition.WITH,
+        only_list: Optional[List[str]] = None,
+        exclude_list: Optional[List[str]] = None,
+        sdk: Optional[List[str]] = None,
+        devices: Optional[List[str]] = None,
+        variants: Condition = Condition.WITH,
+    ) -> "AppQuery":
+        """
+        Builds a query from `GitHubApps.filter` arguments (`only_list` takes precedence on
+        `exclude_list`). Device names are resolved the same way as in manifests.
+        """
+        return cls(
+            names=frozenset() if name is None else frozenset([name.lower()]),
+            archived=archived,
+            private=private,
+            legacy=legacy,
+            plugin=plugin,
+            variants=variants,
+            only_list=frozenset(only_list) if only_list else None,
+            exclude_list=frozenset(exclude_list) if exclude_list and not only_list else frozenset(),
+            sdk=None if sdk is None else frozenset(s.lower() for s in sdk),
+            devices=frozenset(Devices.get_by_name(d).sdk_name for d in devices or []),
+        )
+
+    def __and__(self, other: "AppQuery") -> "AppQuery":
+        conditions = dict()
+        for key in ("archived", "private", "legacy", "plugin", "variants"):
+            mine, theirs = getattr(self, key), getattr(other, key)
+            if Condition.WITH not in (mine, theirs) and mine != theirs:
+                raise ValueError(f"Incompatible '{key}' conditions: {mine.name} & {theirs.name}")
+            conditions[key] = theirs if mine == Condition.WITH else mine
+
+        def intersection(
+            mine: Optional[FrozenSet[str]], theirs: Optional[FrozenSet[str]]
+        ) -> Optional[FrozenSet[str]]:
+            if mine is None or theirs is None:
+                return theirs if mine is None else mine
+            return mine & theirs
+
+        return AppQuery(
+            names=self.names | other.names,
+            only_list=intersection(self.only_list, other.only_list),
+            exclude_list=self.exclude_list | other.exclude_list,
+            sdk=intersection(self.sdk, other.sdk),
+            devices=self.devices | other.devices,
+            **conditions,
+        )
+
+    def match(
+        self, app: App, manifest: Optional[Callable[[], Optional[AppManifestValues]]] = None
+    ) -> bool:
+        """
+        Single pass over every criterion, cheapest first: the app manifest is only read if the
+        criteria on its listing data (name, archived, private) are met. Criteria requiring the
+        manifest are not met by apps without one. `manifest` returns the app SDK and devices
+        (defaults to reading them from the app).
+        """
+        name = app.name.lower()
+        if self.only_list is not None and app.name not in self.only_list:
+            return False
+        if app.name in self.exclude_list:
+            return False
+        if not all(n in name for n in self.names):
+            return False
+        if not _condition(self.archived, bool(app.archived)):
+            return False
+        if not _condition(self.private, bool(app.private)):
+            return False
+        if not _condition(self.legacy, "legacy" in name):
+            return False
+        if not _condition(self.plugin, name.startswith(APP_PLUGIN_PREFIX)):
+            return False
+        if self.sdk is not None or self.devices:
+            values = manifest() if manifest is not None else _app_manifest(app)
+            if values is None:
+                return False
+            sdk, devices = values
+            if self.sdk is not None and sdk not in self.sdk:
+                return False
+            if self.devices and not self.devices.issubset(devices):
+                return False
+        if self.variants != Condition.WITH:
+            return _condition(self.variants, _app_has_variants(app))
+        return True
+
+
 class GitHubApps(list):
-    def __init__(self, apps: List[AppRepository]):
+    def __init__(self, apps: List[App]):
         super().__init__([r for r in apps if r.name.startswith("app-")])
 
+    def compact(self, deep: bool = False) -> "GitHubApps":
+        """
+        Returns the same apps, as AppSummary rather than AppRepository objects, to spare memory
+        (see `AppSummary.from_repository` for `deep`). Summaries built without `deep` can not be
+        filtered on their SDK, devices or variants, unless these were already fetched.
+        """
+        return GitHubApps(
+            [r if isinstance(r, AppSummary) else AppSummary.from_repository(r, deep) for r in self]
+        )
+
+    def rehydrate(self, github: "GitHubLedgerHQ") -> "GitHubApps":
+        """
+        Returns the same apps, as full AppRepository objects. Summarized apps are fetched again,
+        concurrently.
+        """
+        names = [r.name for r in self if isinstance(r, AppSummary)]
+        fetched = iter(github.get_apps(names)) if names else iter([])
+        return GitHubApps([next(fetched) if isinstance(r, AppSummary) else r for r in self])
+
     def filter(
         self,
         name: Optional[str] = None,
@@ -199,75 +556,511 @@ class GitHubApps(list):
         only_list: Optional[List[str]] = None,
         exclude_list: Optional[List[str]] = None,
         sdk: Optional[List[str]] = None,
+        devices: Optional[List[str]] = None,
+        variants: Condition = Condition.WITH,
     ) -> "GitHubApps":
-        new_list: List[AppRepository] = [i for i in self]
-        # only_list filtering (takes precedence on exclude_list)
-        if only_list:
-            new_list = [r for r in new_list if r.name in only_list]
-        # exclude_list filtering
-        elif exclude_list:
-            new_list = [r for r in new_list if r.name not in exclude_list]
-        # sdk filtering
-        # archived filtering
-        if archived == Condition.WITHOUT:
-            new_list = [r for r in new_list if not r.archived]
-        elif archived == Condition.ONLY:
-            new_list = [r for r in new_list if r.archived]
-        # private filtering
-        if private == Condition.WITHOUT:
-            new_list = [r for r in new_list if not r.private]
-        elif private == Condition.ONLY:
-            new_list = [r for r in new_list if r.private]
-        # name filtering
-        if name is not None:
-            new_list = [r for r in new_list if name.lower() in r.name.lower()]
-        # legacy apps filtering
-        if legacy == Condition.WITHOUT:
-            new_list = [r for r in new_list if "legacy" not in r.name.lower()]
-        elif legacy == Condition.ONLY:
-            new_list = [r for r in new_list if "legacy" in r.name.lower()]
-        # plugin apps filtering
-        if plugin == Condition.WITHOUT:
-            new_list = [r for r in new_list if not r.name.lower().startswith(APP_PLUGIN_PREFIX)]
-        elif plugin == Condition.ONLY:
-            new_list = [r for r in new_list if r.name.lower().startswith(APP_PLUGIN_PREFIX)]
-        if sdk is not None:
-            # Check list of sdk
-            sdk_list = [s.lower() for s in sdk]
-            res_list = []
-            for r in new_list:
-                try:
-                    if r.manifest.app.sdk in sdk_list:
-                        res_list.append(r)
-                except NoManifestException:
-                    pass
-            new_list = res_list
-
-        return GitHubApps(new_list)
-
-    def first(self, *args, **kwargs) -> Optional[AppRepository]:
+        return self.query(
+            AppQuery.build(
+                name=name,
+                archived=archived,
+                private=private,
+                legacy=legacy,
+                plugin=plugin,
+                only_list=only_list,
+                exclude_list=exclude_list,
+                sdk=sdk,
+                devices=devices,
+                variants=variants,
+            )
+        )
+
+    def _check_cache(self) -> None:
+        # indexes and results are only valid as long as the list content does not change
+        fingerprint = tuple(id(r) for r in self)
+        if getattr(self, "_fingerprint", None) != fingerprint:
+            self._fingerprint = fingerprint
+            self._indexes: Dict[str, Dict[Any, Set[int]]] = dict()
+            self._results: Dict[AppQuery, List[App]] = dict()
+            self._manifests: Dict[int, Optional[AppManifestValues]] = dict()
+
+    def _index(self, key: str) -> Dict[Any, Set[int]]:
+        """
+        Lazily builds an index (value -> positions of the matching apps in the list). Only the
+        listing data are indexed: indexing the manifests would fetch the manifest of every app.
+        """
+        if key not in self._indexes:
+            index: Dict[Any, Set[int]] = defaultdict(set)
+            for position, app in enumerate(self):
+                if key == "token":
+                    values: Iterable[Any] = app.name.lower().split("-")
+                elif key == "archived":
+                    values = [bool(app.archived)]
+                elif key == "private":
+                    values = [bool(app.private)]
+                else:
+                    raise KeyError(f"Unknown index '{key}'")
+                for value in values:
+                    index[value].add(position)
+            self._indexes[key] = index
+        return self._indexes[key]
+
+    def _manifest(self, position: int) -> Optional[AppManifestValues]:
+        # read once per listing, and only for the apps a query could match
+        if position not in self._manifests:
+            self._manifests[position] = _app_manifest(self[position])
+        return self._manifests[position]
+
+    def _candidates(self, query: "AppQuery") -> Set[int]:
+        """
+        Narrows down the apps matching the query, using the listing indexes.
+        """
+        candidates = set(range(len(self)))
+        for key, condition in (("archived", query.archived), ("private", query.private)):
+            if condition != Condition.WITH:
+                candidates &= self._index(key).get(condition == Condition.ONLY, set())
+        for name in query.names:
+            # a name without '-' can only be found inside a single token
+            if "-" not in name:
+                tokens = self._index("token")
+                candidates &= set().union(*(tokens[t] for t in tokens if name in t))
+        return candidates
+
+    def query(self, query: "AppQuery") -> "GitHubApps":
+        """
+        Returns the apps matching the query. Indexes are built on first need and results are
+        cached per query, so repeating queries on the same listing is cheap. They are dropped if
+        apps are added to or removed from the listing, but the apps themselves (ex: their
+        manifest) are expected not to change.
+        Raises ValueError if a criterion needs data that an AppSummary of the listing lacks.
+        """
+        self._check_cache()
+        if query not in self._results:
+            self._results[query] = [
+                self[position]
+                for position in sorted(self._candidates(query))
+                if query.match(self[position], partial(self._manifest, position))
+            ]
+        return GitHubApps(self._results[query])
+
+    def first(self, *args, **kwargs) -> Optional[App]:
         results = self.filter(*args, **kwargs)
         return results[0] if results else None
 
 
+@dataclass
+class ConnectionStats:
+    requests: int = 0
+    connections: int = 0
+
+    @property
+    def reused(self) -> int:
+        return max(self.requests - self.connections, 0)
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused / self.requests if self.requests else 0.0
+
+    def __sub__(self, other: "ConnectionStats") -> "ConnectionStats":
+        # urllib3 counters restart from zero if a host pool is evicted then re-created, hence the
+        # clamping (the difference is then an underestimation)
+        return ConnectionStats(
+            requests=max(self.requests - other.requests, 0),
+            connections=max(self.connections - other.connections, 0),
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"{self.requests} requests, {self.connections} handshakes, "
+            f"{self.reuse_ratio:.0%} connection reuse"
+        )
+
+
+class LatencyStats:
+    """
+    Thread-safe record of the GitHub API requests latencies (in seconds), per endpoint.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        # (endpoint, percentile) -> (number of samples at computation time, percentile value)
+        self._percentiles: Dict[Tuple[str, float], Tuple[int, float]] = dict()
+
+    def add(self, endpoint: str, latency: float) -> None:
+        with self._lock:
+            self._latencies[endpoint].append(latency)
+
+    def percentile(self, endpoint: str, percentile: float) -> Optional[float]:
+        """
+        Returns the given percentile (between 0 and 100) of the endpoint latest latencies, or None
+        if too few requests have been sent to this endpoint for the value to be meaningful.
+        The value is cached, and only refreshed every `HEDGE_REFRESH_SAMPLES` new samples.
+        """
+        with self._lock:
+            latencies = self._latencies.get(endpoint, [])
+            count = len(latencies)
+            if count < HEDGE_MIN_SAMPLES:
+                return None
+            cached = self._percentiles.get((endpoint, percentile))
+            if cached is None or count - cached[0] >= HEDGE_REFRESH_SAMPLES:
+                value = _percentile(sorted(latencies[-HEDGE_WINDOW:]), percentile)
+                cached = self._percentiles[(endpoint, percentile)] = (count, value)
+            return cached[1]
+
+    def snapshot(self) -> Dict[str, int]:
+        """
+        Returns the number of samples per endpoint, to be given to `report` later on so that it
+        only covers the requests sent in between.
+        """
+        with self._lock:
+            return {endpoint: len(values) for endpoint, values in self._latencies.items()}
+
+    def report(self, since: Optional[Dict[str, int]] = None) -> Dict[str, Dict[str, float]]:
+        since = since or dict()
+        with self._lock:
+            latencies = {
+                endpoint: sorted(values[since.get(endpoint, 0) :])
+                for endpoint, values in self._latencies.items()
+            }
+        return {
+            endpoint: {
+                "count": len(values),
+                "p50": _percentile(values, 50),
+                "p95": _percentile(values, 95),
+                "p99": _percentile(values, 99),
+            }
+            for endpoint, values in sorted(latencies.items())
+            if values
+        }
+
+    def summary(self, since: Optional[Dict[str, int]] = None) -> str:
+        return "\n".join(
+            f"{endpoint}: {int(r['count'])} requests, p50 {r['p50']:.3f}s, "
+            f"p95 {r['p95']:.3f}s, p99 {r['p99']:.3f}s"
+            for endpoint, r in self.report(since).items()
+        )
+
+    def __str__(self) -> str:
+        return self.summary()
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    # nearest-rank method
+    rank = -(-percentile * len(sorted_values) // 100)
+    return sorted_values[min(max(int(rank), 1), len(sorted_values)) - 1]
+
+
+def _endpoint(verb: str, url: str) -> str:
+    """
+    Reduces a request to its endpoint, so that requests on different repositories / files are
+    grouped together, ex: `GET /repos/LedgerHQ/app-boilerplate/contents/ledger_app.toml` becomes
+    `GET /repos/{owner}/{repo}/contents`
+    """
+    parts = urlparse(url).path.strip("/").split("/")
+    if parts[0] == "repos" and len(parts) >= 3:
+        parts = ["repos", "{owner}", "{repo}"] + parts[3:4]
+    elif parts[0] in ("orgs", "users") and len(parts) >= 2:
+        parts = [parts[0], "{owner}"] + parts[2:3]
+    return f"{verb} /{'/'.join(parts)}"
+
+
+def default_retry(max_rate_limit_wait: Optional[float] = None) -> GithubRetry:
+    """
+    PyGithub's `GithubRetry` already retries server (5xx) and abuse / secondary rate limit (403)
+    errors, this policy adds an exponential backoff with random jitter between the retries, so that
+    concurrent workers do not retry in lockstep.
+    Waiting for a rate limit reset is bounded by `max_rate_limit_wait` seconds (unbounded if None),
+    after which `RateLimitExceededExceedsMaxWait` is raised.
+    The jitter needs urllib3 >= 2: with urllib3 1.26, the backoff is not jittered.
+    """
+    jitter: Dict[str, float] = dict()
+    if _RETRY_JITTER_SUPPORTED:
+        jitter["backoff_jitter"] = RETRY_BACKOFF_JITTER
+    return GithubRetry(
+        total=DEFAULT_RETRIES,
+        connect=DEFAULT_CONNECT_RETRIES,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        max_rate_limit_wait=max_rate_limit_wait,
+        **jitter,
+    )
+
+
+Request = Callable[..., Tuple[Dict[str, Any], Any]]
+
+
+class HedgedRequester:
+    """
+    Wraps the `requestJsonAndCheck` method of PyGithub Requesters to record the requests
+    latencies and, optionally, hedge them: if a GET request has not answered after the
+    `hedge_percentile` latency of its endpoint, a duplicate is sent and the first successful
+    answer wins.
+
+    Hedged requests run in a dedicated thread pool of `max_workers` threads, which must be large
+    enough for every concurrent request and its duplicate. `close()` shuts this pool down.
+    """
+
+    def __init__(self, hedge_percentile: Optional[float] = None, max_workers: int = 1) -> None:
+        self._hedge_percentile = hedge_percentile
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if hedge_percentile is not None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="ledgered-hedge"
+            )
+        self._lock = Lock()
+        self._hedged = 0
+        self._requesters: "WeakSet[Requester]" = WeakSet()
+        self.latencies = LatencyStats()
+
+    @property
+    def hedged(self) -> int:
+        return self._hedged
+
+    @property
+    def requesters(self) -> List[Requester]:
+        """
+        The wrapped requesters still alive.
+        """
+        with self._lock:
+            return list(self._requesters)
+
+    def install(self, requester: Requester) -> None:
+        """
+        Wraps the requester, and the requesters it derives (see `Requester.withLazy` and
+        `Requester.withApiVersion`), which PyGithub builds from scratch.
+        """
+        with self._lock:
+            self._requesters.add(requester)
+        request = requester.requestJsonAndCheck
+        with_lazy = requester.withLazy
+        with_api_version = requester.withApiVersion
+
+        def derived(build: Callable[[Any], Requester]) -> Callable[[Any], Requester]:
+            def wrapper(value: Any) -> Requester:
+                new_requester = build(value)
+                if new_requester is not requester:
+                    self.install(new_requester)
+                return new_requester
+
+            return wrapper
+
+        def request_json_and_check(verb: str, url: str, *args, **kwargs):
+            return self(request, lambda: requester.rate_limiting, verb, url, *args, **kwargs)
+
+        # instance attributes, so only this requester (and the objects built from it) is affected
+        requester.requestJsonAndCheck = request_json_and_check  # type: ignore[method-assign]
+        requester.withLazy = derived(with_lazy)  # type: ignore[method-assign,assignment]
+        requester.withApiVersion = derived(with_api_version)  # type: ignore[method-assign,assignment]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _within_budget(self, rate_limiting: Callable[[], Tuple[int, int]]) -> bool:
+        remaining, limit = rate_limiting()
+        # (-1, -1) until a first response has been received
+        return limit <= 0 or remaining > limit * HEDGE_RATE_LIMIT_RESERVE
+
+    def _timed(
+        self, request: Request, endpoint: str, *args, **kwargs
+    ) -> Tuple[Dict[str, Any], Any]:
+        start = time.perf_counter()
+        with span("github.request", endpoint):
+            result = request(*args, **kwargs)
+        self.latencies.add(endpoint, time.perf_counter() - start)
+        return result
+
+    def _submit(self, request: Request, endpoint: str, *args, **kwargs) -> Tuple[Future, Event]:
+        assert self._executor is not None
+        started = Event()
+
+        def run() -> Tuple[Dict[str, Any], Any]:
+            started.set()
+            return self._timed(request, endpoint, *args, **kwargs)
+
+        return self._executor.submit(run), started
+
+    def __call__(
+        self,
+        request: Request,
+        rate_limiting: Callable[[], Tuple[int, int]],
+        verb: str,
+        url: str,
+        *args,
+        **kwargs,
+    ) -> Tuple[Dict[str, Any], Any]:
+        endpoint = _endpoint(verb, url)
+        delay = None
+        if self._hedge_percentile is not None and verb == "GET":
+            delay = self.latencies.percentile(endpoint, self._hedge_percentile)
+        if delay is None:
+            return self._timed(request, endpoint, verb, url, *args, **kwargs)
+
+        first, started = self._submit(request, endpoint, verb, url, *args, **kwargs)
+        # the hedging delay starts with the request itself, not while it waits for a thread
+        started.wait()
+        done, _ = wait([first], timeout=delay)
+        if done or not self._within_budget(rate_limiting):
+            return first.result()
+        logging.debug("Hedging '%s' after %.3fs", url, delay)
+        with self._lock:
+            self._hedged += 1
+        second, _ = self._submit(request, endpoint, verb, url, *args, **kwargs)
+        pending = {first, second}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                # the first successful answer wins, an error is raised only if both failed
+                if future.exception() is None or not pending:
+                    return future.result()
+
+
 class GitHubLedgerHQ(PyGithub):
-    def __init__(self, *args, **kwargs) -> None:
+    def __init__(
+        self,
+        *args,
+        hedge_percentile: Optional[float] = None,
+        max_rate_limit_wait: Optional[float] = None,
+        **kwargs,
+    ) -> None:
+        """
+        Every argument is forwarded to PyGithub, notably:
+        - `pool_size`: the number of HTTPS connections kept alive toward the GitHub API (defaults
+          to `DEFAULT_MAX_WORKERS`). It also caps the number of workers used by concurrent
+          operations (see `get_apps`), so that each worker reuses a connection instead of opening
+          (and TLS handshaking) a new one,
+        - `timeout`: the request timeout, in seconds,
+        - `retry`: the number of retries, or an urllib3 `Retry` policy (defaults to
+          `default_retry(max_rate_limit_wait)`).
+
+        `max_rate_limit_wait` bounds (in seconds) the time spent waiting for a rate limit reset
+        before retrying, with the default retry policy.
+        If `hedge_percentile` (between 0 and 100) is given, GET requests slower than this
+        percentile of their endpoint latency are hedged (see `HedgedRequester`). The connection
+        pool is then doubled so that every worker can run its request and a duplicate.
+        """
+        pool_size: int = kwargs.get("pool_size") or DEFAULT_MAX_WORKERS
+        kwargs["pool_size"] = pool_size if hedge_percentile is None else 2 * pool_size
+        kwargs.setdefault("retry", default_retry(max_rate_limit_wait))
         super().__init__(*args, **kwargs)
+        # the worker cap of the concurrent operations
+        self._pool_size = pool_size
+        # every PyGithub object built from this instance shares its requester, so wrapping it
+        # covers all the requests (fetching repositories, manifests, ...)
+        self._requests = HedgedRequester(hedge_percentile, max_workers=kwargs["pool_size"])
+        self._requests.install(self.requester)
         self._org = self.get_organization(LEDGER_ORG_NAME)
         self._apps: Optional[GitHubApps] = None
 
     @property
     def apps(self) -> GitHubApps:
         if self._apps is None:
-            with patch("github.Repository.Repository", AppRepository):
-                self._apps = GitHubApps(self._org.get_repos())
+            # Same listing as PyGithub's `Organization.get_repos()` (see the
+            # `test_apps_matches_get_repos` unit test), but directly building AppRepository
+            # objects from the listed payloads, rather than patching `github.Repository`
+            repositories = PyPaginatedList.PaginatedList(
+                AppRepository,
+                self.requester,
+                f"{self._org.url}/repos",
+                None,
+                headers={"Accept": Consts.repoVisibilityPreview},
+            )
+            with self._measure("Listing the organization apps"):
+                self._apps = GitHubApps(list(repositories))
         return self._apps
 
-    def get_app(self, name) -> AppRepository:
+    def get_app(self, name: str) -> AppRepository:
         """
         Fetch a specific application repository on GitHub.
         The name must be exact.
         """
         assert name.startswith("app-"), f"'{name}' is not prefixed with 'app-'!"
-        with patch("github.Repository.Repository", AppRepository):
-            return self._org.get_repo(name)
+        # Same construction as PyGithub's `Organization.get_repo()`, so the repository is
+        # fetched eagerly or lazily depending on the `lazy` option, as before
+        return AppRepository(
+            self.requester,
+            url=f"/repos/{self._org.login}/{quote(name, safe='')}",
+            accept=Consts.repoVisibilityPreview,
+        )
+
+    def get_apps(self, names: Iterable[str], max_workers: Optional[int] = None) -> GitHubApps:
+        """
+        Fetch several application repositories on GitHub, concurrently.
+        The names must be exact. The returned apps keep the order of the given names.
+        The number of workers defaults to the connection pool size, and is capped to it.
+        """
+        names = list(names)
+        for name in names:
+            assert name.startswith("app-"), f"'{name}' is not prefixed with 'app-'!"
+        max_workers = self._workers(max_workers)
+        with self._measure(f"Fetching {len(names)} apps with {max_workers} workers"):
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return GitHubApps(list(executor.map(self.get_app, names)))
+
+    def _workers(self, max_workers: Optional[int]) -> int:
+        if max_workers is None:
+            return self._pool_size
+        if max_workers <= 0:
+            raise ValueError(f"{max_workers} workers requested, but at least 1 is needed")
+        if max_workers > self._pool_size:
+            # more workers than connections would open (and handshake) throwaway connections
+            logging.warning(
+                "%d workers requested, capped to the connection pool size (%d). Use "
+                "`GitHubLedgerHQ(pool_size=...)` to run more workers.",
+                max_workers,
+                self._pool_size,
+            )
+            return self._pool_size
+        return max_workers
+
+    @contextmanager
+    def _measure(self, operation: str) -> Iterator[None]:
+        """
+        Logs the connection statistics of the enclosed operation.
+        """
+        before = self.stats
+        latencies = self.latencies.snapshot()
+        hedged = self._requests.hedged
+        try:
+            yield
+        finally:
+            logging.info("%s: %s", operation, self.stats - before)
+            logging.info(
+                "Requests latencies (%d hedged):\n%s",
+                self._requests.hedged - hedged,
+                self.latencies.summary(latencies),
+            )
+
+    def close(self) -> None:
+        self._requests.close()
+        super().close()
+
+    @property
+    def latencies(self) -> LatencyStats:
+        """
+        The latencies of the requests sent toward the GitHub API, per endpoint.
+        """
+        return self._requests.latencies
+
+    @property
+    def stats(self) -> ConnectionStats:
+        """
+        Counts the requests sent and the connections opened (meaning TLS handshakes) toward the
+        GitHub API since this instance was created. Subtract two snapshots to get the counts of
+        a given operation.
+
+        The requesters derived by PyGithub (lazy objects, other API versions) have their own
+        connections, which are counted as long as these requesters are alive: the counts of the
+        garbage-collected ones are lost.
+        """
+        stats = ConnectionStats()
+        for requester in self._requests.requesters:
+            # PyGithub does not expose its HTTP connection, hence the private attribute access
+            connection = getattr(requester, "_Requester__connection", None)
+            adapter = getattr(connection, "adapter", None)
+            if adapter is None:
+                continue
+            for key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools[key]
+                stats.requests += pool.num_requests
+                stats.connections += pool.num_connections
+        return stats
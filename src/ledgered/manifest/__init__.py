@@ -1,6 +1,22 @@
 from .app import AppConfig
+from .cache import MANIFEST_CACHE, ManifestCache
+from .check import CheckProblem, CheckResult
 from .constants import MANIFEST_FILE_NAME
+from .graph import CyclicDependencyError, DependencyGraph
 from .manifest import Manifest
+from .materialize import DependencyMaterializer
 from .tests import TestsConfig
 
-__all__ = ["AppConfig", "Manifest", "MANIFEST_FILE_NAME", "TestsConfig"]
+__all__ = [
+    "AppConfig",
+    "CheckProblem",
+    "CheckResult",
+    "CyclicDependencyError",
+    "DependencyGraph",
+    "DependencyMaterializer",
+    "Manifest",
+    "MANIFEST_CACHE",
+    "MANIFEST_FILE_NAME",
+    "ManifestCache",
+    "TestsConfig",
+]
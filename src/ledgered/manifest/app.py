@@ -1,24 +1,40 @@
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Union
+from typing import Dict, Iterable, Union
 
 from ledgered.serializers import Jsonable, JsonSet
 from ledgered.devices import Devices
+from ledgered.utils.timing import span
 
 
 @dataclass
-class AppConfig(Jsonable):
+class AppConfig(Jsonable, memoize=True):
     sdk: str
     build_directory: Path
     devices: JsonSet
 
     def __init__(self, sdk: str, build_directory: Union[str, Path], devices: Iterable[str]) -> None:
-        sdk = sdk.lower()
-        if sdk not in ["rust", "c"]:
-            raise ValueError(f"'{sdk}' unknown. Must be either 'C' or 'Rust'")
-        self.sdk = sdk
-        self.build_directory = Path(build_directory)
-        self.devices = JsonSet(Devices.get_by_name(device).sdk_name for device in devices)
+        with span("app.validate"):
+            sdk = sdk.lower()
+            if sdk not in ["rust", "c"]:
+                raise ValueError(f"'{sdk}' unknown. Must be either 'C' or 'Rust'")
+            self.sdk = sdk
+            self.build_directory = Path(build_directory)
+            self.devices = JsonSet(Devices.get_by_name(device).sdk_name for device in devices)
+
+    @classmethod
+    def from_json(cls, data: Dict, trusted: bool = False) -> "AppConfig":
+        """
+        Rebuilds the configuration from its `json` form. If `trusted` (the data comes from a
+        validated configuration), the values are not validated again.
+        """
+        if not trusted:
+            return cls(**data)
+        config = cls.__new__(cls)
+        config.sdk = data["sdk"]
+        config.build_directory = Path(data["build_directory"])
+        config.devices = JsonSet(data["devices"])
+        return config
 
     @property
     def is_rust(self) -> bool:
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING, Callable, Optional, Tuple, Union
+
+from ledgered import __version__
+from .utils import getLogger
+
+if TYPE_CHECKING:
+    from .manifest import Manifest
+
+CACHE_DIRECTORY_ENV = "LEDGERED_MANIFEST_CACHE"
+DEFAULT_CACHE_SIZE = 128
+
+# (resolved path, modification time in ns, size in bytes)
+CacheKey = Tuple[str, int, int]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.hits} hits, {self.disk_hits} disk hits, {self.misses} misses, "
+            f"{self.evictions} evictions"
+        )
+
+
+class ManifestCache:
+    """
+    Cache of the manifests parsed from files, keyed by the file resolved path, modification time
+    and size, so that a modified file is parsed again.
+
+    It is made of an in-process LRU of `maxsize` entries and, if `directory` is given, of an
+    on-disk cache shared between processes, storing the parsed manifests in their `json` form
+    (loading them back with `Manifest.from_json` skips both the TOML parsing and the manifest
+    validation, so the directory is created only accessible by its user).
+
+    Cached manifests are shared between callers and must not be modified.
+    """
+
+    def __init__(
+        self, maxsize: int = DEFAULT_CACHE_SIZE, directory: Optional[Union[str, Path]] = None
+    ) -> None:
+        self.maxsize = maxsize
+        self.directory = None if directory is None else Path(directory)
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[CacheKey, Manifest]" = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def key(path: Path) -> CacheKey:
+        path = path.resolve()
+        stat = path.stat()
+        return (str(path), stat.st_mtime_ns, stat.st_size)
+
+    def _disk_path(self, key: CacheKey) -> Path:
+        assert self.directory is not None
+        # the ledgered version is part of the name, as the manifest format may change
+        digest = hashlib.sha256(repr((__version__, key)).encode()).hexdigest()
+        return self.directory / f"{digest}.json"
+
+    def _disk_load(self, key: CacheKey) -> Optional["Manifest"]:
+        if self.directory is None:
+            return None
+        from .manifest import Manifest
+
+        try:
+            with self._disk_path(key).open("rb") as filee:
+                return Manifest.from_json(json.load(filee), trusted=True)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            getLogger().warning("Ignoring corrupted manifest cache entry: %s", e)
+            return None
+
+    def _disk_store(self, key: CacheKey, manifest: "Manifest") -> None:
+        if self.directory is None:
+            return
+        try:
+            self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # written in a temporary file first, so that concurrent processes never read a
+            # partial entry
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as filee:
+                json.dump(manifest.json, filee)
+            os.replace(tmp, self._disk_path(key))
+        except OSError as e:
+            getLogger().warning("Could not write the manifest cache: %s", e)
+
+    def get(self, path: Path, load: Callable[[Path], "Manifest"]) -> "Manifest":
+        """
+        Returns the manifest cached for this file, or loads it with `load` and caches it.
+        """
+        key = self.key(path)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return self._entries[key]
+        manifest = self._disk_load(key)
+        if manifest is not None:
+            with self._lock:
+                self.stats.disk_hits += 1
+        else:
+            manifest = load(path)
+            self._disk_store(key, manifest)
+            with self._lock:
+                self.stats.misses += 1
+        with self._lock:
+            self._entries[key] = manifest
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+        return manifest
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        """
+        Drops the entries of the given file (whatever its version), or every entry if no path is
+        given. This also applies to the on-disk cache.
+        """
+        with self._lock:
+            if path is None:
+                keys = list(self._entries)
+            else:
+                resolved = str(path.resolve())
+                keys = [key for key in self._entries if key[0] == resolved]
+            for key in keys:
+                del self._entries[key]
+        if self.directory is None or not self.directory.is_dir():
+            return
+        if path is None:
+            for entry in self.directory.glob("*.json"):
+                entry.unlink(missing_ok=True)
+        elif path.is_file():
+            # on-disk entries are only known by their hashed key, hence the current one only
+            self._disk_path(self.key(path)).unlink(missing_ok=True)
+
+
+MANIFEST_CACHE = ManifestCache(directory=os.environ.get(CACHE_DIRECTORY_ENV) or None)
@@ -0,0 +1,94 @@
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from ledgered.serializers import Jsonable, JsonList
+
+
+class PathKind(str, Enum):
+    FILE = "file"
+    DIRECTORY = "directory"
+
+
+@dataclass
+class ExpectedPath:
+    """
+    A path referenced by a manifest. `field` is the manifest field referencing it. A missing
+    `blocking` path makes the manifest invalid, a missing non-blocking one is only reported (ex:
+    test dependencies, which are fetched later on).
+    """
+
+    field: str
+    path: Path
+    kind: PathKind
+    blocking: bool = True
+
+
+@dataclass
+class CheckProblem(Jsonable):
+    field: str
+    path: Path
+    message: str
+    blocking: bool
+
+    def __str__(self) -> str:
+        return f"{'error' if self.blocking else 'warning'}: [{self.field}] {self.message}"
+
+
+@dataclass
+class CheckResult(Jsonable):
+    base_directory: Path
+    problems: JsonList
+
+    @property
+    def ok(self) -> bool:
+        return not any(problem.blocking for problem in self.problems)
+
+    def __str__(self) -> str:
+        if not self.problems:
+            return f"{self.base_directory}: OK"
+        return "\n".join(
+            [f"{self.base_directory}: {'OK' if self.ok else 'KO'}"]
+            + [f"  {problem}" for problem in self.problems]
+        )
+
+
+def _scan_parent(parent: Path) -> Dict[str, Tuple[bool, bool]]:
+    """
+    Lists a directory once: entry name -> (is a file, is a directory)
+    """
+    try:
+        with os.scandir(parent) as entries:
+            return {entry.name: (entry.is_file(), entry.is_dir()) for entry in entries}
+    except OSError:
+        return dict()
+
+
+def check_paths(base_directory: Path, expected: List[ExpectedPath]) -> CheckResult:
+    """
+    Checks the existence of every expected path, scanning each parent directory only once,
+    however many paths it holds.
+    """
+    by_parent: Dict[Path, List[ExpectedPath]] = defaultdict(list)
+    for expectation in expected:
+        by_parent[expectation.path.parent].append(expectation)
+
+    problems = JsonList()
+    for parent, expectations in by_parent.items():
+        entries = _scan_parent(parent)
+        for expectation in expectations:
+            is_file, is_dir = entries.get(expectation.path.name, (False, False))
+            found = is_file if expectation.kind == PathKind.FILE else is_dir
+            if not found:
+                problems.append(
+                    CheckProblem(
+                        field=expectation.field,
+                        path=expectation.path,
+                        message=f"No {expectation.kind.value} '{expectation.path}' was found",
+                        blocking=expectation.blocking,
+                    )
+                )
+    return CheckResult(base_directory=base_directory, problems=problems)
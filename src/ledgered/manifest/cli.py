@@ -1,81 +1,176 @@
-import json
 import logging
+import os
+import shlex
 import sys
-from argparse import ArgumentParser
+from argparse import ArgumentParser, Namespace
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, cast
+from typing import IO, TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Union, cast
 
+from .check import CheckProblem, CheckResult
 from .constants import MANIFEST_FILE_NAME
-from ..github import GitHubLedgerHQ
+from .graph import CyclicDependencyError, DependencyGraph
+from ..serializers import WRITE_BUFFER_SIZE, JsonList, memoize_json, write_json, write_ndjson
 from .manifest import Manifest
+from .matrix import MatrixEntry, build_matrix, parse_rule, shard
 from .tests import TestsConfig, PyTestsConfig
 from .utils import getLogger
+from ..utils.timing import add_instrumentation_arguments, instrumented, span
 
+if TYPE_CHECKING:
+    # PyGithub is slow to import: only imported when a manifest is fetched from GitHub
+    from ..github import GitHubLedgerHQ
 
-def text_output(content: Dict, indent: int = 0) -> None:
+
+class OutputError(ValueError):
+    pass
+
+
+def text_lines(content: Dict, indent: int = 0) -> Iterator[str]:
+    """
+    Renders the content as indented text lines, without altering it. A single scalar value is
+    rendered alone.
+    """
     if indent == 0 and len(content) == 1:
-        k, v = content.popitem()
-        if isinstance(v, (dict, list, set, tuple)):
-            content = {k: v}
-        else:
-            print(v)
+        value = next(iter(content.values()))
+        if not isinstance(value, (dict, list, set, tuple)):
+            yield str(value)
             return
+    padding = " " * 2 * indent
     for key, value in content.items():
         if isinstance(value, dict):
-            print(f"{' ' * 2 * indent}{key}:")
-            text_output(value, indent=indent + 1)
+            yield f"{padding}{key}:"
+            yield from text_lines(value, indent=indent + 1)
         elif isinstance(value, (list, set, tuple)):
-            print(f"{' ' * 2 * indent}{key}:")
+            yield f"{padding}{key}:"
             for i, element in enumerate(value):
                 if isinstance(element, dict):
-                    print(f"{' ' * (2 * indent + 1)}{i}.")
-                    text_output(element, indent=indent + 1)
+                    yield f"{' ' * (2 * indent + 1)}{i}."
+                    yield from text_lines(element, indent=indent + 1)
                 else:
-                    print(f"{' ' * 2 * indent}{i}. {element}")
+                    yield f"{padding}{i}. {element}"
         else:
-            print(f"{' ' * 2 * indent}{key}: {value}")
+            yield f"{padding}{key}: {value}"
 
 
-def set_parser() -> ArgumentParser:
-    parser = ArgumentParser(
-        prog="ledger-manifest",
-        description="Utilitary to parse and check an application 'ledger_app.toml' manifest",
-    )
+def write_lines(
+    lines: Iterable[str], stream: IO[str], buffer_size: int = WRITE_BUFFER_SIZE
+) -> None:
+    """
+    Writes the lines to a text stream, in chunks of about `buffer_size` characters.
+    """
+    buffer: List[str] = list()
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line) + 1
+        if size >= buffer_size:
+            buffer.append("")
+            stream.write("\n".join(buffer))
+            buffer.clear()
+            size = 0
+    if buffer:
+        buffer.append("")
+        stream.write("\n".join(buffer))
 
-    # generic options
-    parser.add_argument("-v", "--verbose", action="count", default=0)
-    parser.add_argument(
-        "-c",
-        "--check",
-        required=False,
-        type=Path,
-        default=None,
-        help="Check the manifest content against the provided directory.",
-    )
 
-    # display options
-    parser.add_argument(
-        "source",
-        type=Path,
-        help=f"The manifest file (generally '{MANIFEST_FILE_NAME}' at the root of "
-        "the application's repository), or the name of the app if the `--url` "
-        "option is activated",
-    )
-    parser.add_argument(
-        "--token",
-        required=False,
-        default=None,
-        help="Provide a GitHub token so that functional test won't trigger API "
-        "restrictions too fast",
-    )
-    parser.add_argument(
-        "-u",
-        "--url",
-        action="store_true",
-        default=False,
-        help="Tells if the `manifest` should be fetched from `github.com` rather than a file",
-    )
+def text_output(content: Dict) -> None:
+    write_lines(text_lines(content), sys.stdout)
+
+
+def scan_output(root: Path) -> bool:
+    """
+    Outputs every manifest found under `root` as a JSON line, as soon as it is loaded.
+    Returns False if at least one manifest could not be loaded.
+    """
+    success = True
+
+    def lines() -> Iterator[Dict]:
+        nonlocal success
+        for path, result in Manifest.scan(root):
+            line: Dict = {"path": str(path)}
+            if isinstance(result, Exception):
+                success = False
+                line["error"] = str(result)
+            else:
+                line["manifest"] = result
+            yield line
+
+    write_ndjson(lines(), sys.stdout, flush=True)
+    return success
+
+
+def check_checkout(directory: Path) -> CheckResult:
+    """
+    Loads the manifest of an application checkout and checks every path it references.
+    """
+    try:
+        manifest = Manifest.from_path(directory, use_cache=True)
+    except Exception as e:
+        return CheckResult(
+            base_directory=directory,
+            problems=JsonList(
+                [CheckProblem(field="", path=directory, message=str(e), blocking=True)]
+            ),
+        )
+    return manifest.validate(directory)
+
+
+def check_all_output(directories: List[Path], as_json: bool = False) -> bool:
+    """
+    Checks several application checkouts concurrently, and outputs their results in the given
+    order, either as text or as JSON lines. Returns False if at least one check failed.
+    """
+    success = True
+
+    def results() -> Iterator[CheckResult]:
+        nonlocal success
+        with ThreadPoolExecutor() as executor:
+            for result in executor.map(check_checkout, directories):
+                success &= result.ok
+                yield result
+
+    if as_json:
+        write_ndjson(
+            ({**cast(Dict, result.json), "ok": result.ok} for result in results()),
+            sys.stdout,
+            flush=True,
+        )
+    else:
+        for result in results():
+            write_lines([str(result)], sys.stdout)
+            sys.stdout.flush()
+    return success
+
+
+def dependency_plan_output(root: Path) -> bool:
+    """
+    Outputs, as JSON, the fetch / build plan of the test dependencies of every manifest found under
+    `root`. Applications are named after the directory holding their manifest.
+    Returns False if a manifest could not be loaded or the dependencies are cyclic.
+    """
+    logger = getLogger()
+    graph = DependencyGraph()
+    success = True
+    for path, result in Manifest.scan(root):
+        if isinstance(result, Exception):
+            logger.error("Could not load '%s': %s", path, result)
+            success = False
+        else:
+            graph.add(path.parent.name, result)
+    try:
+        write_json(graph.json, sys.stdout)
+    except CyclicDependencyError as e:
+        logger.error("%s", e)
+        return False
+    return success
+
+
+def add_output_arguments(parser: ArgumentParser) -> None:
+    """
+    The manifest content selectors, shared by the command line and the batch queries.
+    """
     parser.add_argument(
         "-os",
         "--output-sdk",
@@ -135,9 +230,6 @@ def set_parser() -> ArgumentParser:
         nargs="*",
         help="outputs the use cases. Fails if none",
     )
-    parser.add_argument(
-        "-j", "--json", required=False, action="store_true", help="outputs as JSON rather than text"
-    )
     ##############################################################
     # New commands for Manifest v2
     ##############################################################
@@ -165,38 +257,250 @@ def set_parser() -> ArgumentParser:
         nargs="*",
         help="outputs the dependencies of the pytest (functional) tests. Fails if none",
     )
-    return parser
 
 
-def main() -> None:  # pragma: no cover
-    logger = getLogger()
-    args = set_parser().parse_args()
+class QueryParser(ArgumentParser):
+    """
+    Parser of the batch queries: errors are raised rather than exiting.
+    """
 
-    # verbosity
-    if args.verbose == 1:
-        logger.setLevel(logging.INFO)
-    elif args.verbose > 1:
-        logger.setLevel(logging.DEBUG)
+    def error(self, message: str):  # type: ignore[override]
+        raise OutputError(message)
+
+
+def set_query_parser() -> ArgumentParser:
+    parser = QueryParser(prog="ledger-manifest --batch", add_help=False)
+    add_output_arguments(parser)
+    return parser
 
-    logger.info("Loading the manifest")
-    repo_manifest: Manifest
-    if args.url:
-        gh_ledger = GitHubLedgerHQ() if args.token is None else GitHubLedgerHQ(args.token)
-        repo_manifest = gh_ledger.get_app(str(args.source)).manifest
+
+def read_queries(path: str) -> List[str]:
+    """
+    Reads the batch queries, one per line, from a file or from stdin ('-'). Empty lines and
+    '#' comments are ignored.
+    """
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
     else:
-        assert args.source.is_file(), f"'{args.source.resolve()}' does not appear to be a file."
-        manifest = args.source.resolve()
+        lines = Path(path).read_text().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
 
-        repo_manifest = Manifest.from_path(manifest)
 
-    # check directory path against manifest data
-    if args.check is not None:
-        logger.info("Checking the manifest")
-        repo_manifest.check(args.check)
-        return
+def batch_output(
+    queries: List[str], sources: List[str], url: bool = False, token: Optional[str] = None
+) -> bool:
+    """
+    Answers every query on every manifest source, loading each manifest only once, and outputs
+    one JSON line per (source, query). Returns False if at least one query failed.
+    """
+    parser = set_query_parser()
+    parsed: List = list()
+    for query in queries:
+        try:
+            parsed.append(parser.parse_args(shlex.split(query)))
+        except ValueError as e:
+            parsed.append(OutputError(f"Invalid query: {e}"))
+    gh_ledger: Optional["GitHubLedgerHQ"] = None
+    success = True
+    for source in sources:
+        manifest: Optional[Manifest] = None
+        error: Optional[str] = None
+        try:
+            if url:
+                if gh_ledger is None:
+                    with span("import", "ledgered.github"):
+                        from ..github import GitHubLedgerHQ
+
+                    gh_ledger = GitHubLedgerHQ() if token is None else GitHubLedgerHQ(token)
+                manifest = gh_ledger.get_app(source).manifest
+            else:
+                manifest = Manifest.from_path(Path(source).resolve(), use_cache=True)
+        except Exception as e:
+            error = f"Could not load the manifest: {e}"
+        for query, query_args in zip(queries, parsed):
+            line: Dict = {"source": source, "query": query}
+            try:
+                if error is not None:
+                    raise OutputError(error)
+                if isinstance(query_args, OutputError):
+                    raise query_args
+                assert manifest is not None
+                line["result"] = manifest_content(manifest, query_args)
+            except ValueError as e:
+                success = False
+                line["error"] = str(e)
+            write_ndjson([line], sys.stdout, flush=True)
+    return success
+
+
+def set_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog="ledger-manifest",
+        description="Utilitary to parse and check an application 'ledger_app.toml' manifest",
+    )
+
+    # generic options
+    parser.add_argument("-v", "--verbose", action="count", default=0)
+    add_instrumentation_arguments(parser)
+    parser.add_argument(
+        "-c",
+        "--check",
+        required=False,
+        type=Path,
+        default=None,
+        help="Check the manifest content against the provided directory.",
+    )
+
+    parser.add_argument(
+        "--scan",
+        required=False,
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help=f"Find and load every '{MANIFEST_FILE_NAME}' manifest under the given directory, "
+        "and outputs them (or the error raised while loading them) as JSON lines.",
+    )
+    parser.add_argument(
+        "--batch",
+        required=False,
+        default=None,
+        nargs="+",
+        metavar=("QUERIES", "SOURCE"),
+        help="Answer every query of the QUERIES file ('-' for stdin, one query per line, using "
+        "the output options, like '-os -ob') on each SOURCE manifest (or app name with `--url`), "
+        "and outputs one JSON line per source and query.",
+    )
+    parser.add_argument(
+        "--dependency-plan",
+        required=False,
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="Output, as JSON, the deduplicated and ordered fetch plan of the test dependencies "
+        f"of every '{MANIFEST_FILE_NAME}' manifest under the given directory.",
+    )
+    parser.add_argument(
+        "--check-all",
+        required=False,
+        type=Path,
+        default=None,
+        nargs="+",
+        metavar="DIR",
+        help="Check every path referenced by the manifests of the given application "
+        "directories, and report all the problems found.",
+    )
 
-    # no check
-    logger.info("Displaying manifest info")
+    # display options
+    parser.add_argument(
+        "source",
+        type=Path,
+        nargs="?",
+        default=None,
+        help=f"The manifest file (generally '{MANIFEST_FILE_NAME}' at the root of "
+        "the application's repository), or the name of the app if the `--url` "
+        "option is activated. Not needed with `--scan`, `--batch`, `--dependency-plan` or "
+        "`--check-all`",
+    )
+    parser.add_argument(
+        "--token",
+        required=False,
+        default=None,
+        help="Provide a GitHub token so that functional test won't trigger API "
+        "restrictions too fast",
+    )
+    parser.add_argument(
+        "-u",
+        "--url",
+        action="store_true",
+        default=False,
+        help="Tells if the `manifest` should be fetched from `github.com` rather than a file",
+    )
+    parser.add_argument(
+        "-j", "--json", required=False, action="store_true", help="outputs as JSON rather than text"
+    )
+    add_output_arguments(parser)
+    ##############################################################
+    # CI matrix
+    ##############################################################
+    parser.add_argument(
+        "--matrix",
+        required=False,
+        action="store_true",
+        default=False,
+        help="outputs the CI build matrix: every device × variant × use case, with its build "
+        "flags and test suites",
+    )
+    parser.add_argument(
+        "--matrix-variants",
+        required=False,
+        default=None,
+        nargs="+",
+        metavar=("PARAM", "VALUE"),
+        help="variant parameter and values of the matrix (fetched from the repository with "
+        "`--url`)",
+    )
+    parser.add_argument(
+        "--matrix-include",
+        required=False,
+        default=None,
+        action="append",
+        metavar="RULE",
+        help="only keeps the matrix entries matching one of these 'field=glob[,field=glob]' rules",
+    )
+    parser.add_argument(
+        "--matrix-exclude",
+        required=False,
+        default=None,
+        action="append",
+        metavar="RULE",
+        help="removes the matrix entries matching one of these 'field=glob[,field=glob]' rules",
+    )
+    parser.add_argument(
+        "--matrix-shards",
+        required=False,
+        type=int,
+        default=None,
+        metavar="N",
+        help="splits the matrix in N balanced chunks (each entry gets its 'shard' index)",
+    )
+    parser.add_argument(
+        "--matrix-format",
+        required=False,
+        choices=["json", "ndjson"],
+        default="json",
+        help="outputs the matrix as one JSON document ('{\"include\": [...]}', as expected by "
+        "GitHub Actions) or one JSON line per entry",
+    )
+    return parser
+
+
+def matrix_output(manifest: Manifest, args: Namespace, variants: Optional[List[str]]) -> None:
+    variant_param, variant_values = (variants[0], variants[1:]) if variants else (None, None)
+    entries = build_matrix(
+        manifest,
+        variant_param=variant_param,
+        variants=variant_values,
+        include=[parse_rule(rule) for rule in args.matrix_include or []],
+        exclude=[parse_rule(rule) for rule in args.matrix_exclude or []],
+    )
+    lines: List[Union[MatrixEntry, Dict]] = list(entries)
+    if args.matrix_shards is not None:
+        lines = [
+            {**cast(Dict, entry.json), "shard": index}
+            for index, chunk in enumerate(shard(entries, args.matrix_shards))
+            for entry in chunk
+        ]
+    if args.matrix_format == "ndjson":
+        write_ndjson(lines, sys.stdout)
+    else:
+        write_json({"include": lines}, sys.stdout)
+
+
+def manifest_content(repo_manifest: Manifest, args: Namespace) -> Dict:
+    """
+    Returns the manifest content selected by the output options of `args`.
+    Raises an OutputError if a selected content is missing.
+    """
     display_content: Dict = defaultdict(dict)
 
     if args.output_build_directory:
@@ -213,8 +517,7 @@ def main() -> None:  # pragma: no cover
         if len(args.output_use_cases) != 0:
             use_cases = {k: v for (k, v) in use_cases.items() if k in args.output_use_cases}
         if not len(use_cases) and non_empty:
-            logger.error("No use case match these ones: '%s'", args.output_use_cases)
-            sys.exit(2)
+            raise OutputError(f"No use case match these ones: '{args.output_use_cases}'")
         display_content["use_cases"] = use_cases
 
     if args.output_tests_dependencies is not None:
@@ -227,8 +530,7 @@ def main() -> None:  # pragma: no cover
                 k: v for (k, v) in dependencies.items() if k in args.output_tests_dependencies
             }
         if not len(dependencies) and non_empty:
-            logger.error("No use case match these ones: '%s'", args.output_tests_dependencies)
-            sys.exit(2)
+            raise OutputError(f"No use case match these ones: '{args.output_tests_dependencies}'")
         display_content["tests"]["dependencies"] = dependencies
 
     if args.output_tests_unit_directory:
@@ -236,8 +538,7 @@ def main() -> None:  # pragma: no cover
             len(repo_manifest.pytests) == 0
             or cast(TestsConfig, repo_manifest.pytests[0]).unit_directory is None
         ):
-            logger.error("This manifest does not contains the 'unit_tests.directory' field")
-            sys.exit(2)
+            raise OutputError("This manifest does not contains the 'unit_tests.directory' field")
         else:
             if repo_manifest.unit_tests is not None:
                 display_content["tests"]["unit_directory"] = str(
@@ -250,10 +551,9 @@ def main() -> None:  # pragma: no cover
 
     if args.output_tests_pytest_directory:
         if len(repo_manifest.pytests) == 0:
-            logger.error(
+            raise OutputError(
                 "This manifest does not contains any [tests] (manifest version = 1) or [pytests] (manifest version > 1) field"
             )
-            sys.exit(2)
         test_config = repo_manifest.pytests[0]
         if isinstance(test_config, TestsConfig):
             # Legacy format, only one possible directory to return so we return it
@@ -266,18 +566,16 @@ def main() -> None:  # pragma: no cover
                     display_content["tests"]["pytest_directory"] = str(cfg.directory)
                     break
         else:
-            logger.error(
+            raise OutputError(
                 "This manifest contains a [pytests] field, but no [tests] field. "
                 "Please use the --output-pytest-directories option instead"
             )
-            sys.exit(2)
 
     if args.output_pytest_directories is not None:
         if len(repo_manifest.pytests) == 0:
-            logger.error(
+            raise OutputError(
                 "This manifest does not contains any [tests] (manifest version = 1) or [pytests] (manifest version > 1) field"
             )
-            sys.exit(2)
         display_content["pytest_directories"] = list()
         for idx, test_config in enumerate(repo_manifest.pytests):
             if isinstance(test_config, PyTestsConfig):
@@ -296,10 +594,9 @@ def main() -> None:  # pragma: no cover
 
     if args.output_pytest_usecases is not None:
         if len(repo_manifest.pytests) == 0:
-            logger.error(
+            raise OutputError(
                 "This manifest does not contains any [tests] (manifest version = 1) or [pytests] (manifest version > 1) field"
             )
-            sys.exit(2)
         display_content["pytest_usecases"] = list()
         for idx, test_config in enumerate(repo_manifest.pytests):
             if isinstance(test_config, TestsConfig):
@@ -333,8 +630,7 @@ def main() -> None:  # pragma: no cover
             if len(display_content["pytests_dependencies"]) == 1:
                 display_content["pytests_dependencies"] = display_content["pytests_dependencies"][0]
             if len(display_content["pytests_dependencies"]) == 0:
-                logger.error("No pytest dependencies found")
-                sys.exit(2)
+                raise OutputError("No pytest dependencies found")
 
     # cropping down to the latest dict, if previouses only has 1 key so that the output (either text
     # or JSON) is the smallest possible
@@ -349,12 +645,126 @@ def main() -> None:  # pragma: no cover
         else:
             break
 
+    return display_content
+
+
+def output_options(args: Namespace) -> Dict:
+    """
+    The values of the output options (as declared by `add_output_arguments`) of `args`.
+    """
+    return {dest: getattr(args, dest) for dest in vars(set_query_parser().parse_args([]))}
+
+
+def main() -> None:  # pragma: no cover
+    args = set_parser().parse_args()
+    try:
+        with instrumented(args.timings, args.profile):
+            _main(args)
+    except BrokenPipeError:
+        # the output reader exited early (`| head`, ...): stdout can not be flushed any more, and
+        # would raise again at exit
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+
+
+def _main(args: Namespace) -> None:
+    logger = getLogger()
+
+    # verbosity
+    if args.verbose == 1:
+        logger.setLevel(logging.INFO)
+    elif args.verbose > 1:
+        logger.setLevel(logging.DEBUG)
+
+    if args.scan is not None:
+        logger.info("Scanning '%s' for manifests", args.scan)
+        assert args.scan.is_dir(), f"'{args.scan.resolve()}' does not appear to be a directory."
+        if not scan_output(args.scan):
+            sys.exit(2)
+        return
+    if args.batch is not None:
+        queries_path, *sources = args.batch
+        if args.source is not None:
+            sources.append(str(args.source))
+        assert sources, "`--batch` needs at least one manifest source"
+        # every query reads the same manifests
+        with memoize_json():
+            success = batch_output(
+                read_queries(queries_path), sources, url=args.url, token=args.token
+            )
+        if not success:
+            sys.exit(2)
+        return
+    if args.dependency_plan is not None:
+        logger.info("Planning the test dependencies of '%s'", args.dependency_plan)
+        if not dependency_plan_output(args.dependency_plan):
+            sys.exit(2)
+        return
+    if args.check_all is not None:
+        logger.info("Checking %d application directories", len(args.check_all))
+        if not check_all_output(args.check_all, as_json=args.json):
+            sys.exit(2)
+        return
+    assert args.source is not None, (
+        "A manifest source is required (unless `--scan`, `--batch`, `--dependency-plan` or "
+        "`--check-all` is used)"
+    )
+
+    display_content: Optional[Dict] = None
+    if not (args.url or args.matrix or args.check is not None) and args.source.is_file():
+        # a running daemon may already hold the parsed manifest
+        from .. import serve
+
+        display_content = serve.query(
+            "manifest", path=str(args.source.resolve()), options=output_options(args)
+        )
+    if display_content is None:
+        logger.info("Loading the manifest")
+        repo_manifest: Manifest
+        variants = args.matrix_variants
+        if args.url:
+            with span("import", "ledgered.github"):
+                from ..github import GitHubLedgerHQ
+
+            gh_ledger = GitHubLedgerHQ() if args.token is None else GitHubLedgerHQ(args.token)
+            app = gh_ledger.get_app(str(args.source))
+            repo_manifest = app.manifest
+            if args.matrix and variants is None and app.variant_param is not None:
+                variants = [app.variant_param, *app.variants]
+        else:
+            assert args.source.is_file(), f"'{args.source.resolve()}' does not appear to be a file."
+            manifest = args.source.resolve()
+
+            repo_manifest = Manifest.from_path(manifest, use_cache=True)
+
+        # check directory path against manifest data
+        if args.check is not None:
+            logger.info("Checking the manifest")
+            repo_manifest.check(args.check)
+            return
+
+        if args.matrix:
+            logger.info("Generating the CI matrix")
+            matrix_output(repo_manifest, args, variants)
+            return
+
+        # no check
+        logger.info("Displaying manifest info")
+        try:
+            display_content = manifest_content(repo_manifest, args)
+        except OutputError as e:
+            logger.error("%s", e)
+            sys.exit(2)
+
     if not display_content:
         return
 
     if args.json:
         logger.debug("Output as JSON string")
-        print(json.dumps(display_content))
+        with span("output", "json"):
+            write_json(display_content, sys.stdout)
     else:
         logger.debug("Output as plain text")
-        text_output(display_content)
+        with span("output", "text"):
+            text_output(display_content)
@@ -1,2 +1,13 @@
 class MissingField(ValueError):
     pass
+
+
+class ManifestLoadError(ValueError):
+    """
+    Raised when a manifest file can not be loaded. The message holds the original error type and
+    message, as the original error may not be transferable between processes.
+    """
+
+    @classmethod
+    def from_error(cls, error: Exception) -> "ManifestLoadError":
+        return cls(f"{type(error).__name__}: {error}")
@@ -0,0 +1,144 @@
+"""
+Organization-wide graph of the application test dependencies.
+
+Many applications depend on the same applications (`app-exchange`, `app-ethereum`, ...) at the
+same ref. The `DependencyGraph` gathers the test dependencies of many manifests, dedupes the
+identical `(url, ref, use_case)` ones and orders them in a fetch / build plan, where each stage
+only depends on the previous ones (so each stage can be fetched and built in parallel).
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Set, cast
+from urllib.parse import urlparse
+
+from ledgered.serializers import Jsonable
+from .manifest import Manifest
+from .tests import TestsDependencyConfig
+
+
+class CyclicDependencyError(ValueError):
+    pass
+
+
+def repository_name(url: str) -> str:
+    """
+    The name of the repository of an URL, which is how applications are identified in the graph.
+    """
+    name = Path(urlparse(url).path).name
+    return name[: -len(".git")] if name.endswith(".git") else name
+
+
+@dataclass(frozen=True)
+class DependencyNode(Jsonable):
+    url: str
+    ref: str
+    use_case: str
+
+    @classmethod
+    def from_config(cls, config: TestsDependencyConfig) -> "DependencyNode":
+        return cls(config.url.rstrip("/"), config.ref, str(config.use_case))
+
+    @property
+    def name(self) -> str:
+        return repository_name(self.url)
+
+
+class DependencyGraph:
+    """
+    Test dependency graph of a set of applications.
+
+    Applications are identified by their repository name. A dependency on an application whose
+    manifest is known also depends on the dependencies of this manifest (the manifest is assumed
+    to be the same at every ref).
+    """
+
+    def __init__(self) -> None:
+        self._manifests: Dict[str, Manifest] = dict()
+        # application name -> its direct dependencies
+        self._dependencies: Dict[str, Set[DependencyNode]] = dict()
+
+    @classmethod
+    def from_manifests(cls, manifests: Mapping[str, Manifest]) -> "DependencyGraph":
+        graph = cls()
+        for name, manifest in manifests.items():
+            graph.add(name, manifest)
+        return graph
+
+    def add(self, name: str, manifest: Manifest) -> None:
+        self._manifests[name] = manifest
+        self._dependencies[name] = {
+            DependencyNode.from_config(config) for config in manifest.tests_dependencies
+        }
+
+    def dependencies_of(self, node: DependencyNode) -> Set[DependencyNode]:
+        return self._dependencies.get(node.name, set())
+
+    @property
+    def nodes(self) -> Set[DependencyNode]:
+        """
+        Every (deduplicated) dependency, direct or not.
+        """
+        nodes: Set[DependencyNode] = set()
+        to_visit = [node for dependencies in self._dependencies.values() for node in dependencies]
+        while to_visit:
+            node = to_visit.pop()
+            if node not in nodes:
+                nodes.add(node)
+                to_visit.extend(self.dependencies_of(node))
+        return nodes
+
+    def required_by(self) -> Dict[DependencyNode, List[str]]:
+        """
+        The applications directly depending on each dependency.
+        """
+        users: Dict[DependencyNode, List[str]] = {node: [] for node in self.nodes}
+        for name in sorted(self._dependencies):
+            for node in self._dependencies[name]:
+                users[node].append(name)
+        return users
+
+    def _find_cycle(self, nodes: Iterable[DependencyNode]) -> List[DependencyNode]:
+        remaining = set(nodes)
+        # every remaining node has a remaining dependency: walking them eventually loops
+        path: List[DependencyNode] = []
+        node = min(remaining, key=str)
+        while node not in path:
+            path.append(node)
+            node = min(self.dependencies_of(node) & remaining, key=str)
+        return path[path.index(node) :] + [node]
+
+    def plan(self) -> List[List[DependencyNode]]:
+        """
+        Orders the dependencies in stages: each dependency only depends on dependencies of the
+        previous stages. Raises a CyclicDependencyError if the dependencies can not be ordered.
+        """
+        pending = {node: self.dependencies_of(node) for node in self.nodes}
+        stages: List[List[DependencyNode]] = []
+        done: Set[DependencyNode] = set()
+        while pending:
+            stage = sorted(
+                (node for node, dependencies in pending.items() if dependencies <= done),
+                key=lambda node: (node.url, node.ref, node.use_case),
+            )
+            if not stage:
+                cycle = self._find_cycle(pending)
+                raise CyclicDependencyError(
+                    "Cyclic test dependencies: "
+                    + " -> ".join(f"{node.name}@{node.ref}" for node in cycle)
+                )
+            stages.append(stage)
+            done.update(stage)
+            for node in stage:
+                del pending[node]
+        return stages
+
+    @property
+    def json(self) -> Dict:
+        users = self.required_by()
+        return {
+            "stages": [
+                [{**cast(Dict, node.json), "required_by": users[node]} for node in stage]
+                for stage in self.plan()
+            ]
+        }
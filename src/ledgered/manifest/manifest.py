@@ -1,18 +1,34 @@
 import logging
-import tomli
+import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, IO, Optional, List, Union
+from typing import Dict, IO, Iterator, Optional, List, Tuple, Union
 
-from ledgered.serializers import Jsonable
+from ledgered.serializers import Jsonable, JsonList, from_str_none
+from ledgered.utils import toml
+from ledgered.utils.timing import span
 from .app import AppConfig
+from .cache import MANIFEST_CACHE
+from .check import CheckProblem, CheckResult, ExpectedPath, PathKind, check_paths
 from .constants import MANIFEST_FILE_NAME
-from .tests import TestsConfig, PyTestsConfig, UnitTestsConfig
+from .errors import ManifestLoadError
+from .tests import (
+    APPLICATION_DIRECTORY_NAME,
+    TestsConfig,
+    TestsDependencyConfig,
+    PyTestsConfig,
+    UnitTestsConfig,
+)
 from .use_cases import UseCasesConfig
 
+# directories which can not contain application manifests (or only the ones of test dependencies)
+SCAN_PRUNED_DIRECTORIES = {".git", "build", APPLICATION_DIRECTORY_NAME}
+SCAN_CHUNK_SIZE = 8
+
 
 @dataclass
-class Manifest(Jsonable):
+class Manifest(Jsonable, memoize=True):
     app: AppConfig
     use_cases: Optional[UseCasesConfig]
     unit_tests: Optional[UnitTestsConfig]
@@ -28,7 +44,7 @@ class Manifest(Jsonable):
     ) -> None:
         self.app = AppConfig(**app)
         self.use_cases = None if use_cases is None else UseCasesConfig(**use_cases)
-        self.pytests = []
+        self.pytests = JsonList()
 
         if tests is not None:
             self.pytests.append(TestsConfig(**tests))
@@ -42,31 +58,214 @@ class Manifest(Jsonable):
         else:
             self.unit_tests = None
 
+    @classmethod
+    def from_json(cls, data: Dict, trusted: bool = False) -> "Manifest":
+        """
+        Rebuilds a manifest from its `json` form, without parsing the TOML manifest again.
+
+        If `trusted` (the data was output by a manifest, and not modified since), the constructors
+        and their validation are skipped, making the manifest much faster to rebuild.
+        """
+        manifest = cls.__new__(cls)
+        manifest.app = AppConfig.from_json(data["app"], trusted)
+        use_cases = from_str_none(data["use_cases"])
+        manifest.use_cases = (
+            None if use_cases is None else UseCasesConfig.from_json(use_cases, trusted)
+        )
+        manifest.pytests = JsonList(
+            (
+                PyTestsConfig.from_json(config, trusted)
+                if "key" in config
+                else TestsConfig.from_json(config, trusted)
+            )
+            for config in data["pytests"]
+        )
+        unit_tests = from_str_none(data["unit_tests"])
+        manifest.unit_tests = (
+            None if unit_tests is None else UnitTestsConfig.from_json(unit_tests, trusted)
+        )
+        return manifest
+
     @classmethod
     def from_string(cls, content: str) -> "Manifest":
-        return cls(**tomli.loads(content))
+        return cls(**toml.loads(content))
 
     @classmethod
     def from_io(cls, manifest_io: IO) -> "Manifest":
-        return cls(**tomli.load(manifest_io))
+        return cls(**toml.load(manifest_io))
 
     @classmethod
-    def from_path(cls, path: Path) -> "Manifest":
+    def _load(cls, path: Path) -> "Manifest":
+        with path.open("rb") as manifest_io:
+            return cls.from_io(manifest_io)
+
+    @classmethod
+    def from_path(cls, path: Path, use_cache: bool = False) -> "Manifest":
+        """
+        Loads the manifest from a file (or from the manifest file of a directory).
+        With `use_cache`, manifests are cached (see `ManifestCache`): the returned manifest is then
+        shared with other callers and must not be modified.
+        """
         if path.is_dir():
             path = path / MANIFEST_FILE_NAME
         assert path.is_file(), f"'{path.resolve()}' is not a manifest file."
-        return cls(**tomli.load(path.open("rb")))
+        with span("manifest.load"):
+            if not use_cache:
+                return cls._load(path)
+            return MANIFEST_CACHE.get(path, cls._load)
 
-    def check(self, base_directory: Union[str, Path]) -> None:
-        base_directory = Path(base_directory)
-        assert base_directory.is_dir(), f"Given '{base_directory}' must be a directory"
-        build_file = (
+    @classmethod
+    def scan(
+        cls, root: Union[str, Path], max_workers: Optional[int] = None
+    ) -> Iterator[Tuple[Path, Union["Manifest", ManifestLoadError]]]:
+        """
+        Finds every manifest under the `root` directory (see `find_manifests`) and loads them in
+        parallel, on a pool of `max_workers` processes (defaults to the number of CPUs).
+        Results are yielded as soon as they are available, in the discovery order, as
+        (manifest path, Manifest) or (manifest path, ManifestLoadError).
+        """
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            yield from executor.map(_scan_load, find_manifests(root), chunksize=SCAN_CHUNK_SIZE)
+
+    @property
+    def tests_dependencies(self) -> List[TestsDependencyConfig]:
+        """
+        The test dependencies of every pytest suite, of every use case.
+        """
+        return [
+            dependency
+            for config in self.pytests
+            for dependencies in (config.dependencies or dict()).values()
+            for dependency in dependencies.dependencies
+        ]
+
+    def _build_file(self, base_directory: Path) -> Path:
+        return (
             base_directory
             / self.app.build_directory
             / ("Cargo.toml" if self.app.is_rust else "Makefile")
         )
+
+    def expected_paths(self, base_directory: Union[str, Path]) -> List[ExpectedPath]:
+        """
+        Lists every path this manifest references, relatively to the application base directory.
+        """
+        base_directory = Path(base_directory)
+        expected = [
+            ExpectedPath("app.build_directory", self._build_file(base_directory), PathKind.FILE)
+        ]
+        if self.unit_tests is not None and self.unit_tests.unit_directory is not None:
+            expected.append(
+                ExpectedPath(
+                    "unit_tests.directory",
+                    base_directory / self.unit_tests.unit_directory,
+                    PathKind.DIRECTORY,
+                )
+            )
+        for config in self.pytests:
+            if isinstance(config, TestsConfig):
+                prefix = "tests"
+                for field, directory in (
+                    ("unit_directory", config.unit_directory),
+                    ("pytest_directory", config.pytest_directory),
+                ):
+                    if directory is not None:
+                        expected.append(
+                            ExpectedPath(
+                                f"{prefix}.{field}", base_directory / directory, PathKind.DIRECTORY
+                            )
+                        )
+            else:
+                prefix = f"pytest.{config.key}"
+                expected.append(
+                    ExpectedPath(
+                        f"{prefix}.directory",
+                        base_directory / config.directory,
+                        PathKind.DIRECTORY,
+                    )
+                )
+            for use_case, dependencies in (config.dependencies or dict()).items():
+                for dependency in dependencies.dependencies:
+                    # dependencies are fetched by the test tools, they may not be there yet
+                    expected.append(
+                        ExpectedPath(
+                            f"{prefix}.dependencies.{use_case}",
+                            base_directory / dependency.dir,
+                            PathKind.DIRECTORY,
+                            blocking=False,
+                        )
+                    )
+        return expected
+
+    def validate(self, base_directory: Union[str, Path]) -> CheckResult:
+        """
+        Checks every path referenced by the manifest at once, and reports all the problems found.
+        """
+        base_directory = Path(base_directory)
+        if not base_directory.is_dir():
+            return CheckResult(
+                base_directory=base_directory,
+                problems=JsonList(
+                    [
+                        CheckProblem(
+                            field="",
+                            path=base_directory,
+                            message=f"Given '{base_directory}' must be a directory",
+                            blocking=True,
+                        )
+                    ]
+                ),
+            )
+        return check_paths(base_directory, self.expected_paths(base_directory))
+
+    def check(self, base_directory: Union[str, Path], deep: bool = False) -> CheckResult:
+        """
+        Checks the application build file exists, or, if `deep`, every path referenced by the
+        manifest (see `validate`). Raises an AssertionError listing the blocking problems, if
+        any.
+        """
+        base_directory = Path(base_directory)
+        assert base_directory.is_dir(), f"Given '{base_directory}' must be a directory"
+        if deep:
+            result = self.validate(base_directory)
+            assert result.ok, str(result)
+            return result
+        build_file = self._build_file(base_directory)
         logging.info("Checking existence of file %s", build_file)
         assert build_file.is_file(), (
             f"No file '{build_file}' (from the given base directory "
             f"'{base_directory}' + the manifest path '{self.app.build_directory}') was found"
         )
+        return CheckResult(base_directory=base_directory, problems=JsonList())
+
+
+def find_manifests(root: Union[str, Path]) -> Iterator[Path]:
+    """
+    Walks the `root` directory tree and yields every manifest file path found, without following
+    symbolic links nor entering `SCAN_PRUNED_DIRECTORIES`.
+    """
+    directories = [Path(root)]
+    while directories:
+        directory = directories.pop()
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except OSError as e:
+            logging.warning("Could not scan '%s': %s", directory, e)
+            continue
+        subdirectories = list()
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in SCAN_PRUNED_DIRECTORIES:
+                    subdirectories.append(Path(entry.path))
+            elif entry.name == MANIFEST_FILE_NAME and entry.is_file():
+                yield Path(entry.path)
+        # reversed, so that the directories are popped in alphabetical order
+        directories.extend(reversed(subdirectories))
+
+
+def _scan_load(path: Path) -> Tuple[Path, Union[Manifest, ManifestLoadError]]:
+    # module-level, so that it can be sent to the worker processes
+    try:
+        return path, Manifest.from_path(path, use_cache=True)
+    except Exception as e:
+        return path, ManifestLoadError.from_error(e)
@@ -0,0 +1,233 @@
+"""
+Preparation of the test dependencies directories (`TestsDependencyConfig.dir`).
+
+Each dependency repository is mirrored once in a shared object store, then every requested ref is
+checked out in its `.dependencies` directory as a local clone of the mirror, so the git objects are
+downloaded once for all the refs, use cases and applications. Checkouts are dissociated from the
+mirror (`--reference --dissociate`): they keep working when the mirror is pruned or garbage
+collected.
+"""
+
+import hashlib
+import os
+import re
+import subprocess  # nosec B404 - only runs git
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Set, Union
+
+from ledgered.serializers import Jsonable
+from .tests import PyTestsConfig, TestsConfig, TestsDependencyConfig
+from .utils import getLogger
+
+STORE_DIRECTORY_ENV = "LEDGERED_DEPENDENCIES_STORE"
+DEFAULT_STORE_DIRECTORY = Path.home() / ".cache" / "ledgered" / "repositories"
+
+
+class MaterializeStatus(str, Enum):
+    CLONED = "cloned"
+    UPDATED = "updated"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+
+@dataclass
+class MaterializeResult(Jsonable):
+    directory: Path
+    url: str
+    ref: str
+    status: MaterializeStatus
+    commit: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def json(self):
+        json = super().json
+        json["status"] = self.status.value
+        return json
+
+
+class GitError(RuntimeError):
+    pass
+
+
+# an abbreviated or full commit SHA
+_COMMIT_PATTERN = re.compile(r"[0-9a-f]{7,64}")
+
+
+def _git(*args: Union[str, Path], cwd: Optional[Path] = None) -> str:
+    process = subprocess.run(  # nosec B603 B607 - fixed git command, no shell
+        ["git", *map(str, args)],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+    )
+    if process.returncode != 0:
+        raise GitError(f"git {' '.join(map(str, args))}: {process.stderr.strip()}")
+    return process.stdout.strip()
+
+
+class DependencyMaterializer:
+    """
+    Checks out test dependencies concurrently, on a pool of `max_workers` threads.
+
+    The repositories are mirrored (`git clone --mirror`) in the `store` directory (defaults to the
+    `LEDGERED_DEPENDENCIES_STORE` environment variable, or `~/.cache/ledgered/repositories`), and
+    each mirror is fetched at most once per materializer. Dependencies whose directory is already
+    checked out at the requested ref are left untouched, without fetching the mirror if the ref is
+    a commit or a tag.
+
+    A dependency directory with local changes is not updated (the dependency fails) unless
+    `overwrite` is True, in which case its changes are discarded.
+    """
+
+    def __init__(
+        self,
+        store: Optional[Union[str, Path]] = None,
+        max_workers: Optional[int] = None,
+        overwrite: bool = False,
+    ) -> None:
+        if store is None:
+            store = os.environ.get(STORE_DIRECTORY_ENV) or DEFAULT_STORE_DIRECTORY
+        self.store = Path(store)
+        self.max_workers = max_workers
+        self.overwrite = overwrite
+        self._lock = Lock()
+        self._url_locks: Dict[str, Lock] = dict()
+        self._fetched: Set[str] = set()
+
+    def mirror(self, url: str) -> Path:
+        """
+        Returns the up-to-date mirror of the given repository, cloning or fetching it if needed.
+        """
+        digest = hashlib.sha256(url.encode()).hexdigest()[:16]
+        mirror = self.store / f"{Path(url.rstrip('/')).name}-{digest}.git"
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, Lock())
+        with url_lock:
+            if url in self._fetched:
+                return mirror
+            if mirror.is_dir():
+                getLogger().info("Fetching '%s'", url)
+                _git("fetch", "--prune", "--tags", "origin", cwd=mirror)
+            else:
+                getLogger().info("Mirroring '%s'", url)
+                self.store.mkdir(parents=True, exist_ok=True)
+                _git("clone", "--mirror", "--quiet", url, mirror)
+            self._fetched.add(url)
+        return mirror
+
+    @staticmethod
+    def _checked_out(directory: Path, ref: str) -> Optional[str]:
+        """
+        The HEAD commit of the checkout if it is the (immutable) commit or tag `ref`, None if it is
+        not, or if `ref` is a branch, whose commit can only be known by fetching.
+        """
+        try:
+            head = _git("rev-parse", "HEAD", cwd=directory)
+            if _COMMIT_PATTERN.fullmatch(ref):
+                return head if head.startswith(ref) else None
+            tag = _git(
+                "rev-parse", "--verify", "--quiet", f"refs/tags/{ref}^{{commit}}", cwd=directory
+            )
+        except GitError:
+            return None
+        return head if tag == head else None
+
+    def materialize_dependency(
+        self, dependency: TestsDependencyConfig, base_directory: Path
+    ) -> MaterializeResult:
+        directory = base_directory / dependency.dir
+        result = MaterializeResult(
+            directory=directory,
+            url=dependency.url,
+            ref=dependency.ref,
+            status=MaterializeStatus.FAILED,
+        )
+        try:
+            checkout = (directory / ".git").exists()
+            if checkout:
+                commit = self._checked_out(directory, dependency.ref)
+                if commit is not None:
+                    result.commit = commit
+                    result.status = MaterializeStatus.SKIPPED
+                    return result
+            mirror = self.mirror(dependency.url)
+            result.commit = _git(
+                "rev-parse", "--verify", f"{dependency.ref}^{{commit}}", cwd=mirror
+            )
+            if checkout:
+                if _git("rev-parse", "HEAD", cwd=directory) == result.commit:
+                    result.status = MaterializeStatus.SKIPPED
+                    return result
+                if not self.overwrite and _git(
+                    "status", "--porcelain", "--untracked-files=no", cwd=directory
+                ):
+                    raise GitError(f"'{directory}' has local changes")
+                try:
+                    _git("cat-file", "-e", f"{result.commit}^{{commit}}", cwd=directory)
+                except GitError:
+                    # the commit is newer than the checkout, fetch it from the mirror
+                    _git(
+                        "fetch",
+                        "--quiet",
+                        "--tags",
+                        mirror,
+                        "+refs/heads/*:refs/remotes/origin/*",
+                        cwd=directory,
+                    )
+                result.status = MaterializeStatus.UPDATED
+            elif directory.exists() and any(directory.iterdir()):
+                raise GitError(f"'{directory}' exists and is not a git repository")
+            else:
+                directory.parent.mkdir(parents=True, exist_ok=True)
+                _git(
+                    "clone",
+                    "--reference",
+                    mirror,
+                    "--dissociate",
+                    "--no-checkout",
+                    "--quiet",
+                    mirror,
+                    directory,
+                )
+                _git("remote", "set-url", "origin", dependency.url, cwd=directory)
+                result.status = MaterializeStatus.CLONED
+            _git("checkout", "--quiet", "--force", "--detach", result.commit, cwd=directory)
+        except (GitError, OSError) as e:
+            getLogger().error("Could not materialize '%s': %s", directory, e)
+            result.status = MaterializeStatus.FAILED
+            result.error = str(e)
+        return result
+
+    def materialize(
+        self,
+        config: Union[PyTestsConfig, TestsConfig],
+        base_directory: Union[str, Path],
+        use_cases: Optional[List[str]] = None,
+    ) -> List[MaterializeResult]:
+        """
+        Checks out the dependencies of the given tests configuration (restricted to the given
+        test `use_cases`, if any) in their directory, relatively to the application
+        `base_directory`. Results are sorted by directory.
+        """
+        # the same dependency can be needed by several test use cases: keyed by directory
+        dependencies = {
+            dependency.dir: dependency
+            for use_case, dependencies in (config.dependencies or dict()).items()
+            if use_cases is None or use_case in use_cases
+            for dependency in dependencies.dependencies
+        }
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(
+                executor.map(
+                    lambda dependency: self.materialize_dependency(
+                        dependency, Path(base_directory)
+                    ),
+                    [dependencies[directory] for directory in sorted(dependencies)],
+                )
+            )
@@ -0,0 +1,142 @@
+"""
+CI build / test matrix of an application: every (device, variant, use case) combination, with the
+build flags of the use case and the test suites (directory and dependencies) to run on the build.
+"""
+
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from ledgered.serializers import Jsonable, JsonList
+from .constants import DEFAULT_USE_CASE
+from .manifest import Manifest
+from .tests import TestsConfig
+
+# a rule matches an entry if every one of its (field, glob pattern) matches the entry field
+MatrixRule = Dict[str, str]
+
+
+@dataclass
+class MatrixSuite(Jsonable):
+    key: str
+    directory: str
+    dependencies: JsonList
+
+
+@dataclass
+class MatrixEntry(Jsonable):
+    device: str
+    variant_param: Optional[str]
+    variant_value: Optional[str]
+    use_case: str
+    build_flags: str
+    tests: JsonList
+
+    def matches(self, rule: MatrixRule) -> bool:
+        for field, pattern in rule.items():
+            if field not in self.__dataclass_fields__ or field == "tests":
+                raise ValueError(
+                    f"Unknown matrix field '{field}'. Must be one of "
+                    f"{[f for f in self.__dataclass_fields__ if f != 'tests']}"
+                )
+            if not fnmatchcase(str(getattr(self, field)), pattern):
+                return False
+        return True
+
+
+def parse_rule(rule: str) -> MatrixRule:
+    """
+    Parses a 'field=pattern,field=pattern' rule.
+    """
+    try:
+        return dict(
+            (field.strip(), pattern.strip())
+            for field, pattern in (part.split("=", 1) for part in rule.split(","))
+        )
+    except ValueError:
+        raise ValueError(f"Invalid matrix rule '{rule}', expected 'field=pattern[,...]'")
+
+
+def _suites(manifest: Manifest, use_case: str) -> JsonList:
+    suites = JsonList()
+    directory: Optional[Path]
+    for config in manifest.pytests:
+        if isinstance(config, TestsConfig):
+            # legacy [tests] section: tests the default build
+            key, directory, self_use_case = "tests", config.pytest_directory, DEFAULT_USE_CASE
+        else:
+            key, directory = config.key, config.directory
+            self_use_case = config.self_use_case or DEFAULT_USE_CASE
+        if directory is None or self_use_case != use_case:
+            continue
+        suites.append(
+            MatrixSuite(
+                key=key,
+                directory=str(directory),
+                dependencies=JsonList(
+                    dependency
+                    for dependencies in (config.dependencies or dict()).values()
+                    for dependency in sorted(dependencies.dependencies, key=lambda d: str(d.dir))
+                ),
+            )
+        )
+    return suites
+
+
+def build_matrix(
+    manifest: Manifest,
+    variant_param: Optional[str] = None,
+    variants: Optional[Iterable[str]] = None,
+    include: Iterable[MatrixRule] = (),
+    exclude: Iterable[MatrixRule] = (),
+) -> List[MatrixEntry]:
+    """
+    Expands the manifest devices × `variants` × use cases (`default` included) in matrix entries.
+
+    If `include` rules are given, only the entries matching at least one of them are kept. Entries
+    matching an `exclude` rule are then removed. Rule patterns are shell-style globs.
+    """
+    include, exclude = list(include), list(exclude)
+    use_cases = [DEFAULT_USE_CASE]
+    if manifest.use_cases is not None:
+        use_cases += sorted(manifest.use_cases.cases)
+    suites = {use_case: _suites(manifest, use_case) for use_case in use_cases}
+    entries = list()
+    variant_values: List[Optional[str]] = list(variants or []) or [None]
+    for device in sorted(manifest.app.devices):
+        for variant in variant_values:
+            for use_case in use_cases:
+                entry = MatrixEntry(
+                    device=device,
+                    variant_param=variant_param if variant is not None else None,
+                    variant_value=variant,
+                    use_case=use_case,
+                    build_flags=(
+                        manifest.use_cases.get(use_case) if manifest.use_cases is not None else ""
+                    ),
+                    tests=suites[use_case],
+                )
+                if include and not any(entry.matches(rule) for rule in include):
+                    continue
+                if any(entry.matches(rule) for rule in exclude):
+                    continue
+                entries.append(entry)
+    return entries
+
+
+def shard(entries: List[MatrixEntry], count: int) -> List[List[MatrixEntry]]:
+    """
+    Splits the entries in `count` contiguous chunks, whose sizes differ by one at most (so builds
+    of the same device mostly land in the same chunk).
+    """
+    if count < 1:
+        raise ValueError(f"The number of shards must be positive, not {count}")
+    size, remainder = divmod(len(entries), count)
+    chunks = list()
+    start = 0
+    for index in range(count):
+        end = start + size + (1 if index < remainder else 0)
+        chunks.append(entries[start:end])
+        start = end
+    return chunks
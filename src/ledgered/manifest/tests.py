@@ -3,7 +3,7 @@ from pathlib import Path
 from typing import Dict, List, Optional, Union
 from urllib.parse import urlparse
 
-from ledgered.serializers import Jsonable, JsonDict, JsonSet
+from ledgered.serializers import Jsonable, JsonDict, JsonSet, from_str_none
 from .constants import DEFAULT_USE_CASE
 from .errors import MissingField
 from .utils import getLogger
@@ -17,7 +17,7 @@ class DuplicateDependencyError(ValueError):
 
 
 @dataclass
-class TestsDependencyConfig(Jsonable):
+class TestsDependencyConfig(Jsonable, memoize=True):
     __test__ = False  # deactivate pytest discovery warning
 
     url: str
@@ -37,6 +37,26 @@ class TestsDependencyConfig(Jsonable):
             self._base_dir / APPLICATION_DIRECTORY_NAME / f"{self._name}-{self.ref}-{self.use_case}"
         )
 
+    @classmethod
+    def from_json(
+        cls, data: Dict, base_dir: Path, trusted: bool = False
+    ) -> "TestsDependencyConfig":
+        """
+        Rebuilds the configuration from its `json` form (`base_dir` being the directory of the
+        tests). If `trusted`, the repository name is taken from the application directory rather
+        than parsed from the URL again.
+        """
+        if not trusted:
+            return cls(data["url"], data["ref"], base_dir, data["use_case"])
+        config = cls.__new__(cls)
+        config.url = data["url"]
+        config.ref = data["ref"]
+        config.use_case = data["use_case"]
+        suffix = f"-{config.ref}-{config.use_case}"
+        config._name = Path(data[APPLICATION_DIRECTORY_KEY]).name[: -len(suffix)]
+        config._base_dir = Path(base_dir)
+        return config
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, TestsDependencyConfig):
             return False
@@ -53,7 +73,7 @@ class TestsDependencyConfig(Jsonable):
 
 
 @dataclass
-class TestsDependenciesConfig(Jsonable):
+class TestsDependenciesConfig(Jsonable, memoize=True):
     __test__ = False  # deactivate pytest discovery warning
 
     dependencies: JsonSet
@@ -69,13 +89,51 @@ class TestsDependenciesConfig(Jsonable):
             self.dependencies.add(dependency)
             logger.debug("Dependency %s added", dependency)
 
+    @classmethod
+    def from_json(
+        cls, data: List[Dict], base_dir: Path, trusted: bool = False
+    ) -> "TestsDependenciesConfig":
+        """
+        Rebuilds the configuration from its `json` form (`base_dir` being the directory of the
+        tests). If `trusted` (the data comes from a validated configuration), the dependencies
+        are not checked for duplicates again.
+        """
+        if not trusted:
+            return cls(_dependencies_arguments(data), base_dir)
+        config = cls.__new__(cls)
+        config.dependencies = JsonSet(
+            TestsDependencyConfig.from_json(dependency, base_dir, trusted=True)
+            for dependency in data
+        )
+        return config
+
     @property
     def json(self):
         return self.dependencies.json
 
 
+def _dependencies_arguments(data: List[Dict]) -> List[Dict]:
+    # the application directory is derived from the other fields
+    return [
+        {key: value for key, value in dependency.items() if key != APPLICATION_DIRECTORY_KEY}
+        for dependency in data
+    ]
+
+
+def _dependencies_from_json(data: Optional[Dict], base_dir: Path) -> Optional[JsonDict]:
+    """
+    Trusted `TestsConfig` / `PyTestsConfig` dependencies from their `json` form.
+    """
+    if data is None:
+        return None
+    return JsonDict(
+        (key, TestsDependenciesConfig.from_json(value, base_dir, trusted=True))
+        for key, value in data.items()
+    )
+
+
 @dataclass
-class TestsConfig(Jsonable):
+class TestsConfig(Jsonable, memoize=True):
     __test__ = False  # deactivate pytest discovery warning
 
     unit_directory: Optional[Path]
@@ -102,9 +160,38 @@ class TestsConfig(Jsonable):
                 logger.info("Parsing dependencies for '%s' tests", key)
                 self.dependencies[key] = TestsDependenciesConfig(value, self.pytest_directory)
 
+    @classmethod
+    def from_json(cls, data: Dict, trusted: bool = False) -> "TestsConfig":
+        """
+        Rebuilds the configuration from its `json` form. If `trusted` (the data comes from a
+        validated configuration), the values are not validated again.
+        """
+        unit_directory = from_str_none(data["unit_directory"])
+        pytest_directory = from_str_none(data["pytest_directory"])
+        dependencies = from_str_none(data["dependencies"])
+        if not trusted:
+            return cls(
+                pytest_directory=pytest_directory,
+                unit_directory=unit_directory,
+                dependencies=(
+                    None
+                    if dependencies is None
+                    else {k: _dependencies_arguments(v) for k, v in dependencies.items()}
+                ),
+            )
+        config = cls.__new__(cls)
+        config.unit_directory = None if unit_directory is None else Path(unit_directory)
+        config.pytest_directory = None if pytest_directory is None else Path(pytest_directory)
+        config.dependencies = (
+            None
+            if config.pytest_directory is None
+            else _dependencies_from_json(dependencies, config.pytest_directory)
+        )
+        return config
+
 
 @dataclass
-class PyTestsConfig(Jsonable):
+class PyTestsConfig(Jsonable, memoize=True):
     __test__ = False  # deactivate pytest discovery warning
 
     key: str
@@ -136,9 +223,34 @@ class PyTestsConfig(Jsonable):
             else:
                 self.dependencies = None
 
+    @classmethod
+    def from_json(cls, data: Dict, trusted: bool = False) -> "PyTestsConfig":
+        """
+        Rebuilds the configuration from its `json` form. If `trusted` (the data comes from a
+        validated configuration), the values are not validated again.
+        """
+        dependencies = from_str_none(data["dependencies"])
+        if not trusted:
+            return cls(
+                key=data["key"],
+                directory=from_str_none(data["directory"]),
+                self_use_case=from_str_none(data["self_use_case"]),
+                dependencies=(
+                    None
+                    if dependencies is None
+                    else {k: _dependencies_arguments(v) for k, v in dependencies.items()}
+                ),
+            )
+        config = cls.__new__(cls)
+        config.key = data["key"]
+        config.directory = Path(data["directory"])
+        config.self_use_case = data["self_use_case"]
+        config.dependencies = _dependencies_from_json(dependencies, config.directory)
+        return config
+
 
 @dataclass
-class UnitTestsConfig(Jsonable):
+class UnitTestsConfig(Jsonable, memoize=True):
     __test__ = False  # deactivate pytest discovery warning
 
     unit_directory: Optional[Path]
@@ -150,3 +262,15 @@ class UnitTestsConfig(Jsonable):
         logger = getLogger()
         logger.debug("Parsing unit tests")
         self.unit_directory = None if directory is None else Path(directory)
+
+    @classmethod
+    def from_json(cls, data: Dict, trusted: bool = False) -> "UnitTestsConfig":
+        """
+        Rebuilds the configuration from its `json` form. If `trusted`, the constructor is skipped.
+        """
+        directory = from_str_none(data["unit_directory"])
+        if not trusted:
+            return cls(directory=directory)
+        config = cls.__new__(cls)
+        config.unit_directory = None if directory is None else Path(directory)
+        return config
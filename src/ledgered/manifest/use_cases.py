@@ -6,7 +6,7 @@ from .constants import DEFAULT_USE_CASE
 
 
 @dataclass
-class UseCasesConfig(Jsonable):
+class UseCasesConfig(Jsonable, memoize=True):
     cases: JsonDict
 
     def __init__(self, **cases: Optional[Dict]) -> None:
@@ -20,6 +20,18 @@ class UseCasesConfig(Jsonable):
                 raise ValueError(f"'{key}' use case is reserved and cannot be overridden")
         self.cases = JsonDict(cases)
 
+    @classmethod
+    def from_json(cls, data: Dict, trusted: bool = False) -> "UseCasesConfig":
+        """
+        Rebuilds the configuration from its `json` form. If `trusted` (the data comes from a
+        validated configuration), the values are not validated again.
+        """
+        if not trusted:
+            return cls(**data)
+        config = cls.__new__(cls)
+        config.cases = JsonDict(data)
+        return config
+
     def get(self, name: str) -> str:
         if name == DEFAULT_USE_CASE:
             return str()
@@ -1,56 +1,483 @@
-from typing import Any, Dict, List, Union
+"""
+JSON-compatible serialization of the metadata objects.
+
+`Jsonable.json` outputs the public (not starting with `_`) attributes of an object, recursively
+serializing `Jsonable` values, keeping integers and converting anything else to a string.
+
+Rather than walking and inspecting every attribute on every call, an encoder function is generated
+for each class on first use, with its output fields fixed (and private fields excluded) ahead of
+time, and cached (see `field_encoder` and `value_encoder`).
+
+Large outputs can be written to a stream incrementally, rather than built as a whole, with
+`write_json` and `write_ndjson`.
+
+The `json` results of the classes opting in (declared with `memoize=True`) can also be memoized,
+for objects whose `json` is read many times (see `memoize_json`).
+"""
+
+import json
+import weakref
+from contextlib import contextmanager
+from functools import wraps
+from threading import Lock
+from typing import (
+    IO,
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
+
+Encoder = Callable[[Any], Any]
 
 
 def to_str_int(value: Any) -> Union[int, str]:
     return str(value) if not isinstance(value, int) else value
 
 
+def from_str_none(value: Any) -> Any:
+    """
+    Reverts the `None` -> `"None"` conversion of `to_str_int` (for `from_json` constructors).
+    """
+    return None if value is None or value == "None" else value
+
+
+# class -> function encoding an instance of this class (as a value of a Jsonable)
+_VALUE_ENCODERS: Dict[type, Encoder] = dict()
+# Jsonable class -> function encoding its fields
+_FIELD_ENCODERS: Dict[type, Encoder] = dict()
+_encoders_lock = Lock()
+
+
+def _encode(value: Any) -> Any:
+    encoder = _VALUE_ENCODERS.get(type(value))
+    if encoder is None:
+        encoder = value_encoder(type(value))
+    return encoder(value)
+
+
+def _encode_fields(value: "Jsonable") -> Dict:
+    return {key: _encode(field) for key, field in value.__dict__.items() if not key.startswith("_")}
+
+
+def _compile_field_encoder(cls: type, attributes: Tuple[str, ...]) -> Encoder:
+    fields = [key for key in attributes if not key.startswith("_")]
+    # the value encoders lookup is inlined, saving a call per field
+    lines = [f"    f{index} = fields[{key!r}]\n" for index, key in enumerate(fields)]
+    items = ", ".join(
+        f"{key!r}: (get(type(f{index})) or lookup(type(f{index})))(f{index})"
+        for index, key in enumerate(fields)
+    )
+    source = (
+        "def encode_fields(value):\n"
+        "    fields = value.__dict__\n"
+        # an instance with other attributes than the ones the encoder was generated from
+        "    if fields.keys() != attributes:\n"
+        "        return fallback(value)\n" + "".join(lines) + f"    return {{{items}}}\n"
+    )
+    namespace: Dict[str, Any] = {
+        "get": _VALUE_ENCODERS.get,
+        "lookup": value_encoder,
+        "fallback": _encode_fields,
+        "attributes": frozenset(attributes),
+    }
+    exec(compile(source, f"<{cls.__qualname__} encoder>", "exec"), namespace)  # nosec B102
+    return namespace["encode_fields"]
+
+
+def field_encoder(value: "Jsonable") -> Encoder:
+    """
+    Returns the function encoding the fields of the class of `value` (the default `Jsonable.json`).
+    It is generated from the public attributes of the first instance encoded; instances of the same
+    class with other attributes are encoded generically.
+    """
+    cls = type(value)
+    encoder = _FIELD_ENCODERS.get(cls)
+    if encoder is None:
+        encoder = _compile_field_encoder(cls, tuple(value.__dict__))
+        with _encoders_lock:
+            encoder = _FIELD_ENCODERS.setdefault(cls, encoder)
+    return encoder
+
+
+def value_encoder(cls: type) -> Encoder:
+    """
+    Returns the function encoding instances of `cls` when they are the values of a `Jsonable`
+    (its `json` property if it is a `Jsonable`, else `to_str_int`).
+    """
+    encoder = _VALUE_ENCODERS.get(cls)
+    if encoder is not None:
+        return encoder
+    if not issubclass(cls, Jsonable):
+        encoder = (lambda value: value) if issubclass(cls, int) else str
+    elif cls._memoized_json is not None:
+        encoder = cls._memoized_json
+    elif cls.json is Jsonable.json:
+        encoder = _encode_default
+    else:
+        # overridden `json`: call the property getter directly
+        encoder = cls.json.fget  # type: ignore[attr-defined]
+    with _encoders_lock:
+        return _VALUE_ENCODERS.setdefault(cls, encoder)
+
+
+def _encode_default(value: "Jsonable") -> Dict:
+    return (_FIELD_ENCODERS.get(type(value)) or field_encoder(value))(value)
+
+
+##############################################################
+# Memoization
+##############################################################
+
+_memoize = False
+# objects are tracked by id, as most Jsonable (dataclasses) are not hashable, and their `__dict__`
+# must only hold their fields (see `field_encoder`). Entries are removed when the object dies.
+# id -> class defining the `json` property -> cached result
+_json_cache: Dict[int, Dict[type, Any]] = dict()
+# id -> (weak references to) the objects whose cached `json` includes this object's
+_json_parents: Dict[int, List[weakref.ref]] = dict()
+_tracked: Set[int] = set()
+
+
+@contextmanager
+def memoize_json(enabled: bool = True) -> Iterator[None]:
+    """
+    Enables (or disables) the memoization of `json` within the `with` block, then restores the
+    previous state. Cached values are dropped whenever memoization gets disabled.
+
+    Only the classes opting in (declared with `memoize=True`, like `Manifest` and its
+    configurations, `Sections` and the `JsonList` / `JsonSet` / `JsonDict` containers, and their
+    subclasses) are memoized. Cached values are invalidated when any attribute (private ones
+    included) of the object, or of any memoized object it holds, is set or deleted, or when a
+    container it holds is modified. Changes to other values (a plain list attribute, a Jsonable
+    not opting in, ...) are not detected: memoized classes should only hold memoized or immutable
+    values.
+
+    Each access returns a copy of the cached value, which callers can modify.
+    """
+    global _memoize
+    previous, _memoize = _memoize, enabled
+    try:
+        if not enabled:
+            _clear()
+        yield
+    finally:
+        _memoize = previous
+        if not previous:
+            _clear()
+
+
+def _clear() -> None:
+    _json_cache.clear()
+    _json_parents.clear()
+
+
+def _forget(key: int) -> None:
+    _tracked.discard(key)
+    _json_cache.pop(key, None)
+    _json_parents.pop(key, None)
+
+
+def _track(value: "Jsonable") -> None:
+    key = id(value)
+    if key not in _tracked:
+        _tracked.add(key)
+        weakref.finalize(value, _forget, key)
+
+
+def _link(parent: "Jsonable") -> None:
+    """
+    Registers `parent` as depending on the memoized objects it holds.
+    """
+    values: Iterable = parent.__dict__.values()
+    if isinstance(parent, dict):
+        values = [*values, *parent.values()]
+    elif isinstance(parent, (list, set)):
+        values = [*values, *parent]
+    for child in values:
+        if isinstance(child, Jsonable) and type(child)._memoized_json is not None:
+            _track(child)
+            parents = _json_parents.setdefault(id(child), list())
+            if not any(reference() is parent for reference in parents):
+                parents.append(weakref.ref(parent))
+
+
+def _invalidate(value: "Jsonable") -> None:
+    """
+    Drops the cached `json` of `value`, and of every object depending on it.
+    """
+    pending, seen = [value], set()
+    while pending:
+        current = pending.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        _json_cache.pop(id(current), None)
+        for reference in _json_parents.get(id(current), ()):
+            parent = reference()
+            if parent is not None:
+                pending.append(parent)
+
+
+def _copy(value: Any) -> Any:
+    # cached values only hold dicts, lists and immutable leaves
+    if type(value) is dict:
+        return {key: _copy(element) for key, element in value.items()}
+    if type(value) is list:
+        return [_copy(element) for element in value]
+    return value
+
+
+def _memoized(compute: Callable[[Any], Any], owner: type) -> Encoder:
+    """
+    The `json` getter of `owner`, memoizing the results of `compute` when enabled. The cached
+    value itself is returned: it is copied by the `json` property only, as the parents cached
+    values can share it.
+    """
+
+    def json(self: "Jsonable") -> Any:
+        if not _memoize:
+            return compute(self)
+        cache = _json_cache.get(id(self))
+        if cache is not None and owner in cache:
+            return cache[owner]
+        value = compute(self)
+        _track(self)
+        _json_cache.setdefault(id(self), dict())[owner] = value
+        _link(self)
+        return value
+
+    return json
+
+
+def _invalidating(method: Callable) -> Callable:
+    """
+    Wraps a container method modifying the container, to invalidate its cached `json`.
+    """
+
+    @wraps(method)
+    def wrapper(self: "Jsonable", *args: Any, **kwargs: Any) -> Any:
+        result = method(self, *args, **kwargs)
+        if _json_cache:
+            _invalidate(self)
+        return result
+
+    return wrapper
+
+
+def _setattr(self: "Jsonable", name: str, value: Any) -> None:
+    object.__setattr__(self, name, value)
+    if _json_cache:
+        _invalidate(self)
+
+
+def _delattr(self: "Jsonable", name: str) -> None:
+    object.__delattr__(self, name)
+    if _json_cache:
+        _invalidate(self)
+
+
+# container methods modifying the container, intercepted in the memoized containers
+_MUTATORS: Dict[type, List[str]] = {
+    list: [
+        "__setitem__",
+        "__delitem__",
+        "__iadd__",
+        "__imul__",
+        "append",
+        "extend",
+        "insert",
+        "remove",
+        "pop",
+        "clear",
+        "sort",
+        "reverse",
+    ],
+    set: [
+        "__ior__",
+        "__iand__",
+        "__isub__",
+        "__ixor__",
+        "add",
+        "discard",
+        "remove",
+        "pop",
+        "clear",
+        "update",
+        "difference_update",
+        "intersection_update",
+        "symmetric_difference_update",
+    ],
+    dict: [
+        "__setitem__",
+        "__delitem__",
+        "__ior__",
+        "pop",
+        "popitem",
+        "clear",
+        "update",
+        "setdefault",
+    ],
+}
+
+
+def _memoize_class(cls: type, intercept: bool) -> None:
+    """
+    Memoizes the `json` property of `cls`. If `intercept`, the writes to its instances (attributes,
+    and content for containers) are intercepted to invalidate the cached values.
+    """
+    compute = cast(property, getattr(cls, "json")).fget
+    assert compute is not None
+    getter = _memoized(compute, cls)
+
+    def json(self: "Jsonable") -> Any:
+        return _copy(getter(self))
+
+    json.__doc__ = compute.__doc__
+    setattr(cls, "_memoized_json", staticmethod(getter))
+    setattr(cls, "json", property(json))
+    if intercept:
+        setattr(cls, "__setattr__", _setattr)
+        setattr(cls, "__delattr__", _delattr)
+        for base, names in _MUTATORS.items():
+            if issubclass(cls, base):
+                for name in names:
+                    setattr(cls, name, _invalidating(getattr(base, name)))
+
+
 class Jsonable:
+    # the uncopied memoized `json` getter, for the classes opting in (see `memoize_json`)
+    _memoized_json: ClassVar[Optional[Encoder]] = None
+
+    def __init_subclass__(cls, memoize: bool = False, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # memoization is inherited, and applies to the overridden `json` properties too
+        inherited = cls._memoized_json is not None
+        if not inherited and memoize:
+            _memoize_class(cls, intercept=True)
+        elif inherited and isinstance(cls.__dict__.get("json"), property):
+            _memoize_class(cls, intercept=False)
+
     @property
     def json(self) -> Union[Dict, List]:
-        output: Dict[Union[str, int], Any] = dict()
-        for key, value in self.__dict__.items():
-            if key.startswith("_"):
-                # 'hidden' properties are not to be included into the output
-                continue
-            if isinstance(value, Jsonable):
-                output[key] = value.json
-            else:
-                output[key] = to_str_int(value)
-        return output
-
-
-class JsonList(list, Jsonable):
+        # 'hidden' properties are not to be included into the output
+        return field_encoder(self)(self)
+
+
+class JsonList(list, Jsonable, memoize=True):
     @property
     def json(self) -> List:
-        output: List[Any] = list()
-        for element in self:
-            if isinstance(element, Jsonable):
-                output.append(element.json)
-            else:
-                output.append(to_str_int(element))
-        return output
+        return [_encode(element) for element in self]
 
 
-class JsonSet(set, Jsonable):
+class JsonSet(set, Jsonable, memoize=True):
     @property
     def json(self) -> List:
-        output: List[Any] = list()
-        for element in self:
-            if isinstance(element, Jsonable):
-                output.append(element.json)
-            else:
-                output.append(to_str_int(element))
-        return output
+        return [_encode(element) for element in self]
 
 
-class JsonDict(dict, Jsonable):
+class JsonDict(dict, Jsonable, memoize=True):
     @property
     def json(self) -> Dict:
-        output: Dict[Union[str, int], Any] = dict()
-        for key, value in self.items():
-            if isinstance(value, Jsonable):
-                output[key] = value.json
-            else:
-                output[key] = to_str_int(value)
-        return output
+        return {key: _encode(value) for key, value in self.items()}
+
+
+# size of the chunks written to the output stream by `write_json` and `write_ndjson`
+WRITE_BUFFER_SIZE = 64 * 1024
+
+
+def _key(key: Any) -> str:
+    # converted to a string as `json.dumps` does
+    return json.dumps(key if isinstance(key, str) else json.dumps(key))
+
+
+def _iter_element(element: Any) -> Iterator[str]:
+    # element of a JsonList / JsonSet / JsonDict
+    if isinstance(element, Jsonable):
+        return iter_json(element)
+    return iter((json.dumps(to_str_int(element)),))
+
+
+def _iter_array(elements: Iterable, iter_element: Callable[[Any], Iterator[str]]) -> Iterator[str]:
+    separator = "["
+    for element in elements:
+        yield separator
+        yield from iter_element(element)
+        separator = ", "
+    yield "[]" if separator == "[" else "]"
+
+
+def _iter_object(elements: Dict, iter_element: Callable[[Any], Iterator[str]]) -> Iterator[str]:
+    separator = "{"
+    for key, element in elements.items():
+        yield f"{separator}{_key(key)}: "
+        yield from iter_element(element)
+        separator = ", "
+    yield "{}" if separator == "{" else "}"
+
+
+def iter_json(value: Any) -> Iterator[str]:
+    """
+    Yields the JSON encoding of `value` in chunks: the same as `json.dumps(value.json)` for a
+    `Jsonable`, or `json.dumps(value)` for plain values (which may hold `Jsonable` objects).
+
+    Containers (`JsonList`, `JsonSet`, `JsonDict`, lists and dicts) are walked element by element,
+    without building the whole document. Other `Jsonable` objects (records, like a `Manifest` or
+    `Sections`) are encoded at once.
+    """
+    if isinstance(value, (JsonList, JsonSet)):
+        yield from _iter_array(value, _iter_element)
+    elif isinstance(value, JsonDict):
+        yield from _iter_object(value, _iter_element)
+    elif isinstance(value, Jsonable):
+        yield json.dumps(value.json)
+    elif isinstance(value, (list, tuple)):
+        yield from _iter_array(value, iter_json)
+    elif isinstance(value, dict):
+        yield from _iter_object(value, iter_json)
+    else:
+        yield json.dumps(value)
+
+
+def write_json(
+    value: Any, stream: IO[str], end: str = "\n", buffer_size: int = WRITE_BUFFER_SIZE
+) -> None:
+    """
+    Writes the JSON encoding of `value` (see `iter_json`), followed by `end`, to a text stream,
+    in chunks of about `buffer_size` characters.
+    """
+    buffer: List[str] = list()
+    size = 0
+    for chunk in iter_json(value):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            stream.write("".join(buffer))
+            buffer.clear()
+            size = 0
+    buffer.append(end)
+    stream.write("".join(buffer))
+
+
+def write_ndjson(
+    values: Iterable[Any],
+    stream: IO[str],
+    flush: bool = False,
+    buffer_size: int = WRITE_BUFFER_SIZE,
+) -> None:
+    """
+    Writes each value as a JSON line (see `write_json`), as soon as it is produced. If `flush`,
+    the stream is flushed after each line.
+    """
+    for value in values:
+        write_json(value, stream, buffer_size=buffer_size)
+        if flush:
+            stream.flush()
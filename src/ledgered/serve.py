@@ -0,0 +1,327 @@
+"""
+Resident metadata daemon, keeping the parsed manifests, binary sections and devices in memory.
+
+`ledgered serve` listens on a Unix domain socket (`LEDGERED_SOCKET`, defaults to
+`$XDG_RUNTIME_DIR/ledgered.sock`, or `/tmp/ledgered-<uid>.sock`). The protocol is made of JSON
+lines: each request is a JSON object with an `op` field, answered by a JSON object holding either
+`"ok": true` and a `result`, or `"ok": false` and an `error`:
+
+- `{"op": "ping"}`: the daemon version and PID,
+- `{"op": "manifest", "path": ..., "options": {...}}`: the content of the manifest file selected
+  by the `ledger-manifest` output options (the `argparse` destinations, like `output_sdk`),
+- `{"op": "binary", "path": ...}`: the Ledger sections of the ELF file,
+- `{"op": "device", "name": ...}`: the device of this name.
+
+Files are re-parsed when they change (they are cached by path, modification time and size). The
+daemon memoizes the `json` outputs of the objects it holds (see `memoize_json`).
+
+`ledger-manifest` and `ledger-binary` transparently use the daemon when it is running, and fall back
+to parsing the files themselves if it is not, or if it fails to answer. Clients only trust a socket
+owned by their user, that nobody else can access or replace.
+
+The daemon needs Unix domain sockets: on other platforms (Windows), it can not run and clients
+always parse the files themselves.
+
+This module only imports the standard library (and `ledgered.utils.timing`), so that clients stay
+cheap to start.
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+from argparse import ArgumentParser
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple, Union
+
+from ledgered.utils.timing import span
+
+SOCKET_ENV = "LEDGERED_SOCKET"
+CLIENT_TIMEOUT = 2.0
+SECTIONS_CACHE_SIZE = 128
+# Unix domain sockets, and the user IDs protecting them
+SUPPORTED = hasattr(socket, "AF_UNIX") and hasattr(os, "getuid")
+
+
+def default_socket_path() -> Path:
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return Path(path)
+    runtime_directory = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_directory:
+        return Path(runtime_directory) / "ledgered.sock"
+    # in a directory private to the user, created by the daemon
+    uid = os.getuid() if SUPPORTED else 0
+    return Path(tempfile.gettempdir()) / f"ledgered-{uid}" / "ledgered.sock"
+
+
+def _safe_directory(directory_stat: os.stat_result) -> bool:
+    # nobody else can replace its content: the directory belongs to the user (or root), and is
+    # either not writable by others or sticky (like /tmp)
+    return directory_stat.st_uid in (os.getuid(), 0) and (
+        not directory_stat.st_mode & 0o022 or bool(directory_stat.st_mode & stat.S_ISVTX)
+    )
+
+
+def _trusted(path: Path) -> bool:
+    """
+    Whether the daemon socket can be trusted: a socket owned by the user, only accessible by them,
+    in a directory where nobody else can replace it.
+    """
+    try:
+        socket_stat = path.lstat()
+        directory_stat = path.parent.stat()
+    except OSError:
+        return False
+    return (
+        stat.S_ISSOCK(socket_stat.st_mode)
+        and socket_stat.st_uid == os.getuid()
+        and not socket_stat.st_mode & 0o077
+        and _safe_directory(directory_stat)
+    )
+
+
+##############################################################
+# Client
+##############################################################
+
+
+def request(
+    payload: Dict, socket_path: Optional[Union[str, Path]] = None, timeout: float = CLIENT_TIMEOUT
+) -> Optional[Dict]:
+    """
+    Sends a request to the daemon and returns its response, or None if no (trusted) daemon is
+    listening.
+    """
+    if not SUPPORTED:
+        return None
+    path = Path(socket_path) if socket_path is not None else default_socket_path()
+    if not path.exists():
+        return None
+    if not _trusted(path):
+        logging.warning("Ignoring the untrusted ledgered daemon socket '%s'", path)
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(json.dumps(payload).encode() + b"\n")
+            with sock.makefile("rb") as response:
+                line = response.readline()
+    except OSError as e:
+        logging.debug("No ledgered daemon on '%s': %s", path, e)
+        return None
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def query(op: str, socket_path: Optional[Union[str, Path]] = None, **parameters: Any) -> Any:
+    """
+    Returns the daemon result of the given operation, or None if there is no daemon or it failed
+    (the caller is then expected to compute the result itself).
+    """
+    with span("daemon.query", op):
+        response = request({"op": op, **parameters}, socket_path=socket_path)
+    if response is None:
+        return None
+    if not response.get("ok"):
+        logging.debug("ledgered daemon error on '%s': %s", op, response.get("error"))
+        return None
+    return response["result"]
+
+
+##############################################################
+# Server
+##############################################################
+
+# (resolved path, modification time in ns, size in bytes)
+FileKey = Tuple[str, int, int]
+
+
+def _file_key(path: Path) -> FileKey:
+    path = path.resolve()
+    stat = path.stat()
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: "MetadataServer"
+
+    def handle(self) -> None:
+        # several requests can be sent on the same connection
+        for line in self.rfile:
+            try:
+                response = {"ok": True, "result": self.server.answer(json.loads(line))}
+            except Exception as e:
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+if TYPE_CHECKING or SUPPORTED:
+    _UnixStreamServer = socketserver.ThreadingUnixStreamServer
+else:  # pragma: no cover
+    # never instantiated (see `bind`), only defined for `MetadataServer` to be
+    _UnixStreamServer = socketserver.ThreadingTCPServer
+
+
+class MetadataServer(_UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Union[str, Path]) -> None:
+        self.socket_path = Path(socket_path)
+        self._sections: "OrderedDict[FileKey, Dict]" = OrderedDict()
+        self._lock = Lock()
+        self._operations: Dict[str, Callable[[Dict], Any]] = {
+            "ping": self._ping,
+            "manifest": self._manifest,
+            "binary": self._binary,
+            "device": self._device,
+        }
+        # the daemon reads any file its user can read: only this user can connect, from the
+        # socket creation on
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(self.socket_path), _RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+    def answer(self, payload: Dict) -> Any:
+        op = payload.get("op")
+        if op not in self._operations:
+            raise ValueError(f"Unknown operation '{op}'. Must be one of {list(self._operations)}")
+        return self._operations[op](payload)
+
+    def _ping(self, payload: Dict) -> Dict:
+        from ledgered import __version__
+
+        return {"version": __version__, "pid": os.getpid()}
+
+    def _manifest(self, payload: Dict) -> Dict:
+        from argparse import Namespace
+        from ledgered.manifest.cli import manifest_content, set_query_parser
+        from ledgered.manifest.manifest import Manifest
+
+        # Manifest.from_path caches the manifest until the file changes
+        manifest = Manifest.from_path(Path(payload["path"]), use_cache=True)
+        options = vars(set_query_parser().parse_args([]))
+        unknown = set(payload.get("options", dict())) - set(options)
+        if unknown:
+            raise ValueError(f"Unknown manifest options {sorted(unknown)}")
+        options.update(payload.get("options", dict()))
+        return manifest_content(manifest, Namespace(**options))
+
+    def _binary(self, payload: Dict) -> Dict:
+        from dataclasses import asdict
+        from ledgered.binary import LedgerBinaryApp
+
+        path = Path(payload["path"])
+        key = _file_key(path)
+        with self._lock:
+            if key in self._sections:
+                self._sections.move_to_end(key)
+                return self._sections[key]
+        sections = asdict(LedgerBinaryApp(path).sections)
+        with self._lock:
+            self._sections[key] = sections
+            while len(self._sections) > SECTIONS_CACHE_SIZE:
+                self._sections.popitem(last=False)
+        return sections
+
+    def _device(self, payload: Dict) -> Dict:
+        from ledgered.devices import Devices
+
+        device = Devices.get_by_name(payload["name"])
+        return {
+            "type": device.type.name,
+            "name": device.name,
+            "sdk_name": device.sdk_name,
+            "resolution": {"x": device.resolution.x, "y": device.resolution.y},
+            "touchable": device.touchable,
+            "deprecated": device.deprecated,
+            "is_nano": device.is_nano,
+        }
+
+
+def bind(socket_path: Optional[Union[str, Path]] = None) -> MetadataServer:
+    """
+    Creates the daemon server, replacing a stale socket file. Its directory is created (only
+    accessible by the user) if needed. Raises a RuntimeError if the platform does not support the
+    daemon, if the directory could let others replace the socket, or if a daemon is already
+    listening on the socket.
+    """
+    if not SUPPORTED:
+        raise RuntimeError("The ledgered daemon needs Unix domain sockets")
+    path = Path(socket_path) if socket_path is not None else default_socket_path()
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not _safe_directory(path.parent.stat()):
+        raise RuntimeError(f"Others could replace the daemon socket in '{path.parent}'")
+    if path.exists():
+        if request({"op": "ping"}, socket_path=path) is not None:
+            raise RuntimeError(f"A ledgered daemon is already listening on '{path}'")
+        path.unlink()
+    return MetadataServer(path)
+
+
+def set_parser() -> ArgumentParser:
+    parser = ArgumentParser(prog="ledgered", description="Ledgered resident metadata daemon")
+    parser.add_argument("-v", "--verbose", action="count", default=0)
+    parser.add_argument(
+        "command",
+        choices=["serve", "status"],
+        help="'serve' runs the daemon, 'status' tells if a daemon is running",
+    )
+    parser.add_argument(
+        "-s",
+        "--socket",
+        type=Path,
+        default=None,
+        help=(
+            f"The daemon Unix socket path (defaults to `{SOCKET_ENV}`, or {default_socket_path()})"
+        ),
+    )
+    return parser
+
+
+def main() -> None:  # pragma: no cover
+    args = set_parser().parse_args()
+
+    # verbosity
+    if args.verbose == 1:
+        logging.root.setLevel(logging.INFO)
+    elif args.verbose > 1:
+        logging.root.setLevel(logging.DEBUG)
+
+    if args.command == "status":
+        result = query("ping", socket_path=args.socket)
+        if result is None:
+            print("No ledgered daemon running")
+            sys.exit(1)
+        print(f"ledgered daemon {result['version']} running (PID {result['pid']})")
+        return
+
+    if not SUPPORTED:
+        logging.error("The ledgered daemon needs Unix domain sockets, unavailable on this platform")
+        sys.exit(1)
+
+    from ledgered.serializers import memoize_json
+
+    # the daemon answers many times from the same objects
+    with memoize_json():
+        with bind(args.socket) as server:
+            logging.info("Listening on '%s'", server.socket_path)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
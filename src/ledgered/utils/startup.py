@@ -0,0 +1,82 @@
+"""
+Import time of the ledgered modules, as measured by `python -X importtime`.
+
+The `ledger-manifest` and `ledger-binary` CLIs are run many times: their modules must not import
+the heavy dependencies (PyGithub, pydantic, pyelftools) unless the command actually needs them.
+
+Running this module prints the import time of the given modules (the CLIs by default).
+"""
+
+import subprocess  # nosec B404 - only runs the current Python interpreter
+import sys
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from typing import Dict, List
+
+CLI_MODULES = ["ledgered.manifest.cli", "ledgered.binary"]
+# modules which must not be imported to start the CLIs
+HEAVY_MODULES = ["github", "pydantic", "elftools", "requests"]
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    # cumulated import time of the module, in microseconds
+    total: int
+    # every imported module -> its cumulated import time, in microseconds
+    modules: Dict[str, int]
+
+    def imports(self, module: str) -> bool:
+        return any(name == module or name.startswith(f"{module}.") for name in self.modules)
+
+
+def import_profile(module: str, statement: str = "") -> ImportProfile:
+    """
+    Imports the module in a fresh interpreter and returns its import profile. The `statement`
+    run after the import can trigger lazy imports, which are then part of the profile.
+    """
+    process = subprocess.run(  # nosec B603 - fixed command
+        [sys.executable, "-X", "importtime", "-c", f"import {module}\n{statement}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = dict()
+    for line in process.stderr.splitlines():
+        # 'import time: self [us] | cumulative | imported package'
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = int(cumulative)
+    return ImportProfile(module=module, total=modules[module], modules=modules)
+
+
+def best_import_profile(module: str, statement: str = "", runs: int = 3) -> ImportProfile:
+    """
+    The fastest import profile of the module over several runs (the others being noise).
+    """
+    return min(
+        (import_profile(module, statement) for _ in range(runs)),
+        key=lambda profile: profile.total,
+    )
+
+
+def main() -> None:  # pragma: no cover
+    parser = ArgumentParser(
+        prog="python -m ledgered.utils.startup",
+        description="Measures the import time of ledgered modules",
+    )
+    parser.add_argument("modules", nargs="*", default=CLI_MODULES, help="modules to import")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="number of runs")
+    args = parser.parse_args()
+    for module in args.modules:
+        profile = best_import_profile(module, runs=args.runs)
+        heavy: List[str] = [name for name in HEAVY_MODULES if profile.imports(name)]
+        print(
+            f"{module:<25} {profile.total / 1000:8.1f} ms"
+            + (f"  (imports {', '.join(heavy)})" if heavy else "")
+        )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
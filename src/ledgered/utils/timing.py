@@ -0,0 +1,192 @@
+"""
+Lightweight timing instrumentation: the slow steps of ledgered are wrapped in named spans, which
+are reported to the registered callbacks.
+
+Spans (nested spans overlap their parent):
+
+- `import`: lazy import of a heavy dependency (detail: the module),
+- `daemon.query`: request to the resident daemon (detail: the operation),
+- `manifest.load`: `Manifest.from_path`, cache lookup included,
+- `toml.parse`: TOML parsing (detail: the backend),
+- `app.validate`: `AppConfig` validation,
+- `github.request`: GitHub API request (detail: the endpoint),
+- `elf.parse`: ELF file parsing,
+- `output`: serialization and writing of the CLI outputs (detail: the format).
+
+A callback receives the span name, its detail (or None) and its duration in seconds, from the
+thread which ran the span. When no callback is registered, `span` returns a shared no-op context
+manager, so instrumented code pays a single check.
+
+`TimingCollector` aggregates the spans in a per-phase summary, and `instrumented` is what the
+`--timings` and `--profile FILE` options of the CLIs use.
+"""
+
+import sys
+import time
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from typing import IO, Any, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+SpanCallback = Callable[[str, Optional[str], float], None]
+
+_callbacks: List[SpanCallback] = list()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "detail", "start")
+
+    def __init__(self, name: str, detail: Optional[str]) -> None:
+        self.name = name
+        self.detail = detail
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc: Any) -> None:
+        duration = time.perf_counter() - self.start
+        for callback in list(_callbacks):
+            callback(self.name, self.detail, duration)
+
+
+def span(name: str, detail: Optional[str] = None) -> ContextManager[None]:
+    """
+    Times the `with` block as the `name` span (with an optional detail, like an endpoint).
+    """
+    if not _callbacks:
+        return _NULL_SPAN
+    return _Span(name, detail)
+
+
+def add_callback(callback: SpanCallback) -> None:
+    _callbacks.append(callback)
+
+
+def remove_callback(callback: SpanCallback) -> None:
+    _callbacks.remove(callback)
+
+
+class TimingCollector:
+    """
+    Thread-safe aggregation of the spans (count, total and maximum durations), per name and
+    detail. It is registered as a callback while used as a context manager.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        # (name, detail) -> [count, total, max]
+        self._spans: Dict[Tuple[str, Optional[str]], List[float]] = dict()
+        self._start = time.perf_counter()
+        self._end: Optional[float] = None
+
+    def __call__(self, name: str, detail: Optional[str], duration: float) -> None:
+        with self._lock:
+            entry = self._spans.get((name, detail))
+            if entry is None:
+                self._spans[(name, detail)] = [1, duration, duration]
+            else:
+                entry[0] += 1
+                entry[1] += duration
+                entry[2] = max(entry[2], duration)
+
+    def __enter__(self) -> "TimingCollector":
+        self._start = time.perf_counter()
+        self._end = None
+        add_callback(self)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        remove_callback(self)
+        self._end = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        """
+        The time elapsed since the collection started (until it stopped), in seconds.
+        """
+        return (self._end if self._end is not None else time.perf_counter()) - self._start
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """
+        The spans count, total and max durations (in seconds), by 'name' or 'name [detail]'.
+        """
+        with self._lock:
+            spans = sorted(self._spans.items(), key=lambda item: (item[0][0], item[0][1] or ""))
+        return {
+            name if detail is None else f"{name} [{detail}]": {
+                "count": count,
+                "total": total,
+                "max": maximum,
+            }
+            for (name, detail), (count, total, maximum) in spans
+        }
+
+    def summary(self) -> str:
+        lines = [f"{'total':<50} {self.elapsed * 1e3:10.1f} ms"]
+        for key, entry in self.report().items():
+            lines.append(
+                f"{key:<50} {entry['total'] * 1e3:10.1f} ms {int(entry['count']):6}x "
+                f"(max {entry['max'] * 1e3:.1f} ms)"
+            )
+        return "\n".join(lines)
+
+
+def add_instrumentation_arguments(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--timings",
+        required=False,
+        action="store_true",
+        help="outputs the time spent in each phase (on the standard error)",
+    )
+    parser.add_argument(
+        "--profile",
+        required=False,
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="profiles the command with cProfile, and dumps the statistics in FILE",
+    )
+
+
+@contextmanager
+def instrumented(
+    timings: bool = False, profile: Optional[Path] = None, stream: Optional[IO[str]] = None
+) -> Iterator[Optional[TimingCollector]]:
+    """
+    If `timings`, collects the spans of the `with` block and writes their summary to `stream`
+    (defaults to the standard error). If `profile` is given, the block runs under cProfile, whose
+    statistics are dumped in this file. Both are output even if the block raises (or exits).
+    """
+    collector = TimingCollector() if timings else None
+    profiler = None
+    if profile is not None:
+        import cProfile
+
+        profiler = cProfile.Profile()
+    try:
+        if collector is not None:
+            collector.__enter__()
+        if profiler is not None:
+            profiler.enable()
+        yield collector
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(str(profile))
+        if collector is not None:
+            collector.__exit__()
+            (stream or sys.stderr).write(collector.summary() + "\n")
@@ -0,0 +1,133 @@
+"""
+TOML parsing, through the fastest available backend:
+
+- `rtoml`, a compiled (Rust) parser, if installed,
+- `tomli`, which `tomllib` derives from, but is distributed compiled (with mypyc) on most
+  platforms, if installed (it is a dependency on Python < 3.11 only),
+- `tomllib`, from the standard library since Python 3.11.
+
+The backend can be forced with the `LEDGERED_TOML_BACKEND` environment variable, or `set_backend`.
+Every backend raises a `ValueError` subclass on invalid content.
+
+Running this module benchmarks the available backends on the given TOML files.
+"""
+
+import importlib
+import os
+import sys
+import timeit
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, List, Optional, Union
+
+from .timing import span
+
+TOML_BACKEND_ENV = "LEDGERED_TOML_BACKEND"
+# by preference order (fastest first)
+BACKEND_NAMES = ["rtoml", "tomli", "tomllib"]
+
+
+@dataclass(frozen=True)
+class TomlBackend:
+    name: str
+    loads: Callable[[str], Dict[str, Any]]
+
+
+def _import(name: str) -> Optional[TomlBackend]:
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        return None
+    return TomlBackend(name, module.loads)
+
+
+def available_backends() -> Dict[str, TomlBackend]:
+    """
+    Returns the installed backends, by preference order.
+    """
+    backends = dict()
+    for name in BACKEND_NAMES:
+        backend = _import(name)
+        if backend is not None:
+            backends[name] = backend
+    return backends
+
+
+_backend: Optional[TomlBackend] = None
+
+
+def set_backend(name: Optional[str] = None) -> TomlBackend:
+    """
+    Selects the backend to use. If no name is given, the `LEDGERED_TOML_BACKEND` environment
+    variable is used, and if not set either, the fastest available backend.
+    """
+    global _backend
+    name = name or os.environ.get(TOML_BACKEND_ENV) or None
+    if name is None:
+        backends = available_backends()
+        if not backends:
+            raise ImportError(f"No TOML parser found, please install one of {BACKEND_NAMES}")
+        _backend = next(iter(backends.values()))
+    else:
+        if name not in BACKEND_NAMES:
+            raise ValueError(f"Unknown TOML backend '{name}'. Must be one of {BACKEND_NAMES}")
+        backend = _import(name)
+        if backend is None:
+            raise ImportError(f"TOML backend '{name}' is not installed")
+        _backend = backend
+    return _backend
+
+
+def get_backend() -> TomlBackend:
+    if _backend is None:
+        return set_backend()
+    return _backend
+
+
+def loads(content: str) -> Dict[str, Any]:
+    backend = get_backend()
+    with span("toml.parse", backend.name):
+        return backend.loads(content)
+
+
+def load(toml_io: IO) -> Dict[str, Any]:
+    """
+    Parses a TOML file object, opened either in binary or text mode.
+    """
+    content: Union[str, bytes] = toml_io.read()
+    if isinstance(content, bytes):
+        content = content.decode()
+    return loads(content)
+
+
+def benchmark(paths: List[Path], number: int = 100) -> Dict[str, float]:
+    """
+    Returns the time (in seconds) each available backend takes to parse all the given files,
+    averaged over `number` runs.
+    """
+    contents = [path.read_text() for path in paths]
+    results = dict()
+    for name, backend in available_backends().items():
+        duration = timeit.timeit(lambda: [backend.loads(c) for c in contents], number=number)
+        results[name] = duration / number
+    return results
+
+
+def main() -> None:  # pragma: no cover
+    parser = ArgumentParser(
+        prog="python -m ledgered.utils.toml",
+        description="Benchmarks the available TOML backends on the given files",
+    )
+    parser.add_argument("files", type=Path, nargs="+", help="TOML files to parse")
+    parser.add_argument("-n", "--number", type=int, default=100, help="number of runs")
+    args = parser.parse_args()
+    results = benchmark(args.files, args.number)
+    for name, duration in sorted(results.items(), key=lambda item: item[1]):
+        print(f"{name:<10} {duration * 1e6:10.1f} µs")
+    if not results:
+        sys.exit(1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
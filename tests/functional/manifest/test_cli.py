@@ -1,20 +1,24 @@
+import shutil
+import tempfile
 from argparse import ArgumentParser, Namespace
+from io import StringIO
 from json import loads
+from pathlib import Path
 from unittest import TestCase
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
-from ledgered.manifest.cli import main, set_parser
+from ledgered.manifest.cli import main, set_parser, text_lines, write_lines
+from ledgered.manifest.manifest import Manifest
 
 from .. import TEST_MANIFEST_DIRECTORY
 
 
-class PrintMock(MagicMock):
+class StdoutMock(StringIO):
     def get(self):
-        result = list()
-        for call_args in self.call_args_list:
-            result.append(call_args[0][0])
-        self.reset_mock()
-        return "\n".join(result)
+        result = self.getvalue()
+        self.seek(0)
+        self.truncate()
+        return result
 
 
 FULL_EXPECTED_TEXT = """build_directory: .
@@ -83,7 +87,19 @@ class TestCLIMain(TestCase):
         self.args = Namespace(
             source=TEST_MANIFEST_DIRECTORY / "full_correct.toml",
             check=None,
+            scan=None,
+            check_all=None,
+            dependency_plan=None,
+            batch=None,
+            matrix=False,
+            matrix_variants=None,
+            matrix_include=None,
+            matrix_exclude=None,
+            matrix_shards=None,
+            matrix_format="json",
             verbose=0,
+            timings=False,
+            profile=None,
             token=None,
             output_build_directory=False,
             output_sdk=False,
@@ -98,23 +114,26 @@ class TestCLIMain(TestCase):
             json=False,
             url=False,
         )
-        self.patcher1 = patch("ledgered.manifest.cli.print", PrintMock())
         self.patcher2 = patch("ledgered.manifest.cli.set_parser")
-        self.print_mock = self.patcher1.start()
+        # outputs are streamed to stdout
+        self.patcher3 = patch("sys.stdout", StdoutMock())
+        self.stdout_mock = self.patcher3.start()
         self.parser_mock = self.patcher2.start()
         self.parser_mock().parse_args = lambda: self.args
 
     def tearDown(self):
-        self.patcher1.stop()
         self.patcher2.stop()
+        self.patcher3.stop()
 
     @property
     def text(self):
-        return self.print_mock.get()
+        output = self.stdout_mock.get()
+        self.assertTrue(output.endswith("\n"))
+        return output[:-1]
 
     @property
     def json(self):
-        return loads(self.print_mock.get())
+        return loads(self.stdout_mock.get())
 
     def test_use_cases_and_dependencies_text(self):
         self.args.output_use_cases = list()
@@ -157,6 +176,29 @@ class TestCLIMain(TestCase):
         self.assertIsNone(main())
         self.assertEqual(FULL_EXPECTED_TEXT, self.text)
 
+    def test_text_buffered(self):
+        content = {"sdk": "c", "devices": ["nanos+", "flex"], "tests": [{"directory": "tests"}]}
+        lines = list(text_lines(content))
+        self.assertEqual(content["devices"], ["nanos+", "flex"])
+        self.assertEqual(len(content), 3)
+        self.assertListEqual(list(text_lines({"sdk": "c"})), ["c"])
+
+        stream = StdoutMock()
+        write_lines(lines * 100, stream, buffer_size=64)
+        self.assertEqual(stream.get(), "\n".join(lines * 100) + "\n")
+        write_lines([], stream)
+        self.assertEqual(stream.get(), "")
+
+    def test_broken_pipe(self):
+        self.args.output_sdk = True
+        with patch.object(self.stdout_mock, "write", side_effect=BrokenPipeError):
+            with patch.object(self.stdout_mock, "fileno", return_value=1):
+                with patch("ledgered.manifest.cli.os") as os_mock:
+                    with self.assertRaises(SystemExit) as error:
+                        main()
+        self.assertEqual(error.exception.code, 1)
+        os_mock.dup2.assert_called_once_with(os_mock.open.return_value, 1)
+
     def test_full_json(self):
         self.args.output_sdk = True
         self.args.output_devices = True
@@ -335,6 +377,116 @@ unit_directory = "./unit-tests/"
         finally:
             temp_path.unlink()
 
+    def test_scan(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root)
+        for app in ("app-a", "app-b"):
+            (root / app).mkdir()
+            shutil.copy(self.args.source, root / app / "ledger_app.toml")
+        (root / "app-c").mkdir()
+        (root / "app-c" / "ledger_app.toml").write_text("not a manifest")
+        self.args.scan = root
+
+        with self.assertRaises(SystemExit):
+            main()
+        lines = [loads(line) for line in self.stdout_mock.get().splitlines()]
+        self.assertListEqual(
+            [line["path"] for line in lines],
+            [str(root / app / "ledger_app.toml") for app in ("app-a", "app-b", "app-c")],
+        )
+        self.assertEqual(lines[0]["manifest"]["app"]["sdk"], "c")
+        self.assertIn("error", lines[2])
+
+        (root / "app-c" / "ledger_app.toml").unlink()
+        self.assertIsNone(main())
+        self.assertEqual(len(self.stdout_mock.get().splitlines()), 2)
+
+    def test_dependency_plan(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root)
+        for app in ("app-a", "app-b"):
+            (root / app).mkdir()
+            shutil.copy(self.args.source, root / app / "ledger_app.toml")
+        self.args.dependency_plan = root
+
+        self.assertIsNone(main())
+        plan = loads(self.stdout_mock.get())
+        self.assertEqual(len(plan["stages"]), 1)
+        self.assertListEqual(
+            [node["required_by"] for node in plan["stages"][0]], [["app-a", "app-b"]] * 2
+        )
+
+    def test_matrix(self):
+        self.args.matrix = True
+        self.args.matrix_variants = ["COIN", "BTC", "BTC_TEST"]
+        self.args.matrix_exclude = ["use_case=test"]
+        self.assertIsNone(main())
+        matrix = loads(self.stdout_mock.get())
+        self.assertListEqual(
+            [(e["variant_value"], e["use_case"]) for e in matrix["include"]],
+            [("BTC", "default"), ("BTC", "debug"), ("BTC_TEST", "default"), ("BTC_TEST", "debug")],
+        )
+
+        self.args.matrix_format = "ndjson"
+        self.args.matrix_shards = 3
+        self.assertIsNone(main())
+        lines = [loads(line) for line in self.stdout_mock.get().splitlines()]
+        self.assertListEqual([line["shard"] for line in lines], [0, 0, 1, 2])
+
+    def test_batch(self):
+        queries = Path(tempfile.mkdtemp()) / "queries"
+        self.addCleanup(shutil.rmtree, queries.parent)
+        queries.write_text("# comment\n-os\n\n-os -ob\n--output-pytest-directories\n--unknown\n")
+        self.args.batch = [str(queries), str(TEST_MANIFEST_DIRECTORY / "full_correct.toml")]
+        self.args.source = TEST_MANIFEST_DIRECTORY / "ledger_app.toml"
+
+        with patch("ledgered.manifest.cli.Manifest.from_path", wraps=Manifest.from_path) as load:
+            with self.assertRaises(SystemExit):
+                main()
+        self.assertEqual(load.call_count, 2)
+        lines = [loads(line) for line in self.stdout_mock.get().splitlines()]
+        self.assertEqual(len(lines), 2 * 4)
+        self.assertDictEqual(
+            lines[0],
+            {"source": self.args.batch[1], "query": "-os", "result": {"sdk": "c"}},
+        )
+        self.assertEqual(lines[1]["result"], {"sdk": "c", "build_directory": "."})
+        self.assertEqual(
+            lines[2]["result"],
+            {"pytest_directories": [{"name": "tests", "directory": "tests/functional"}]},
+        )
+        self.assertIn("unrecognized arguments", lines[3]["error"])
+        self.assertEqual(lines[4]["source"], str(self.args.source))
+        self.assertEqual(lines[4]["result"], {"sdk": "rust"})
+
+    def test_check_all(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root)
+        for app in ("app-a", "app-b", "app-c"):
+            (root / app).mkdir()
+        for app in ("app-a", "app-b"):
+            shutil.copy(self.args.source, root / app / "ledger_app.toml")
+            (root / app / "Makefile").touch()
+        (root / "app-a" / "tests" / "unit").mkdir(parents=True)
+        (root / "app-a" / "tests" / "functional").mkdir()
+        self.args.check_all = [root / app for app in ("app-a", "app-b", "app-c")]
+        self.args.json = True
+
+        with self.assertRaises(SystemExit):
+            main()
+        lines = [loads(line) for line in self.stdout_mock.get().splitlines()]
+        self.assertListEqual([line["ok"] for line in lines], [True, False, False])
+        self.assertListEqual(
+            [line["base_directory"] for line in lines], [str(d) for d in self.args.check_all]
+        )
+        self.assertEqual(len(lines[1]["problems"]), 4)
+        self.assertIn("is not a manifest file", lines[2]["problems"][0]["message"])
+
+        self.args.check_all = [root / "app-a"]
+        self.args.json = False
+        self.assertIsNone(main())
+        self.assertTrue(self.text.startswith(f"{root / 'app-a'}: OK"))
+
 
 class TestCLIset_parser(TestCase):
     diffMax = None
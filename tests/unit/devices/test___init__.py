@@ -1,5 +1,26 @@
-from ledgered.devices import Device, DeviceType, Devices, Resolution
+import dataclasses
+import json
+import os
+import timeit
+from ledgered.devices import (
+    DEVICES_OVERLAY_ENV,
+    Device,
+    DeviceType,
+    Devices,
+    Resolution,
+    _LazyDeviceData,
+    _load_devices,
+    extend_device_type,
+    load_devices_file,
+)
+from ledgered.devices.generate import DEVICES_FILE, TABLE_FILE, generate
+from ledgered.manifest.app import AppConfig
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from unittest import TestCase
+from unittest.mock import patch
+
+from .. import benchmark
 
 
 class TestDevice(TestCase):
@@ -56,6 +77,52 @@ class TestDevices(TestCase):
         self.assertEqual(device.name, "nanosp")
         self.assertEqual(device.sdk_name, "nanos+")
 
+    def test_get_by_name_case_insensitive(self):
+        self.assertIs(Devices.get_by_name("NanoS+"), Devices.get_by_type(DeviceType.NANOSP))
+        self.assertIs(Devices.get_by_name("NANOSPLUS"), Devices.get_by_type(DeviceType.NANOSP))
+        self.assertIs(Devices.get_by_name("Apex_P"), Devices.get_by_type(DeviceType.APEX_P))
+
+    def test_get_by_sdk_name(self):
+        self.assertEqual(Devices.get_by_sdk_name("nanos+").type, DeviceType.NANOSP)
+        self.assertEqual(Devices.get_by_sdk_name("flex").type, DeviceType.FLEX)
+        with self.assertRaises(KeyError):
+            Devices.get_by_sdk_name("nanosp")
+
+    def test_get_by_target_id(self):
+        self.assertEqual(Devices.get_by_target_id("0x33200004").type, DeviceType.STAX)
+        self.assertEqual(Devices.get_by_target_id(0x33100004).type, DeviceType.NANOSP)
+        with self.assertRaises(KeyError):
+            Devices.get_by_target_id("0x12345678")
+
+    def test_immutable(self):
+        device = Devices.get_by_type(DeviceType.STAX)
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            device.touchable = False
+        with self.assertRaises(TypeError):
+            Devices.DEVICE_DATA[DeviceType.STAX] = device
+
+    def test_index_follows_device_data(self):
+        device = Device(DeviceType.STAX, Resolution(1, 2), names=("prototype",))
+        with patch.object(Devices, "DEVICE_DATA", {DeviceType.STAX: device}):
+            self.assertIs(Devices.get_by_name("prototype"), device)
+        with self.assertRaises(KeyError):
+            Devices.get_by_name("prototype")
+
+    @benchmark
+    def test_get_by_name_benchmark(self):
+        names = ["nanos+", "NanoX", "stax", "flex", "apex_m", "nanosplus"]
+
+        def linear(name: str) -> Device:
+            # the former lookup
+            for device in Devices.DEVICE_DATA.values():
+                if name.lower() == device.name or name.lower() in device.names:
+                    return device
+            raise KeyError(name)
+
+        indexed = timeit.timeit(lambda: [Devices.get_by_name(n) for n in names], number=2000)
+        scanned = timeit.timeit(lambda: [linear(n) for n in names], number=2000)
+        self.assertLess(indexed, scanned)
+
     def test_get_by_name_nok(self):
         with self.assertRaises(KeyError):
             Devices.get_by_name("non existent")
@@ -63,3 +130,116 @@ class TestDevices(TestCase):
     def test___iter__(self):
         for d in Devices():
             self.assertIsInstance(d, Device)
+
+
+class TestDeviceTable(TestCase):
+    def test_table_up_to_date(self):
+        # run `python -m ledgered.devices.generate` if this fails
+        self.assertEqual(generate(), TABLE_FILE.read_text())
+
+    def test_table_matches_json(self):
+        self.assertDictEqual(dict(_load_devices()), dict(load_devices_file(DEVICES_FILE)))
+
+    def test_table_out_of_date(self):
+        with patch("ledgered.devices._table.JSON_SHA256", "outdated"):
+            with self.assertLogs(level="WARNING"):
+                devices = _load_devices()
+        self.assertDictEqual(dict(devices), dict(Devices.DEVICE_DATA))
+
+
+class TestDeviceOverlays(TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        # reloads the registry without the test overlays
+        self.addCleanup(setattr, Devices, "DEVICE_DATA", _LazyDeviceData())
+        self.addCleanup(setattr, Devices, "_index", None)
+        # and without the device types they added
+        self.addCleanup(self.restore_device_type, set(DeviceType.__members__))
+        overlays = patch.object(Devices, "_overlays", list())
+        overlays.start()
+        self.addCleanup(overlays.stop)
+
+    @staticmethod
+    def restore_device_type(names: set) -> None:
+        # undoes `extend_device_type`
+        for name in set(DeviceType.__members__) - names:
+            member = DeviceType._member_map_.pop(name)
+            DeviceType._member_names_.remove(name)
+            del DeviceType._value2member_map_[member.value]
+            type.__delattr__(DeviceType, name)
+
+    def overlay(self, name: str, definitions: list) -> Path:
+        path = self.directory / name
+        path.write_text(json.dumps(definitions))
+        return path
+
+    def test_extend_device_type(self):
+        member = extend_device_type("test_extended")
+        self.assertIs(member, DeviceType.TEST_EXTENDED)
+        self.assertIs(DeviceType(member.value), member)
+        self.assertEqual(member.value, max(DeviceType))
+        # idempotent
+        self.assertIs(extend_device_type("TEST_EXTENDED"), member)
+        self.assertIs(extend_device_type("stax"), DeviceType.STAX)
+
+        self.restore_device_type(set(DeviceType.__members__) - {"TEST_EXTENDED"})
+        self.assertNotIn("TEST_EXTENDED", DeviceType.__members__)
+        self.assertFalse(hasattr(DeviceType, "TEST_EXTENDED"))
+        with self.assertRaises(ValueError):
+            DeviceType(member.value)
+
+    def test_add_overlay_new_device(self):
+        Devices.add_overlay(
+            self.overlay(
+                "new.json",
+                [
+                    {
+                        "type": "test_overlay",
+                        "resolution": {"x": 10, "y": 20},
+                        "touchable": True,
+                        "names": ["prototype"],
+                        "target_id": "0x12345678",
+                    }
+                ],
+            )
+        )
+        device = Devices.get_by_name("prototype")
+        self.assertIs(device.type, DeviceType.TEST_OVERLAY)
+        self.assertEqual(device.resolution, Resolution(10, 20))
+        self.assertIs(Devices.get_by_target_id(0x12345678), device)
+        self.assertIs(Devices.get_by_type(DeviceType.TEST_OVERLAY), device)
+        # the known devices are still there
+        self.assertEqual(Devices.get_by_name("stax").type, DeviceType.STAX)
+        # and the new device is usable from the manifests
+        self.assertEqual(
+            AppConfig(sdk="C", build_directory=".", devices=["prototype"]).devices, {"test_overlay"}
+        )
+
+    def test_add_overlay_replaces_device(self):
+        Devices.add_overlay(
+            self.overlay(
+                "stax.json", [{"type": "stax", "resolution": {"x": 1, "y": 2}, "touchable": True}]
+            )
+        )
+        self.assertEqual(Devices.get_by_type(DeviceType.STAX).resolution, Resolution(1, 2))
+
+    def test_environment_overlays(self):
+        first = self.overlay(
+            "first.json", [{"type": "flex", "resolution": {"x": 1, "y": 2}, "touchable": True}]
+        )
+        second = self.overlay(
+            "second.json", [{"type": "flex", "resolution": {"x": 3, "y": 4}, "touchable": True}]
+        )
+        with patch.dict(
+            os.environ, {DEVICES_OVERLAY_ENV: os.pathsep.join(map(str, [first, second]))}
+        ):
+            Devices.DEVICE_DATA = _LazyDeviceData()  # type: ignore[assignment]
+            # the last overlay wins
+            self.assertEqual(Devices.get_by_type(DeviceType.FLEX).resolution, Resolution(3, 4))
+
+    def test_invalid_overlay(self):
+        Devices.add_overlay(self.overlay("invalid.json", [{"type": "stax"}]))
+        with self.assertRaises(ValueError):
+            Devices.get_by_name("stax")
@@ -24,3 +24,15 @@ class TestAppConfig(TestCase):
         devices = {"nanosp", "flex", "hic sunt", "dracones"}
         with self.assertRaises(KeyError):
             AppConfig(sdk="rust", build_directory=str(), devices=devices)
+
+    def test_from_json(self):
+        config = AppConfig(sdk="Rust", build_directory="some path", devices=["nanos", "NanoS+"])
+        for trusted in (False, True):
+            self.assertEqual(AppConfig.from_json(config.json, trusted=trusted), config)
+
+    def test_from_json_nok(self):
+        data = {"sdk": "Java", "build_directory": ".", "devices": ["nanos"]}
+        with self.assertRaises(ValueError):
+            AppConfig.from_json(data)
+        # not validated
+        self.assertEqual(AppConfig.from_json(data, trusted=True).sdk, "Java")
@@ -0,0 +1,93 @@
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from ledgered.manifest.cache import CacheStats, ManifestCache
+from ledgered.manifest.manifest import Manifest, MANIFEST_FILE_NAME
+
+from .. import TEST_MANIFEST_DIRECTORY
+
+
+class TestManifestCache(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = self.tmp / MANIFEST_FILE_NAME
+        shutil.copy(TEST_MANIFEST_DIRECTORY / MANIFEST_FILE_NAME, self.path)
+        self.load = MagicMock(side_effect=Manifest._load)
+
+    def test_get_lru(self):
+        cache = ManifestCache()
+        first = cache.get(self.path, self.load)
+        self.assertIs(cache.get(self.path, self.load), first)
+        self.load.assert_called_once()
+        self.assertEqual(cache.stats, CacheStats(hits=1, misses=1))
+
+    def test_get_modified_file(self):
+        cache = ManifestCache()
+        cache.get(self.path, self.load)
+        content = self.path.read_text().replace('"FLEX"', '"FLEX", "nanox"')
+        self.path.write_text(content)
+        stat = self.path.stat()
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        manifest = cache.get(self.path, self.load)
+        self.assertIn("nanox", manifest.app.devices)
+        self.assertEqual(self.load.call_count, 2)
+
+    def test_get_eviction(self):
+        cache = ManifestCache(maxsize=1)
+        other = self.tmp / "other.toml"
+        shutil.copy(self.path, other)
+        cache.get(self.path, self.load)
+        cache.get(other, self.load)
+        cache.get(self.path, self.load)
+        self.assertEqual(cache.stats, CacheStats(misses=3, evictions=2))
+
+    def test_get_disk(self):
+        directory = self.tmp / "cache"
+        ManifestCache(directory=directory).get(self.path, self.load)
+        # another process, with its own LRU
+        cache = ManifestCache(directory=directory)
+        manifest = cache.get(self.path, self.load)
+        self.load.assert_called_once()
+        self.assertEqual(cache.stats, CacheStats(disk_hits=1))
+        # not compared through `json`: JsonSet outputs follow the (reloaded) set order
+        self.assertEqual(manifest, Manifest.from_path(self.path))
+        # stored as JSON, not in a format running code on load
+        (entry,) = directory.glob("*.json")
+        self.assertEqual(json.loads(entry.read_text())["app"]["sdk"], "rust")
+        self.assertEqual(directory.stat().st_mode & 0o777, 0o700)
+
+    def test_get_disk_corrupted(self):
+        directory = self.tmp / "cache"
+        cache = ManifestCache(directory=directory)
+        cache.get(self.path, self.load)
+        cache._disk_path(cache.key(self.path)).write_bytes(b"garbage")
+        ManifestCache(directory=directory).get(self.path, self.load)
+        self.assertEqual(self.load.call_count, 2)
+
+    def test_invalidate(self):
+        directory = self.tmp / "cache"
+        cache = ManifestCache(directory=directory)
+        cache.get(self.path, self.load)
+        cache.invalidate(self.path)
+        self.assertListEqual(list(directory.glob("*.json")), [])
+        cache.get(self.path, self.load)
+        cache.invalidate()
+        cache.get(self.path, self.load)
+        self.assertEqual(self.load.call_count, 3)
+
+    def test_from_path_cached(self):
+        self.assertIs(
+            Manifest.from_path(self.path, use_cache=True),
+            Manifest.from_path(self.tmp, use_cache=True),
+        )
+        # opt-in: callers get their own manifest by default
+        self.assertIsNot(Manifest.from_path(self.path), Manifest.from_path(self.path))
+        self.assertIsNot(
+            Manifest.from_path(self.path), Manifest.from_path(self.path, use_cache=True)
+        )
@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from ledgered.manifest.check import CheckProblem, ExpectedPath, PathKind, check_paths
+from ledgered.manifest.manifest import Manifest
+
+from .. import TEST_MANIFEST_DIRECTORY
+
+
+class TestCheckPaths(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def test_check_paths_one_scan_per_directory(self):
+        (self.tmp / "Makefile").touch()
+        (self.tmp / "tests").mkdir()
+        expected = [
+            ExpectedPath("build", self.tmp / "Makefile", PathKind.FILE),
+            ExpectedPath("tests", self.tmp / "tests", PathKind.DIRECTORY),
+            ExpectedPath("wrong_kind", self.tmp / "tests", PathKind.FILE),
+            ExpectedPath("missing", self.tmp / "other", PathKind.DIRECTORY, blocking=False),
+            ExpectedPath("no_parent", self.tmp / "nope" / "nope", PathKind.DIRECTORY),
+        ]
+        with patch("ledgered.manifest.check.os.scandir", wraps=os.scandir) as scandir:
+            result = check_paths(self.tmp, expected)
+        self.assertEqual(scandir.call_count, 2)
+        self.assertListEqual(
+            [(p.field, p.blocking) for p in result.problems],
+            [("wrong_kind", True), ("missing", False), ("no_parent", True)],
+        )
+        self.assertFalse(result.ok)
+
+    def test_check_result_ok_with_warnings(self):
+        result = check_paths(
+            self.tmp, [ExpectedPath("dep", self.tmp / "dep", PathKind.DIRECTORY, blocking=False)]
+        )
+        self.assertTrue(result.ok)
+        self.assertEqual(
+            result.json,
+            {
+                "base_directory": str(self.tmp),
+                "problems": [
+                    CheckProblem(
+                        "dep",
+                        self.tmp / "dep",
+                        f"No directory '{self.tmp / 'dep'}' was found",
+                        False,
+                    ).json
+                ],
+            },
+        )
+
+
+class TestManifestValidate(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.manifest = Manifest.from_path(TEST_MANIFEST_DIRECTORY / "full_correct.toml")
+
+    def test_validate_reports_everything(self):
+        result = self.manifest.validate(self.tmp)
+        self.assertFalse(result.ok)
+        self.assertListEqual(
+            sorted(p.field for p in result.problems),
+            [
+                "app.build_directory",
+                "tests.dependencies.testing_develop",
+                "tests.dependencies.testing_develop",
+                "tests.pytest_directory",
+                "tests.unit_directory",
+            ],
+        )
+        with self.assertRaises(AssertionError) as error:
+            self.manifest.check(self.tmp, deep=True)
+        self.assertIn("tests.unit_directory", str(error.exception))
+        self.assertIn("tests.pytest_directory", str(error.exception))
+
+    def test_validate_ok(self):
+        (self.tmp / "Makefile").touch()
+        (self.tmp / "tests" / "unit").mkdir(parents=True)
+        (self.tmp / "tests" / "functional").mkdir()
+        result = self.manifest.check(self.tmp, deep=True)
+        self.assertTrue(result.ok)
+        # test dependencies are not fetched yet: only warnings
+        self.assertEqual(len(result.problems), 2)
+        self.assertFalse(any(p.blocking for p in result.problems))
+
+    def test_validate_not_a_directory(self):
+        result = self.manifest.validate(self.tmp / "nope")
+        self.assertFalse(result.ok)
+        self.assertEqual(len(result.problems), 1)
+
+    def test_validate_pytest_config(self):
+        manifest = Manifest(
+            app={"sdk": "rust", "build_directory": "app", "devices": ["nanos"]},
+            pytest={"standalone": {"directory": "tests/standalone"}},
+            unit_tests={"directory": "unit"},
+        )
+        (self.tmp / "app").mkdir()
+        (self.tmp / "app" / "Cargo.toml").touch()
+        self.assertListEqual(
+            [p.field for p in manifest.validate(self.tmp).problems],
+            ["unit_tests.directory", "pytest.standalone.directory"],
+        )
@@ -0,0 +1,104 @@
+from unittest import TestCase
+
+from ledgered.manifest.graph import (
+    CyclicDependencyError,
+    DependencyGraph,
+    DependencyNode,
+    repository_name,
+)
+from ledgered.manifest.manifest import Manifest
+
+APP = {"sdk": "c", "build_directory": ".", "devices": ["nanos"]}
+EXCHANGE = "https://github.com/LedgerHQ/app-exchange"
+ETHEREUM = "https://github.com/LedgerHQ/app-ethereum"
+BITCOIN = "https://github.com/LedgerHQ/app-bitcoin-new"
+
+
+def manifest(*dependencies, key="standalone") -> Manifest:
+    return Manifest(
+        app=APP,
+        pytest={
+            key: {
+                "directory": "tests",
+                "dependencies": {
+                    "main": [
+                        {"url": url, "ref": ref, "use_case": use_case}
+                        for url, ref, use_case in dependencies
+                    ]
+                },
+            }
+        },
+    )
+
+
+class TestDependencyGraph(TestCase):
+    def test_repository_name(self):
+        self.assertEqual(repository_name(EXCHANGE), "app-exchange")
+        self.assertEqual(repository_name(EXCHANGE + ".git"), "app-exchange")
+        self.assertEqual(repository_name(EXCHANGE + "/"), "app-exchange")
+
+    def test_plan_dedupes(self):
+        graph = DependencyGraph.from_manifests(
+            {
+                "app-a": manifest((EXCHANGE, "develop", "dbg")),
+                "app-b": manifest((EXCHANGE, "develop", "dbg"), (EXCHANGE, "main", "dbg")),
+                "app-c": manifest((EXCHANGE + "/", "develop", "dbg")),
+            }
+        )
+        self.assertEqual(len(graph.nodes), 2)
+        self.assertEqual(
+            graph.json,
+            {
+                "stages": [
+                    [
+                        {
+                            "url": EXCHANGE,
+                            "ref": "develop",
+                            "use_case": "dbg",
+                            "required_by": ["app-a", "app-b", "app-c"],
+                        },
+                        {
+                            "url": EXCHANGE,
+                            "ref": "main",
+                            "use_case": "dbg",
+                            "required_by": ["app-b"],
+                        },
+                    ]
+                ]
+            },
+        )
+
+    def test_plan_transitive_order(self):
+        graph = DependencyGraph.from_manifests(
+            {
+                "app-boilerplate": manifest((ETHEREUM, "develop", "lib")),
+                "app-ethereum": manifest(
+                    (EXCHANGE, "develop", "default"), (BITCOIN, "develop", "lib")
+                ),
+                "app-exchange": manifest((BITCOIN, "develop", "lib")),
+            }
+        )
+        stages = graph.plan()
+        self.assertListEqual(
+            [[node.name for node in stage] for stage in stages],
+            [["app-bitcoin-new"], ["app-exchange"], ["app-ethereum"]],
+        )
+        self.assertEqual(
+            graph.dependencies_of(DependencyNode(ETHEREUM, "develop", "lib")),
+            {
+                DependencyNode(EXCHANGE, "develop", "default"),
+                DependencyNode(BITCOIN, "develop", "lib"),
+            },
+        )
+
+    def test_plan_cycle(self):
+        graph = DependencyGraph.from_manifests(
+            {
+                "app-ethereum": manifest((EXCHANGE, "develop", "default")),
+                "app-exchange": manifest((ETHEREUM, "develop", "lib")),
+                "app-boilerplate": manifest((BITCOIN, "develop", "lib")),
+            }
+        )
+        with self.assertRaises(CyclicDependencyError) as error:
+            graph.plan()
+        self.assertIn("app-ethereum@develop -> app-exchange@develop", str(error.exception))
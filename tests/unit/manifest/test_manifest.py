@@ -1,7 +1,11 @@
+import json
+import shutil
+import tempfile
 from pathlib import Path
 from unittest import TestCase
 
-from ledgered.manifest.manifest import Manifest, MANIFEST_FILE_NAME, TestsConfig
+from ledgered.manifest.errors import ManifestLoadError
+from ledgered.manifest.manifest import Manifest, MANIFEST_FILE_NAME, TestsConfig, find_manifests
 
 from .. import TEST_MANIFEST_DIRECTORY
 
@@ -39,9 +43,71 @@ class TestManifest(TestCase):
         with (TEST_MANIFEST_DIRECTORY / MANIFEST_FILE_NAME).open() as manifest_io:
             self.check_ledger_app_toml(Manifest.from_string(manifest_io.read()))
 
+    def test_from_json(self):
+        for path in TEST_MANIFEST_DIRECTORY.glob("*.toml"):
+            if path.name == "Cargo.toml":
+                continue
+            manifest = Manifest.from_path(path, use_cache=False)
+            # as stored by a catalog
+            data = json.loads(json.dumps(manifest.json))
+            for trusted in (False, True):
+                with self.subTest(manifest=path.name, trusted=trusted):
+                    result = Manifest.from_json(data, trusted=trusted)
+                    self.assertEqual(result, manifest)
+                    self.assertCountEqual(
+                        [d.dir for d in result.tests_dependencies],
+                        [d.dir for d in manifest.tests_dependencies],
+                    )
+
+    def test_from_json_nok(self):
+        data = Manifest.from_path(TEST_MANIFEST_DIRECTORY, use_cache=False).json
+        data["app"]["devices"] = ["hic sunt dracones"]
+        with self.assertRaises(KeyError):
+            Manifest.from_json(data)
+
     def test_check_ok(self):
         Manifest.from_path(TEST_MANIFEST_DIRECTORY).check(TEST_MANIFEST_DIRECTORY)
 
     def test_check_nok(self):
         with self.assertRaises(AssertionError):
             Manifest.from_path(TEST_MANIFEST_DIRECTORY).check("wrong_directory")
+
+
+def make_workspace(root: Path) -> None:
+    """
+    root/
+    ├── app-a/ledger_app.toml  (valid, with pruned manifests in .git/, build/ and .dependencies/)
+    ├── app-b/ledger_app.toml  (invalid)
+    └── app-c/                 (no manifest)
+    """
+    source = TEST_MANIFEST_DIRECTORY / MANIFEST_FILE_NAME
+    for directory in ("app-a", "app-a/.git", "app-a/build", "app-a/tests/.dependencies/x"):
+        (root / directory).mkdir(parents=True)
+        shutil.copy(source, root / directory / MANIFEST_FILE_NAME)
+    (root / "app-b").mkdir()
+    (root / "app-b" / MANIFEST_FILE_NAME).write_text("[app]\nsdk = 'Go'\n")
+    (root / "app-c").mkdir()
+
+
+class TestManifestScan(TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        make_workspace(self.root)
+
+    def test_find_manifests(self):
+        self.assertListEqual(
+            list(find_manifests(self.root)),
+            [self.root / "app-a" / MANIFEST_FILE_NAME, self.root / "app-b" / MANIFEST_FILE_NAME],
+        )
+
+    def test_scan(self):
+        results = list(Manifest.scan(self.root, max_workers=2))
+        self.assertEqual(len(results), 2)
+        (path_a, manifest), (path_b, error) = results
+        self.assertEqual(path_a, self.root / "app-a" / MANIFEST_FILE_NAME)
+        self.assertIsInstance(manifest, Manifest)
+        self.assertEqual(manifest.app.sdk, "rust")
+        self.assertEqual(path_b, self.root / "app-b" / MANIFEST_FILE_NAME)
+        self.assertIsInstance(error, ManifestLoadError)
+        self.assertTrue(str(error).startswith("TypeError: "))
@@ -0,0 +1,134 @@
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest import TestCase, skipUnless
+
+from ledgered.manifest.materialize import DependencyMaterializer, MaterializeStatus
+from ledgered.manifest.tests import PyTestsConfig
+
+
+def git(*args, cwd=None) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@test", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def make_repository(path: Path) -> None:
+    path.mkdir()
+    git("init", "--quiet", "--initial-branch", "develop", cwd=path)
+    for version in ("1", "2"):
+        (path / "VERSION").write_text(version)
+        git("add", "VERSION", cwd=path)
+        git("commit", "--quiet", "-m", version, cwd=path)
+        git("tag", f"v{version}", cwd=path)
+
+
+@skipUnless(shutil.which("git"), "git is not installed")
+class TestDependencyMaterializer(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.exchange = self.tmp / "remote" / "app-exchange"
+        self.ethereum = self.tmp / "remote" / "app-ethereum"
+        self.exchange.parent.mkdir()
+        make_repository(self.exchange)
+        make_repository(self.ethereum)
+        self.app = self.tmp / "app"
+        self.config = PyTestsConfig(
+            key="standalone",
+            directory="tests",
+            dependencies={
+                "main": [
+                    {"url": f"file://{self.exchange}", "ref": "v1"},
+                    {"url": f"file://{self.exchange}", "ref": "develop", "use_case": "dbg"},
+                    {"url": f"file://{self.ethereum}", "ref": "v2"},
+                ],
+                "other": [{"url": f"file://{self.exchange}", "ref": "v1"}],
+            },
+        )
+        self.materializer = DependencyMaterializer(store=self.tmp / "store", max_workers=4)
+
+    def read(self, name: str) -> str:
+        return (self.app / "tests" / ".dependencies" / name / "VERSION").read_text()
+
+    def test_materialize(self):
+        results = self.materializer.materialize(self.config, self.app)
+        self.assertListEqual([r.status for r in results], [MaterializeStatus.CLONED] * 3)
+        self.assertEqual(self.read("app-exchange-v1-default"), "1")
+        self.assertEqual(self.read("app-exchange-develop-dbg"), "2")
+        self.assertEqual(self.read("app-ethereum-v2-default"), "2")
+        # one mirror per repository, shared by the checkouts
+        self.assertEqual(len(list((self.tmp / "store").iterdir())), 2)
+        self.assertEqual(results[0].json["status"], "cloned")
+        # the checkouts do not depend on the mirror objects
+        shutil.rmtree(self.tmp / "store")
+        checkout = self.app / "tests" / ".dependencies" / "app-exchange-develop-dbg"
+        self.assertEqual(git("log", "--format=%s", cwd=checkout).splitlines(), ["2", "1"])
+
+    def test_materialize_skip_and_update(self):
+        self.materializer.materialize(self.config, self.app, use_cases=["main"])
+        git("commit", "--quiet", "--allow-empty", "-m", "3", cwd=self.exchange)
+        results = DependencyMaterializer(store=self.tmp / "store").materialize(
+            self.config, self.app, use_cases=["main"]
+        )
+        self.assertListEqual(
+            [r.status for r in results],
+            # app-ethereum-v2, app-exchange-develop, app-exchange-v1
+            [MaterializeStatus.SKIPPED, MaterializeStatus.UPDATED, MaterializeStatus.SKIPPED],
+        )
+        self.assertEqual(results[1].commit, git("rev-parse", "HEAD", cwd=self.exchange))
+
+    def test_materialize_pinned_without_fetch(self):
+        self.materializer.materialize(self.config, self.app, use_cases=["main"])
+        # the tags are checked out, the repositories are not needed any more
+        shutil.rmtree(self.tmp / "remote")
+        shutil.rmtree(self.tmp / "store")
+        config = PyTestsConfig(
+            key="standalone",
+            directory="tests",
+            dependencies={"main": [{"url": f"file://{self.ethereum}", "ref": "v2"}]},
+        )
+        results = DependencyMaterializer(store=self.tmp / "store").materialize(config, self.app)
+        self.assertEqual(results[0].status, MaterializeStatus.SKIPPED)
+        self.assertFalse((self.tmp / "store").exists())
+
+    def test_materialize_local_changes(self):
+        config = PyTestsConfig(
+            key="standalone",
+            directory="tests",
+            dependencies={"main": [{"url": f"file://{self.exchange}", "ref": "develop"}]},
+        )
+        self.materializer.materialize(config, self.app)
+        git("commit", "--quiet", "--allow-empty", "-m", "3", cwd=self.exchange)
+        (
+            self.app / "tests" / ".dependencies" / "app-exchange-develop-default" / "VERSION"
+        ).write_text("edited")
+        results = DependencyMaterializer(store=self.tmp / "store").materialize(config, self.app)
+        self.assertEqual(results[0].status, MaterializeStatus.FAILED)
+        self.assertIn("local changes", results[0].error)
+        self.assertEqual(self.read("app-exchange-develop-default"), "edited")
+
+        materializer = DependencyMaterializer(store=self.tmp / "store", overwrite=True)
+        results = materializer.materialize(config, self.app)
+        self.assertEqual(results[0].status, MaterializeStatus.UPDATED)
+        self.assertEqual(self.read("app-exchange-develop-default"), "2")
+
+    def test_materialize_failures(self):
+        config = PyTestsConfig(
+            key="standalone",
+            directory="tests",
+            dependencies={
+                "main": [
+                    {"url": f"file://{self.tmp / 'nope'}", "ref": "v1"},
+                    {"url": f"file://{self.exchange}", "ref": "v3"},
+                ]
+            },
+        )
+        results = self.materializer.materialize(config, self.app)
+        self.assertListEqual([r.status for r in results], [MaterializeStatus.FAILED] * 2)
+        self.assertIn("v3", results[0].error)
@@ -0,0 +1,90 @@
+from unittest import TestCase
+
+from ledgered.manifest.manifest import Manifest
+from ledgered.manifest.matrix import build_matrix, parse_rule, shard
+
+from .. import TEST_MANIFEST_DIRECTORY
+
+
+class TestMatrix(TestCase):
+    def setUp(self):
+        self.manifest = Manifest(
+            app={"sdk": "c", "build_directory": ".", "devices": ["nanos+", "stax"]},
+            use_cases={"debug": "DEBUG=1"},
+            pytest={
+                "standalone": {"directory": "tests/standalone"},
+                "swap": {
+                    "directory": "tests/swap",
+                    "self_use_case": "debug",
+                    "dependencies": {
+                        "main": [{"url": "https://github.com/LedgerHQ/app-exchange", "ref": "d"}]
+                    },
+                },
+            },
+        )
+
+    def test_build_matrix(self):
+        entries = build_matrix(self.manifest, "COIN", ["BTC", "BTC_TEST"])
+        self.assertEqual(len(entries), 2 * 2 * 2)
+        self.assertEqual(
+            [(e.device, e.variant_value, e.use_case) for e in entries[:4]],
+            [
+                ("nanos+", "BTC", "default"),
+                ("nanos+", "BTC", "debug"),
+                ("nanos+", "BTC_TEST", "default"),
+                ("nanos+", "BTC_TEST", "debug"),
+            ],
+        )
+        default, debug = entries[0].json, entries[1].json
+        self.assertEqual(default["build_flags"], "")
+        self.assertEqual(default["variant_param"], "COIN")
+        self.assertListEqual(
+            default["tests"],
+            [{"key": "standalone", "directory": "tests/standalone", "dependencies": []}],
+        )
+        self.assertEqual(debug["build_flags"], "DEBUG=1")
+        self.assertEqual(debug["tests"][0]["key"], "swap")
+        self.assertEqual(
+            debug["tests"][0]["dependencies"][0]["application_directory"],
+            "tests/swap/.dependencies/app-exchange-d-default",
+        )
+
+    def test_build_matrix_no_variant_legacy_tests(self):
+        manifest = Manifest.from_path(TEST_MANIFEST_DIRECTORY / "full_correct.toml")
+        entries = build_matrix(manifest)
+        self.assertListEqual([e.use_case for e in entries], ["default", "debug", "test"])
+        self.assertIsNone(entries[0].variant_value)
+        self.assertEqual(entries[0].tests[0].directory, "tests/functional")
+        self.assertEqual(len(entries[0].tests[0].dependencies), 2)
+
+    def test_build_matrix_rules(self):
+        entries = build_matrix(
+            self.manifest,
+            "COIN",
+            ["BTC", "BTC_TEST"],
+            include=[parse_rule("device=stax"), parse_rule("variant_value=*TEST")],
+            exclude=[parse_rule("use_case=debug, device=nanos+")],
+        )
+        self.assertListEqual(
+            [(e.device, e.variant_value, e.use_case) for e in entries],
+            [
+                ("nanos+", "BTC_TEST", "default"),
+                ("stax", "BTC", "default"),
+                ("stax", "BTC", "debug"),
+                ("stax", "BTC_TEST", "default"),
+                ("stax", "BTC_TEST", "debug"),
+            ],
+        )
+        with self.assertRaises(ValueError):
+            build_matrix(self.manifest, include=[parse_rule("tests=*")])
+        with self.assertRaises(ValueError):
+            parse_rule("device")
+
+    def test_shard(self):
+        entries = build_matrix(self.manifest, "COIN", ["A", "B", "C"])
+        chunks = shard(entries, 5)
+        self.assertListEqual([len(chunk) for chunk in chunks], [3, 3, 2, 2, 2])
+        self.assertListEqual([e for chunk in chunks for e in chunk], entries)
+        self.assertListEqual([len(chunk) for chunk in shard(entries[:2], 3)], [1, 1, 0])
+        with self.assertRaises(ValueError):
+            shard(entries, 0)
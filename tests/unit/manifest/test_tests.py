@@ -5,6 +5,7 @@ from ledgered.manifest.constants import DEFAULT_USE_CASE
 from ledgered.manifest.errors import MissingField
 from ledgered.manifest.tests import (
     DuplicateDependencyError,
+    PyTestsConfig,
     TestsConfig,
     TestsDependencyConfig,
     TestsDependenciesConfig,
@@ -136,3 +137,45 @@ class TestTestsConfig(TestCase):
     def test___init__missing_field(self):
         with self.assertRaises(MissingField):
             TestsConfig(dependencies="something")
+
+    def test_from_json(self):
+        config = TestsConfig(
+            unit_directory="unit",
+            pytest_directory="pytest",
+            dependencies={"first": [{"url": "https://a/app-a", "ref": "r", "use_case": "uc"}]},
+        )
+        for trusted in (False, True):
+            result = TestsConfig.from_json(config.json, trusted=trusted)
+            self.assertEqual(result, config)
+            self.assertEqual(result.json, config.json)
+        self.assertEqual(TestsConfig.from_json(TestsConfig().json), TestsConfig())
+
+
+class TestPyTestsConfig(TestCase):
+    def test_from_json(self):
+        config = PyTestsConfig(
+            key="swap",
+            directory="tests/swap",
+            dependencies={
+                "prod": [
+                    {"url": "https://github.com/LedgerHQ/app-exchange", "ref": "master"},
+                    {"url": "https://github.com/LedgerHQ/app-ethereum", "ref": "v1-2-3"},
+                ]
+            },
+        )
+        for trusted in (False, True):
+            result = PyTestsConfig.from_json(config.json, trusted=trusted)
+            self.assertEqual(result, config)
+            self.assertCountEqual(
+                [d.dir for d in result.dependencies["prod"].dependencies],
+                [d.dir for d in config.dependencies["prod"].dependencies],
+            )
+        config = PyTestsConfig(key="standalone", directory="tests")
+        self.assertEqual(PyTestsConfig.from_json(config.json, trusted=True), config)
+
+    def test_from_json_nok(self):
+        dependency = {"url": "https://a/app-a", "ref": "r", "use_case": "uc"}
+        data = PyTestsConfig(key="k", directory="d").json
+        data["dependencies"] = {"first": [dependency, dependency]}
+        with self.assertRaises(DuplicateDependencyError):
+            PyTestsConfig.from_json(data)
@@ -35,3 +35,9 @@ class TestUseCaseConfig(TestCase):
     def test_get_nok(self):
         with self.assertRaises(KeyError):
             self.uc.get("does not exist")
+
+    def test_from_json(self):
+        for trusted in (False, True):
+            self.assertEqual(UseCasesConfig.from_json(self.uc.json, trusted=trusted), self.uc)
+        with self.assertRaises(ValueError):
+            UseCasesConfig.from_json({DEFAULT_USE_CASE: "something"})
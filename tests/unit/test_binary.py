@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+import json
+from dataclasses import asdict, dataclass
+from io import StringIO
 from unittest import TestCase
 from unittest.mock import patch
 from pathlib import Path
@@ -54,6 +56,13 @@ class TestSections(TestCase):
         # explicit `str(v)` as None values needs to be converted to 'None'
         self.assertDictEqual({k: str(v) for k, v in self.inputs.items()}, sections.json)
 
+    def test_from_json(self):
+        sections = B.Sections(**self.inputs)
+        for trusted in (False, True):
+            self.assertEqual(B.Sections.from_json(sections.json, trusted=trusted), sections)
+        with self.assertRaises(TypeError):
+            B.Sections.from_json({"unknown": "value"})
+
 
 @dataclass
 class Section:
@@ -69,7 +78,7 @@ class TestLedgerBinaryApp(TestCase):
         path = Path("/dev/urandom")
         api_level, sdk_hash = "something", "some hash"
         expected = B.Sections(api_level=api_level, sdk_hash=sdk_hash)
-        with patch("ledgered.binary.ELFFile") as elfmock:
+        with patch("elftools.elf.elffile.ELFFile") as elfmock:
             elfmock().iter_sections.return_value = [
                 Section("unused", 1),
                 Section("ledger.api_level", api_level.encode()),
@@ -81,5 +90,34 @@ class TestLedgerBinaryApp(TestCase):
 
     def test___init__from_str(self):
         path = "/dev/urandom"
-        with patch("ledgered.binary.ELFFile"):
+        with patch("elftools.elf.elffile.ELFFile"):
             B.LedgerBinaryApp(path)
+
+
+class TestSectionsDevice(TestCase):
+    def test_device(self):
+        self.assertEqual(B.Sections(target_id="0x33200004").device.name, "stax")
+        self.assertEqual(B.Sections(target="nanos2").device.name, "nanosp")
+        self.assertIsNone(B.Sections(target_id="0x12345678").device)
+        self.assertIsNone(B.Sections(target_id="garbage").device)
+        self.assertIsNone(B.Sections().device)
+
+
+class TestMain(TestCase):
+    def test_json(self):
+        sections = B.Sections(app_name="app", target_id="0x33200004")
+        with patch("sys.argv", ["ledger-binary", __file__, "--json"]):
+            with patch("ledgered.serve.query", return_value=asdict(sections)):
+                with patch("sys.stdout", StringIO()) as stdout:
+                    B.main()
+        self.assertEqual(json.loads(stdout.getvalue()), sections.json)
+
+    def test_timings(self):
+        sections = B.Sections(app_name="app")
+        with patch("sys.argv", ["ledger-binary", __file__, "--timings"]):
+            with patch("ledgered.serve.query", return_value=asdict(sections)):
+                with patch("sys.stdout", StringIO()) as stdout:
+                    with patch("sys.stderr", StringIO()) as stderr:
+                        B.main()
+        self.assertEqual(stdout.getvalue(), f"{sections}\n")
+        self.assertIn("output [text]", stderr.getvalue())
@@ -0,0 +1,83 @@
+import json
+from unittest import TestCase
+from unittest.mock import patch
+
+from ledgered import compact
+from ledgered.binary import Sections
+from ledgered.manifest.manifest import Manifest
+
+from . import TEST_MANIFEST_DIRECTORY, benchmark
+
+
+class TestCompact(TestCase):
+    def setUp(self):
+        self.manifests = [
+            Manifest.from_path(TEST_MANIFEST_DIRECTORY / name, use_cache=False)
+            for name in ["full_correct.toml", "full_correct_v2.toml", "ledger_app.toml"]
+        ]
+        self.sections = Sections(app_name="app", target_id="0x33200004", sdk_version="v15.1.0")
+
+    def test_encode_decode(self):
+        for record in self.manifests + [self.sections]:
+            with self.subTest(record=record):
+                self.assertEqual(compact.decode(compact.encode(record)), record)
+
+    def test_encode_decode_many(self):
+        records = (self.manifests + [self.sections]) * 3
+        self.assertListEqual(compact.decode_many(compact.encode_many(records)), records)
+        self.assertListEqual(compact.decode_many(compact.encode_many([])), [])
+
+    def test_decoded_records_are_independent(self):
+        first, second = compact.decode_many(compact.encode_many([self.manifests[0]] * 2))
+        self.assertIsNot(first.app.devices, second.app.devices)
+
+    def test_size(self):
+        records = self.manifests * 10 + [self.sections] * 10
+        json_size = sum(len(json.dumps(record.json)) for record in records)
+        self.assertLess(len(compact.encode_many(records)) * 4, json_size)
+        # strings are interned, even in distinct records
+        distinct = [Sections(app_name=str(i), sdk_name="ledger-secure-sdk") for i in range(10)]
+        self.assertEqual(compact.encode_many(distinct).count(b"ledger-secure-sdk"), 1)
+
+    def test_copies(self):
+        single = len(compact.encode_many(self.manifests))
+        self.assertLess(len(compact.encode_many(self.manifests * 10)), single + 10 * 3 * 3)
+
+    def test_decode_nok(self):
+        blob = compact.encode(self.manifests[0])
+        with self.assertRaises(ValueError):
+            compact.decode(b"JSON" + blob[4:])
+        with self.assertRaises(ValueError):
+            compact.decode(blob[:-5])
+        with self.assertRaises(ValueError):
+            compact.decode(compact.encode_many(self.manifests))
+
+    def test_version(self):
+        blob = bytearray(compact.encode(self.sections))
+        blob[len(compact.MAGIC)] = compact.FORMAT_VERSION + 1
+        with self.assertRaises(ValueError):
+            compact.decode(bytes(blob))
+
+    def test_unknown_schema(self):
+        # written by a version knowing more schemas
+        with patch.dict(compact.SCHEMAS, {42: Sections}):
+            del compact.SCHEMAS[2]
+            blob = compact.encode_many([self.sections, self.manifests[0], self.sections])
+        with self.assertLogs(level="WARNING"):
+            self.assertListEqual(compact.decode_many(blob), [self.manifests[0]])
+
+    def test_encode_nok(self):
+        with self.assertRaises(TypeError):
+            compact.encode(self.manifests[0].app)
+
+    def test_benchmark(self):
+        results = compact.benchmark(self.manifests + [self.sections], number=1)
+        self.assertListEqual(list(results), ["compact", "json"])
+        for result in results.values():
+            self.assertListEqual(list(result), ["size", "encode", "decode"])
+        self.assertLess(results["compact"]["size"], results["json"]["size"])
+
+    @benchmark
+    def test_benchmark_decode(self):
+        results = compact.benchmark(self.manifests * 20 + [self.sections] * 20, number=5)
+        self.assertLess(results["compact"]["decode"], results["json"]["decode"])
@@ -1,28 +1,80 @@
-from typing import Optional
+import copy
+import gc
+import pickle
+import time
+import tracemalloc
+from dataclasses import FrozenInstanceError
+from datetime import datetime, timezone
+from github import Github
+from github.GithubException import GithubException
+from github.Organization import Organization
+from github.Requester import Requester
+from threading import Event
+from typing import List, Optional
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, PropertyMock, patch
 
-from ledgered.github import Condition, GitHubApps, GitHubLedgerHQ, NoManifestException
+from ledgered.github import (
+    AppQuery,
+    AppRepository,
+    AppSummary,
+    Condition,
+    ConnectionStats,
+    HEDGE_MIN_SAMPLES,
+    HedgedRequester,
+    LatencyStats,
+    GitHubApps,
+    GitHubLedgerHQ,
+    NoManifestException,
+    _endpoint,
+    _percentile,
+    default_retry,
+)
+from ledgered.utils.timing import TimingCollector
 
 
 class AppRepositoryMock:
     def __init__(
-        self, name: str, sdk: Optional[str] = "c", archived: bool = False, private: bool = False
+        self,
+        name: str,
+        sdk: Optional[str] = "c",
+        archived: bool = False,
+        private: bool = False,
+        devices: Optional[List[str]] = None,
+        variants: Optional[List[str]] = None,
     ):
         self.name = name
         self.archived = archived
         self.private = private
         self._sdk = sdk
+        self._devices = set(devices or ["nanox"])
+        self._variants = variants or []
+        self.manifest_calls = 0
 
     @property
     def manifest(self) -> str:
+        self.manifest_calls += 1
         if self._sdk:
             mock = MagicMock()
             mock.app.sdk = self._sdk
+            mock.app.devices = self._devices
             return mock
         else:
             raise NoManifestException(MagicMock())
 
+    @property
+    def variants(self) -> List[str]:
+        if not self._sdk:
+            raise NoManifestException(MagicMock())
+        return self._variants
+
+
+class BrokenAppRepositoryMock(AppRepositoryMock):
+    @property
+    def manifest(self) -> str:
+        self.manifest_calls += 1
+        raise ValueError("Invalid manifest")
+
 
 class TestGitHubApps(TestCase):
     def setUp(self):
@@ -67,6 +119,69 @@ class TestGitHubApps(TestCase):
         )
         self.assertCountEqual(self.apps.filter(sdk=["rust"]), [self.app1])
 
+    def test_filter_devices_variants(self):
+        self.app1._devices = {"stax", "flex"}
+        self.app1._variants = ["default"]
+        self.app3._devices = {"stax"}
+        self.assertCountEqual(self.apps.filter(devices=["stax"]), [self.app1, self.app3])
+        self.assertCountEqual(self.apps.filter(devices=["stax", "flex"]), [self.app1])
+        self.assertCountEqual(
+            self.apps.filter(devices=["stax"], sdk=["rust"], variants=Condition.ONLY), [self.app1]
+        )
+        self.assertCountEqual(
+            self.apps.filter(variants=Condition.WITHOUT),
+            [self.app3, self.app4, self.app5, self.app6],
+        )
+        # 'nanos+' is resolved into its SDK name. The indexes of `self.apps` are now stale, as the
+        # apps content changed, so a new listing is used.
+        self.app4._devices = {"nanos+"}
+        self.assertCountEqual(GitHubApps(self.apps).filter(devices=["nanosp"]), [self.app4])
+
+    def test_filter_no_manifest(self):
+        self.app3._sdk = None
+        self.assertNotIn(self.app3, self.apps.filter(sdk=["c"]))
+        self.assertNotIn(self.app3, self.apps.filter(devices=["nanox"]))
+        self.assertIn(self.app3, self.apps.filter(variants=Condition.WITHOUT))
+
+    def test_query_and(self):
+        query = AppQuery.build(devices=["nanox"]) & AppQuery.build(
+            sdk=["c"], archived=Condition.WITHOUT
+        )
+        self.assertCountEqual(self.apps.query(query), [self.app3, self.app5, self.app6])
+        query &= AppQuery.build(name="plugin")
+        self.assertCountEqual(self.apps.query(query), [self.app5])
+        with self.assertRaises(ValueError):
+            AppQuery.build(private=Condition.ONLY) & AppQuery.build(private=Condition.WITHOUT)
+
+    def test_query_cache(self):
+        query = AppQuery.build(sdk=["c"], devices=["nanox"])
+        first = self.apps.query(query)
+        calls = self.app3.manifest_calls
+        self.assertListEqual(self.apps.query(query), first)
+        self.assertListEqual(self.apps.filter(sdk=["rust"]), [self.app1])
+        # the manifests are only read once per listing
+        self.assertEqual(self.app3.manifest_calls, calls)
+
+    def test_query_cheap_criteria_first(self):
+        apps = [AppRepositoryMock(f"app-{i}") for i in range(50)]
+        broken = BrokenAppRepositoryMock("app-broken")
+        listing = GitHubApps(apps + [broken, AppRepositoryMock("app-boilerplate")])
+        self.assertListEqual(
+            [app.name for app in listing.filter(name="boilerplate", sdk=["c"])], ["app-boilerplate"]
+        )
+        self.assertListEqual(
+            listing.filter(name="1", private=Condition.ONLY, devices=["nanox"]), []
+        )
+        # only the manifest of the app matching the name was read
+        self.assertEqual(sum(app.manifest_calls for app in apps), 0)
+        self.assertEqual(broken.manifest_calls, 0)
+
+    def test_query_invalidation(self):
+        self.assertCountEqual(self.apps.filter(name="7"), [])
+        app7 = AppRepositoryMock("app-7")
+        self.apps.append(app7)
+        self.assertCountEqual(self.apps.filter(name="7"), [app7])
+
     def test_first(self):
         self.assertEqual(self.apps.first("3"), self.app3)
         self.assertEqual(self.apps.first(), self.app1)
@@ -79,3 +194,416 @@ class TestGitHubLedgerHQ(TestCase):
     def test_get_app_wrong_name(self):
         with self.assertRaises(AssertionError):
             self.g.get_app("not-starting-with-app-")
+
+
+class TestConnectionStats(TestCase):
+    def test_reuse_ratio(self):
+        stats = ConnectionStats(requests=10, connections=2)
+        self.assertEqual(stats.reused, 8)
+        self.assertEqual(stats.reuse_ratio, 0.8)
+        self.assertEqual(str(stats), "10 requests, 2 handshakes, 80% connection reuse")
+
+    def test___sub__(self):
+        after = ConnectionStats(requests=10, connections=2)
+        self.assertEqual(after - ConnectionStats(4, 1), ConnectionStats(6, 1))
+        # counters reset by a pool eviction
+        self.assertEqual(ConnectionStats(1, 1) - after, ConnectionStats(0, 0))
+
+    def test_reuse_ratio_no_request(self):
+        self.assertEqual(ConnectionStats().reuse_ratio, 0.0)
+
+
+class TestGitHubLedgerHQOffline(TestCase):
+    def setUp(self):
+        org_patch = patch.object(GitHubLedgerHQ, "get_organization")
+        org = org_patch.start()
+        org.return_value.login = "LedgerHQ"
+        org.return_value.url = "https://api.github.com/orgs/LedgerHQ"
+        self.addCleanup(org_patch.stop)
+        # patched before the instance creation, so that GitHubLedgerHQ wraps the mock
+        request_patch = patch.object(Requester, "requestJsonAndCheck", side_effect=self._request)
+        self.request = request_patch.start()
+        self.addCleanup(request_patch.stop)
+        self.g = GitHubLedgerHQ()
+        self.addCleanup(self.g.close)
+
+    @staticmethod
+    def _request(verb, url, **kwargs):
+        name = url.split("/")[-1]
+        return {}, {"name": name, "default_branch": "main", "url": url}
+
+    def test_get_app(self):
+        app = self.g.get_app("app-boilerplate")
+        self.assertIsInstance(app, AppRepository)
+        self.assertEqual(app.name, "app-boilerplate")
+        self.assertEqual(app.current_branch, "main")
+        self.request.assert_called_once()
+        self.assertEqual(self.request.call_args.args[1], "/repos/LedgerHQ/app-boilerplate")
+
+    def test_apps_matches_get_repos(self):
+        self.g._org = Organization(
+            self.g.requester,
+            {},
+            {"login": "LedgerHQ", "url": "https://api.github.com/orgs/LedgerHQ"},
+            completed=True,
+        )
+        self.request.side_effect = lambda verb, url, **kwargs: (
+            {},
+            [{"name": n, "default_branch": "main"} for n in ("app-1", "not-app")],
+        )
+        expected = list(self.g._org.get_repos())
+        expected_call = self.request.call_args
+        self.request.reset_mock()
+
+        apps = self.g.apps
+        self.assertEqual(self.request.call_args, expected_call)
+        self.assertListEqual([a.name for a in apps], [expected[0].name])
+        self.assertIsInstance(apps[0], AppRepository)
+
+    def test_get_apps(self):
+        names = [f"app-{i}" for i in range(20)]
+        apps = self.g.get_apps(names, max_workers=4)
+        self.assertIsInstance(apps, GitHubApps)
+        self.assertListEqual([a.name for a in apps], names)
+        for app in apps:
+            self.assertIsInstance(app, AppRepository)
+
+    def test_get_apps_wrong_name(self):
+        with self.assertRaises(AssertionError):
+            self.g.get_apps(["app-1", "not-an-app"])
+        self.request.assert_not_called()
+
+    def test_pool_size(self):
+        self.assertEqual(self.g.requester.kwargs["pool_size"], 8)
+        self.assertEqual(self.g._workers(None), 8)
+        self.assertEqual(self.g._workers(4), 4)
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(self.g._workers(32), 8)
+        with self.assertRaises(ValueError):
+            self.g._workers(0)
+        g = GitHubLedgerHQ(pool_size=32)
+        self.assertEqual(g.requester.kwargs["pool_size"], 32)
+        self.assertEqual(g._workers(None), 32)
+
+    def test_stats(self):
+        self.assertEqual(self.g.stats, ConnectionStats())
+        pool = MagicMock(num_requests=12, num_connections=3)
+        connection = MagicMock()
+        connection.adapter.poolmanager.pools = {"api.github.com": pool}
+        self.g.requester._Requester__connection = connection
+        self.assertEqual(self.g.stats, ConnectionStats(requests=12, connections=3))
+        # the derived requesters have their own connections
+        lazy = self.g.requester.withLazy(True)
+        lazy_connection = MagicMock()
+        lazy_connection.adapter.poolmanager.pools = {
+            "api.github.com": MagicMock(num_requests=5, num_connections=1)
+        }
+        lazy._Requester__connection = lazy_connection
+        self.assertEqual(self.g.stats, ConnectionStats(requests=17, connections=4))
+        del lazy
+        gc.collect()
+        self.assertEqual(self.g.stats, ConnectionStats(requests=12, connections=3))
+
+    def test_get_apps_stats(self):
+        pool = MagicMock(num_requests=2, num_connections=1)
+        connection = MagicMock()
+        connection.adapter.poolmanager.pools = {"api.github.com": pool}
+        self.g.requester._Requester__connection = connection
+
+        def request(verb, url, **kwargs):
+            pool.num_requests += 1
+            return self._request(verb, url)
+
+        self.request.side_effect = request
+        with self.assertLogs(level="INFO") as logs:
+            self.g.get_apps(["app-1", "app-2", "app-3"], max_workers=1)
+        self.assertIn("Fetching 3 apps with 1 workers: 3 requests, 0 handshakes", logs.output[-2])
+        self.assertIn("GET /repos/{owner}/{repo}: 3 requests", logs.output[-1])
+
+    def test_latencies(self):
+        self.g.get_app("app-1")
+        self.assertEqual(self.g.latencies.report()["GET /repos/{owner}/{repo}"]["count"], 1)
+
+    def test_derived_requester_is_wrapped(self):
+        lazy = self.g.requester.withLazy(True)
+        self.assertIsNot(lazy, self.g.requester)
+        lazy.requestJsonAndCheck("GET", "/repos/LedgerHQ/app-1")
+        self.assertEqual(self.g.latencies.report()["GET /repos/{owner}/{repo}"]["count"], 1)
+
+    def test_hedge_pool_size(self):
+        g = GitHubLedgerHQ(hedge_percentile=95)
+        self.addCleanup(g.close)
+        self.assertEqual(g.requester.kwargs["pool_size"], 16)
+        self.assertEqual(g._workers(None), 8)
+
+
+class TestLatencyStats(TestCase):
+    def test__percentile(self):
+        values = [float(i) for i in range(1, 11)]
+        self.assertEqual(_percentile(values, 0), 1.0)
+        self.assertEqual(_percentile(values, 50), 5.0)
+        self.assertEqual(_percentile(values, 95), 10.0)
+        self.assertEqual(_percentile(values, 99), 10.0)
+        self.assertEqual(_percentile(values, 100), 10.0)
+        self.assertEqual(_percentile([3.0], 50), 3.0)
+
+    def test_percentile(self):
+        stats = LatencyStats()
+        for i in range(HEDGE_MIN_SAMPLES - 1):
+            stats.add("GET /x", 1.0)
+        self.assertIsNone(stats.percentile("GET /x", 50))
+        stats.add("GET /x", 1.0)
+        self.assertEqual(stats.percentile("GET /x", 50), 1.0)
+        # cached until enough new samples are recorded
+        stats.add("GET /x", 100.0)
+        self.assertEqual(stats.percentile("GET /x", 100), 100.0)
+        stats.add("GET /x", 200.0)
+        self.assertEqual(stats.percentile("GET /x", 100), 100.0)
+
+    def test_report_since(self):
+        stats = LatencyStats()
+        stats.add("GET /x", 1.0)
+        snapshot = stats.snapshot()
+        stats.add("GET /x", 2.0)
+        stats.add("GET /y", 3.0)
+        self.assertEqual(
+            stats.report(snapshot)["GET /x"], {"count": 1, "p50": 2.0, "p95": 2.0, "p99": 2.0}
+        )
+        self.assertEqual(stats.report()["GET /x"]["count"], 2)
+        self.assertIn("GET /y: 1 requests, p50 3.000s", stats.summary(snapshot))
+
+    def test__endpoint(self):
+        self.assertEqual(
+            _endpoint("GET", "/repos/LedgerHQ/app-boilerplate/contents/ledger_app.toml"),
+            "GET /repos/{owner}/{repo}/contents",
+        )
+        self.assertEqual(
+            _endpoint("GET", "/repos/LedgerHQ/app-boilerplate"), "GET /repos/{owner}/{repo}"
+        )
+        self.assertEqual(_endpoint("GET", "/orgs/ledgerhq"), "GET /orgs/{owner}")
+        self.assertEqual(
+            _endpoint("GET", "https://api.github.com/orgs/LedgerHQ/repos?page=2&per_page=30"),
+            "GET /orgs/{owner}/repos",
+        )
+
+    def test_default_retry(self):
+        retry = default_retry(max_rate_limit_wait=60)
+        self.assertEqual(retry.max_rate_limit_wait, 60)
+        self.assertGreater(retry.backoff_factor, 0)
+        self.assertGreater(retry.backoff_jitter, 0)
+        self.assertIn(500, retry.status_forcelist)
+        self.assertIn(403, retry.status_forcelist)
+        # urllib3 < 2
+        with patch("ledgered.github._RETRY_JITTER_SUPPORTED", False):
+            with patch("ledgered.github.GithubRetry") as retry_mock:
+                default_retry()
+        self.assertNotIn("backoff_jitter", retry_mock.call_args.kwargs)
+
+
+class TestHedgedRequester(TestCase):
+    ENDPOINT = "GET /repos/{owner}/{repo}"
+
+    def setUp(self):
+        self.requests = HedgedRequester(hedge_percentile=50, max_workers=4)
+        self.addCleanup(self.requests.close)
+        for _ in range(HEDGE_MIN_SAMPLES):
+            self.requests.latencies.add(self.ENDPOINT, 0.01)
+        self.release = Event()
+        self.addCleanup(self.release.set)
+        self.calls = 0
+
+    def _sequence(self, *behaviors):
+        def request(verb, url):
+            index = self.calls
+            self.calls += 1
+            return behaviors[index]()
+
+        return request
+
+    def _call(self, request, rate_limiting=(5000, 5000)):
+        return self.requests(request, lambda: rate_limiting, "GET", "/repos/LedgerHQ/app-1")
+
+    def _slow(self, result=None, error=False, delay=None):
+        def behavior():
+            if delay is None:
+                self.release.wait()
+            else:
+                time.sleep(delay)
+            if error:
+                raise GithubException(500)
+            return result
+
+        return behavior
+
+    def test_hedged_duplicate_wins(self):
+        request = self._sequence(self._slow("slow"), lambda: "fast")
+        self.assertEqual(self._call(request), "fast")
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.requests.hedged, 1)
+
+    def test_failure_then_success(self):
+        request = self._sequence(self._slow(error=True, delay=0.05), self._slow("ok", delay=0.2))
+        self.assertEqual(self._call(request), "ok")
+        self.assertEqual(self.requests.hedged, 1)
+
+    def test_both_fail(self):
+        request = self._sequence(
+            self._slow(error=True, delay=0.05), self._slow(error=True, delay=0.1)
+        )
+        with self.assertRaises(GithubException):
+            self._call(request)
+        self.assertEqual(self.calls, 2)
+
+    def test_no_hedge_out_of_budget(self):
+        request = self._sequence(self._slow("slow", delay=0.1))
+        self.assertEqual(self._call(request, rate_limiting=(10, 5000)), "slow")
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.requests.hedged, 0)
+
+    def test_no_hedge_without_samples(self):
+        request = self._sequence(lambda: "ok")
+        result = self.requests(request, lambda: (5000, 5000), "GET", "/orgs/LedgerHQ")
+        self.assertEqual(result, "ok")
+        self.assertEqual(self.requests.hedged, 0)
+        self.assertEqual(self.requests.latencies.report()["GET /orgs/{owner}"]["count"], 1)
+
+    def test_timing_spans(self):
+        request = self._sequence(lambda: "ok")
+        with TimingCollector() as collector:
+            self.requests(request, lambda: (5000, 5000), "GET", "/orgs/LedgerHQ")
+        self.assertEqual(collector.report()["github.request [GET /orgs/{owner}]"]["count"], 1)
+
+
+def _payload(name: str) -> dict:
+    # a trimmed down, but representative, GitHub repository payload
+    url = f"https://api.github.com/repos/LedgerHQ/{name}"
+    payload = {
+        "name": name,
+        "full_name": f"LedgerHQ/{name}",
+        "archived": False,
+        "private": False,
+        "default_branch": "develop",
+        "pushed_at": "2026-01-02T03:04:05Z",
+        "description": "Ledger embedded application " * 4,
+        "url": url,
+    }
+    for key in ("branches", "commits", "contents", "issues", "pulls", "releases", "tags"):
+        payload[f"{key}_url"] = f"{url}/{key}{{/sha}}"
+    payload["owner"] = {"login": "LedgerHQ", "url": "https://api.github.com/users/LedgerHQ"}
+    return payload
+
+
+class TestAppSummary(TestCase):
+    def setUp(self):
+        self.requester = Github().requester
+        self.repo = AppRepository(self.requester, {}, _payload("app-1"), completed=True)
+
+    def test_from_repository(self):
+        summary = AppSummary.from_repository(self.repo)
+        self.assertEqual(summary.name, "app-1")
+        self.assertFalse(summary.archived)
+        self.assertEqual(summary.default_branch, "develop")
+        self.assertEqual(summary.pushed_at, datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc))
+        # nothing fetched, so nothing summarized
+        self.assertIsNone(summary.sdk)
+        self.assertIsNone(summary.devices)
+        self.assertIsNone(summary.variants)
+        self.assertIsNone(summary.head_sha)
+        self.assertFalse(hasattr(summary, "__dict__"))
+
+    def test_from_repository_fetched_manifest(self):
+        self.repo._manifest = MagicMock()
+        self.repo._manifest.app.sdk = "rust"
+        self.repo._manifest.app.devices = {"stax", "flex"}
+        self.repo._variant_values = ["default"]
+        summary = AppSummary.from_repository(self.repo)
+        self.assertEqual(summary.sdk, "rust")
+        self.assertEqual(summary.devices, ("flex", "stax"))
+        self.assertEqual(summary.variants, ("default",))
+
+    def test_from_repository_deep_without_manifest(self):
+        branch = MagicMock()
+        branch.commit.sha = "0123abcd"
+        with patch.object(AppRepository, "get_branch", return_value=branch):
+            with patch.object(AppRepository, "manifest", new_callable=PropertyMock) as manifest:
+                manifest.side_effect = NoManifestException(self.repo)
+                summary = AppSummary.from_repository(self.repo, deep=True)
+        self.assertIsNone(summary.sdk)
+        self.assertEqual(summary.devices, ())
+        self.assertEqual(summary.variants, ())
+        self.assertEqual(summary.head_sha, "0123abcd")
+
+    def test_immutable(self):
+        summary = AppSummary.from_repository(self.repo)
+        with self.assertRaises(FrozenInstanceError):
+            summary.sdk = "rust"
+        with self.assertRaises(FrozenInstanceError):
+            del summary.name
+        self.assertEqual(hash(summary), hash(AppSummary.from_repository(self.repo)))
+        self.assertEqual(pickle.loads(pickle.dumps(summary)), summary)
+        self.assertEqual(copy.copy(summary), summary)
+
+    def test_rehydrate(self):
+        github = MagicMock()
+        summary = AppSummary.from_repository(self.repo)
+        self.assertEqual(summary.rehydrate(github), github.get_app.return_value)
+        github.get_app.assert_called_once_with("app-1")
+
+    def test_compact_filter_rehydrate(self):
+        other = AppRepository(self.requester, {}, _payload("app-2"), completed=True)
+        apps = GitHubApps([self.repo, other])
+        compact = apps.compact()
+        self.assertListEqual(compact, [AppSummary.from_repository(r) for r in apps])
+        self.assertListEqual(compact.filter(name="2"), [compact[1]])
+        # the manifests were not fetched
+        with self.assertRaises(ValueError):
+            compact.filter(sdk=["rust"])
+        with self.assertRaises(ValueError):
+            compact.filter(variants=Condition.ONLY)
+        summarized = GitHubApps(
+            [
+                AppSummary("app-1", sdk="rust", devices=["stax"], variants=["default"]),
+                # fetched, but without manifest
+                AppSummary("app-2", devices=(), variants=()),
+            ]
+        )
+        self.assertListEqual(summarized.filter(sdk=["rust"]), [summarized[0]])
+        self.assertListEqual(summarized.filter(devices=["stax"]), [summarized[0]])
+        self.assertListEqual(summarized.filter(variants=Condition.WITHOUT), [summarized[1]])
+
+        github = MagicMock()
+        github.get_apps.return_value = GitHubApps([self.repo, other])
+        self.assertListEqual(compact.rehydrate(github), [self.repo, other])
+        github.get_apps.assert_called_once_with(["app-1", "app-2"])
+
+    def test_memory(self):
+        def allocated(build):
+            tracemalloc.start()
+            try:
+                kept = build()
+                size = tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+            del kept
+            return size
+
+        count = 200
+        full = allocated(
+            lambda: GitHubApps(
+                [
+                    AppRepository(self.requester, {}, _payload(f"app-{i}"), completed=True)
+                    for i in range(count)
+                ]
+            )
+        )
+        compact = allocated(
+            lambda: GitHubApps(
+                [
+                    AppSummary.from_repository(
+                        AppRepository(self.requester, {}, _payload(f"app-{i}"), completed=True)
+                    )
+                    for i in range(count)
+                ]
+            )
+        )
+        self.assertLess(compact * 3, full)
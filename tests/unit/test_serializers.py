@@ -1,7 +1,32 @@
+import gc
+import json
+import timeit
+from io import StringIO
 from dataclasses import dataclass
+from pathlib import Path
 from unittest import TestCase
+from unittest.mock import patch
 
-from ledgered.serializers import Jsonable, JsonList, JsonSet, JsonDict
+from ledgered.binary import Sections
+from ledgered.manifest.manifest import Manifest
+from ledgered.manifest.matrix import build_matrix
+from ledgered.manifest.tests import TestsDependencyConfig
+from ledgered import serializers
+from ledgered.serializers import (
+    Jsonable,
+    JsonList,
+    JsonSet,
+    JsonDict,
+    field_encoder,
+    iter_json,
+    memoize_json,
+    to_str_int,
+    value_encoder,
+    write_json,
+    write_ndjson,
+)
+
+from . import TEST_MANIFEST_DIRECTORY, benchmark
 
 
 @dataclass
@@ -57,3 +82,233 @@ class TestTypesModule(TestCase):
         j_dict["base"] = self.jt1
         expected = {4: 5, "base": {"base": "base"}}
         self.assertEqual(j_dict.json, expected)
+
+
+def recursive_json(value):
+    # the former, generic, implementation
+    if isinstance(value, (JsonList, JsonSet)):
+        return [recursive_json(e) if isinstance(e, Jsonable) else to_str_int(e) for e in value]
+    if isinstance(value, JsonDict):
+        return {
+            k: recursive_json(v) if isinstance(v, Jsonable) else to_str_int(v)
+            for k, v in value.items()
+        }
+    if type(value).json is not Jsonable.json:
+        return value.json
+    output = dict()
+    for key, field in value.__dict__.items():
+        if key.startswith("_"):
+            continue
+        output[key] = recursive_json(field) if isinstance(field, Jsonable) else to_str_int(field)
+    return output
+
+
+class JsonableTest3(Jsonable):
+    def __init__(self, visible: bool):
+        self.a = 1
+        if visible:
+            self.b = Path("/b")
+        self._hidden = "hidden"
+
+
+class TestEncoders(TestCase):
+    def setUp(self):
+        self.manifests = [
+            Manifest.from_path(TEST_MANIFEST_DIRECTORY / name, use_cache=False)
+            for name in ["full_correct.toml", "full_correct_v2.toml", "minimal.toml"]
+        ]
+        self.sections = Sections(app_name="app", target_id="0x33000004")
+
+    def test_identical_output(self):
+        for value in self.manifests + [self.sections] + build_matrix(self.manifests[0]):
+            with self.subTest(value=value):
+                # same content, in the same order
+                self.assertEqual(json.dumps(value.json), json.dumps(recursive_json(value)))
+
+    def test_private_fields_excluded(self):
+        self.assertEqual(JsonableTest3(True).json, {"a": 1, "b": "/b"})
+
+    def test_other_attributes(self):
+        # the encoder is generated from the first instance, and still handles other layouts
+        self.assertEqual(JsonableTest3(True).json, {"a": 1, "b": "/b"})
+        self.assertEqual(JsonableTest3(False).json, {"a": 1})
+        instance = JsonableTest3(True)
+        instance.c = None
+        self.assertEqual(instance.json, {"a": 1, "b": "/b", "c": "None"})
+
+    def test_encoders_cached(self):
+        instance = JsonableTest2("one", JsonableTest1("base"))
+        instance.json
+        self.assertIs(field_encoder(instance), field_encoder(JsonableTest2("two", instance.two)))
+        self.assertIs(value_encoder(JsonableTest2), value_encoder(JsonableTest2))
+
+    @benchmark
+    def test_benchmark(self):
+        values = [self.sections] * 200 + build_matrix(self.manifests[0]) * 50
+        generated = timeit.timeit(lambda: [v.json for v in values], number=20)
+        recursive = timeit.timeit(lambda: [recursive_json(v) for v in values], number=20)
+        self.assertLess(generated, recursive)
+
+
+class TestStreaming(TestCase):
+    def setUp(self):
+        self.manifest = Manifest.from_path(
+            TEST_MANIFEST_DIRECTORY / "full_correct.toml", use_cache=False
+        )
+        self.entries = JsonList(build_matrix(self.manifest))
+
+    def test_iter_json_jsonable(self):
+        j_dict = JsonDict({4: 5, "none": None, "list": self.entries, "empty": JsonSet()})
+        for value in (self.manifest, self.entries, j_dict, JsonList()):
+            with self.subTest(value=value):
+                self.assertEqual("".join(iter_json(value)), json.dumps(value.json))
+
+    def test_iter_json_plain(self):
+        value = {"include": list(self.entries), "count": 3, "ok": True, "none": None, "e": []}
+        expected = json.dumps({**value, "include": self.entries.json})
+        self.assertEqual("".join(iter_json(value)), expected)
+
+    def test_iter_json_streams_containers(self):
+        # one chunk per element, at least
+        self.assertGreater(len(list(iter_json(self.entries))), len(self.entries))
+
+    def test_write_json(self):
+        stream = StringIO()
+        with patch.object(stream, "write", wraps=stream.write) as write:
+            write_json(self.entries * 20, stream, buffer_size=1024)
+        self.assertGreater(write.call_count, 1)
+        self.assertEqual(stream.getvalue(), json.dumps(self.entries.json * 20) + "\n")
+
+    def test_write_ndjson(self):
+        stream = StringIO()
+        with patch.object(stream, "flush") as flush:
+            write_ndjson(iter(self.entries), stream, flush=True)
+        self.assertEqual(flush.call_count, len(self.entries))
+        self.assertListEqual(
+            [json.loads(line) for line in stream.getvalue().splitlines()], self.entries.json
+        )
+
+
+@dataclass
+class MemoizedLeaf(Jsonable, memoize=True):
+    base: str
+
+
+@dataclass
+class MemoizedNode(Jsonable, memoize=True):
+    one: str
+    two: MemoizedLeaf
+
+
+@dataclass
+class CountingJsonable(Jsonable, memoize=True):
+    value: str
+    children: JsonList
+
+    computed = 0
+
+    @property
+    def json(self):
+        CountingJsonable.computed += 1
+        return super().json
+
+
+class TestMemoization(TestCase):
+    def setUp(self):
+        context = memoize_json()
+        context.__enter__()
+        self.addCleanup(context.__exit__, None, None, None)
+        CountingJsonable.computed = 0
+        self.child = MemoizedNode("one", MemoizedLeaf("base"))
+        self.instance = CountingJsonable("value", JsonList([self.child]))
+        self.expected = {"value": "value", "children": [{"one": "one", "two": {"base": "base"}}]}
+
+    def test_memoized(self):
+        self.assertEqual(self.instance.json, self.expected)
+        self.assertEqual(self.instance.json, self.expected)
+        self.assertEqual(CountingJsonable.computed, 1)
+
+    def test_defensive_copy(self):
+        self.instance.json["children"][0]["two"]["base"] = "modified"
+        self.assertEqual(self.instance.json, self.expected)
+        self.assertEqual(self.child.json, self.expected["children"][0])
+
+    def test_invalidated_by_attributes(self):
+        self.instance.json
+        self.instance.value = "other"
+        self.assertEqual(self.instance.json["value"], "other")
+        # nested object
+        self.child.two.base = "nested"
+        self.assertEqual(self.instance.json["children"][0]["two"]["base"], "nested")
+        self.assertEqual(CountingJsonable.computed, 3)
+        # private attributes too, as properties may depend on them
+        self.instance._private = 1
+        self.instance.json
+        self.assertEqual(CountingJsonable.computed, 4)
+
+    def test_invalidated_by_private_attributes(self):
+        dependency = TestsDependencyConfig("https://github.com/org/repo.git", "main", Path("/a"))
+        self.assertEqual(
+            dependency.json["application_directory"], "/a/.dependencies/repo.git-main-default"
+        )
+        dependency._base_dir = Path("/b")
+        self.assertEqual(
+            dependency.json["application_directory"], "/b/.dependencies/repo.git-main-default"
+        )
+
+    def test_invalidated_by_containers(self):
+        self.instance.json
+        self.instance.children.append(MemoizedLeaf("new"))
+        self.assertEqual(self.instance.json["children"][1], {"base": "new"})
+        j_dict, j_set = JsonDict(a=1), JsonSet([1])
+        self.instance.children.extend([j_dict, j_set])
+        self.instance.json
+        j_dict["b"] = 2
+        j_set.add(2)
+        self.assertEqual(self.instance.json["children"][2:], [{"a": 1, "b": 2}, [1, 2]])
+
+    def test_opt_in(self):
+        instance = JsonableTest2("one", JsonableTest1("base"))
+        instance.json
+        self.assertNotIn(id(instance), serializers._json_cache)
+        self.assertIsNone(JsonableTest2._memoized_json)
+        self.assertIs(JsonableTest2.__setattr__, object.__setattr__)
+        self.assertIsNotNone(CountingJsonable._memoized_json)
+
+    def test_disabled(self):
+        self.instance.json
+        with memoize_json(False):
+            self.assertDictEqual(serializers._json_cache, dict())
+            self.instance.json
+            self.instance.json
+        self.assertEqual(CountingJsonable.computed, 3)
+        # enabled again
+        self.instance.json
+        self.instance.json
+        self.assertEqual(CountingJsonable.computed, 4)
+
+    def test_restored(self):
+        with self.assertRaises(KeyError):
+            with memoize_json():
+                self.instance.json
+                raise KeyError
+        self.assertTrue(serializers._memoize)
+        self.assertIn(id(self.instance), serializers._json_cache)
+        self.doCleanups()
+        self.assertFalse(serializers._memoize)
+        self.assertDictEqual(serializers._json_cache, dict())
+
+    def test_forgotten(self):
+        self.instance.json
+        del self.instance, self.child
+        gc.collect()
+        self.assertDictEqual(serializers._json_cache, dict())
+        self.assertDictEqual(serializers._json_parents, dict())
+
+    @benchmark
+    def test_benchmark(self):
+        manifest = Manifest.from_path(TEST_MANIFEST_DIRECTORY / "full_correct_v2.toml")
+        memoized = timeit.timeit(lambda: manifest.json, number=500)
+        with memoize_json(False):
+            computed = timeit.timeit(lambda: manifest.json, number=500)
+        self.assertLess(memoized, computed)
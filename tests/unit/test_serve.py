@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+from threading import Thread
+from unittest import TestCase
+from unittest.mock import patch
+
+from ledgered import serve
+from ledgered.manifest.manifest import MANIFEST_FILE_NAME
+
+from . import TEST_MANIFEST_DIRECTORY
+from .test_binary import Section
+
+
+class TestSocketPath(TestCase):
+    def test_default_socket_path(self):
+        with patch.dict(os.environ, {serve.SOCKET_ENV: "/run/ledgered.sock"}):
+            self.assertEqual(serve.default_socket_path(), Path("/run/ledgered.sock"))
+        with patch.dict(os.environ, {"XDG_RUNTIME_DIR": "/run/user/1000"}):
+            os.environ.pop(serve.SOCKET_ENV, None)
+            self.assertEqual(serve.default_socket_path(), Path("/run/user/1000/ledgered.sock"))
+
+    def test_private_directory(self):
+        tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp)
+        with patch("tempfile.gettempdir", return_value=str(tmp)):
+            with patch.dict(os.environ, clear=True):
+                path = serve.default_socket_path()
+                self.assertEqual(path.parent.parent, tmp)
+                with serve.bind() as server:
+                    self.assertEqual(server.socket_path, path)
+        self.assertEqual(path.parent.stat().st_mode & 0o777, 0o700)
+        path.parent.chmod(0o777)
+        with self.assertRaises(RuntimeError):
+            serve.bind(path)
+
+
+class TestMetadataServer(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.socket = self.tmp / "ledgered.sock"
+        self.server = serve.bind(self.socket)
+        thread = Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def query(self, op, **parameters):
+        return serve.query(op, socket_path=self.socket, **parameters)
+
+    def test_ping(self):
+        self.assertEqual(self.query("ping")["pid"], os.getpid())
+        self.assertEqual(self.socket.stat().st_mode & 0o777, 0o600)
+        with self.assertRaises(RuntimeError):
+            serve.bind(self.socket)
+
+    def test_untrusted_socket(self):
+        self.assertIsNotNone(self.query("ping"))
+        os.chmod(self.socket, 0o666)
+        with self.assertLogs(level="WARNING"):
+            self.assertIsNone(self.query("ping"))
+        os.chmod(self.socket, 0o600)
+        os.chmod(self.tmp, 0o777)
+        with self.assertLogs(level="WARNING"):
+            self.assertIsNone(self.query("ping"))
+        os.chmod(self.tmp, 0o700)
+        # not a socket
+        fake = self.tmp / "fake.sock"
+        fake.write_text("")
+        os.chmod(fake, 0o600)
+        with self.assertLogs(level="WARNING"):
+            self.assertIsNone(serve.query("ping", socket_path=fake))
+
+    def test_unsupported_platform(self):
+        with patch.object(serve, "SUPPORTED", False):
+            self.assertIsNone(self.query("ping"))
+            with self.assertRaises(RuntimeError):
+                serve.bind(self.tmp / "other.sock")
+
+    def test_errors(self):
+        response = serve.request({"op": "nope"}, socket_path=self.socket)
+        self.assertFalse(response["ok"])
+        self.assertIn("Unknown operation", response["error"])
+        self.assertIsNone(self.query("manifest", path=str(self.tmp / "nope.toml")))
+        self.assertIsNone(serve.query("ping", socket_path=self.tmp / "other.sock"))
+
+    def test_manifest(self):
+        path = self.tmp / MANIFEST_FILE_NAME
+        shutil.copy(TEST_MANIFEST_DIRECTORY / MANIFEST_FILE_NAME, path)
+        options = {"output_sdk": True, "output_devices": True}
+        result = self.query("manifest", path=str(path), options=options)
+        self.assertEqual(result["sdk"], "rust")
+        self.assertEqual(len(result["devices"]), 3)
+        self.assertIsNone(self.query("manifest", path=str(path), options={"unknown": True}))
+
+        # modified file: parsed again
+        path.write_text(path.read_text().replace('sdk = "Rust"', 'sdk = "C"'))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.assertEqual(self.query("manifest", path=str(path), options=options)["sdk"], "c")
+
+    def test_binary(self):
+        path = self.tmp / "app.elf"
+        path.write_bytes(b"elf")
+        with patch("elftools.elf.elffile.ELFFile") as elfmock:
+            elfmock().iter_sections.return_value = [Section("ledger.api_level", b"22")]
+            self.assertEqual(self.query("binary", path=str(path))["api_level"], "22")
+            self.assertEqual(self.query("binary", path=str(path))["api_level"], "22")
+        self.assertEqual(elfmock.call_count, 2)  # the call in this test + one parsing
+
+    def test_device(self):
+        result = self.query("device", name="nanos+")
+        self.assertEqual(result["type"], "NANOSP")
+        self.assertEqual(result["sdk_name"], "nanos+")
+        self.assertIsNone(self.query("device", name="nope"))
+
+    def test_ledger_manifest_uses_daemon(self):
+        from ledgered.manifest import cli
+
+        path = self.tmp / MANIFEST_FILE_NAME
+        shutil.copy(TEST_MANIFEST_DIRECTORY / MANIFEST_FILE_NAME, path)
+        args = cli.set_parser().parse_args(["-os", str(path)])
+        with patch.dict(os.environ, {serve.SOCKET_ENV: str(self.socket)}):
+            with patch("ledgered.manifest.cli.set_parser") as parser:
+                with patch("sys.stdout", StringIO()) as stdout:
+                    with patch("ledgered.manifest.cli.Manifest") as manifest_mock:
+                        parser().parse_args.return_value = args
+                        cli.main()
+        manifest_mock.from_path.assert_not_called()
+        self.assertEqual(stdout.getvalue(), "rust\n")
@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+from ledgered.utils.startup import CLI_MODULES, HEAVY_MODULES, best_import_profile
+
+# in microseconds, generous enough for slow CI runners: importing PyGithub alone exceeds it
+STARTUP_BUDGET = 120_000
+# importing pydantic alone exceeds it
+DEVICES_STARTUP_BUDGET = 40_000
+
+
+class TestStartup(TestCase):
+    def test_cli_startup(self):
+        for module in CLI_MODULES:
+            with self.subTest(module=module):
+                profile = best_import_profile(module)
+                for heavy in HEAVY_MODULES:
+                    self.assertFalse(profile.imports(heavy), f"{module} imports {heavy}")
+                self.assertLess(profile.total, STARTUP_BUDGET)
+
+    def test_devices_startup(self):
+        # the device table is loaded on first lookup
+        profile = best_import_profile(
+            "ledgered.devices", 'ledgered.devices.Devices.get_by_name("stax")'
+        )
+        self.assertFalse(profile.imports("pydantic"))
+        self.assertLess(
+            profile.total + profile.modules["ledgered.devices._table"], DEVICES_STARTUP_BUDGET
+        )
+
+    def test_profile(self):
+        profile = best_import_profile("ledgered.github", runs=1)
+        self.assertTrue(profile.imports("github"))
+        self.assertGreaterEqual(profile.total, profile.modules["github"])
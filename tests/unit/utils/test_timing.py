@@ -0,0 +1,90 @@
+import io
+import pstats
+import tempfile
+from argparse import ArgumentParser
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from ledgered.manifest.manifest import Manifest
+from ledgered.utils import timing
+
+from .. import TEST_MANIFEST_DIRECTORY
+
+
+class TestSpan(TestCase):
+    def test_disabled(self):
+        self.assertIs(timing.span("a"), timing.span("b", "detail"))
+        with timing.span("a"):
+            pass
+
+    def test_callbacks(self):
+        callback = MagicMock()
+        timing.add_callback(callback)
+        self.addCleanup(timing.remove_callback, callback)
+        with timing.span("phase", "detail"):
+            pass
+        with self.assertRaises(KeyError):
+            with timing.span("failing"):
+                raise KeyError
+        self.assertListEqual(
+            [call.args[:2] for call in callback.call_args_list],
+            [("phase", "detail"), ("failing", None)],
+        )
+        self.assertGreaterEqual(callback.call_args.args[2], 0)
+
+
+class TestTimingCollector(TestCase):
+    def test_collect(self):
+        with timing.TimingCollector() as collector:
+            Manifest.from_path(TEST_MANIFEST_DIRECTORY / "full_correct.toml", use_cache=False)
+            Manifest.from_path(TEST_MANIFEST_DIRECTORY / "ledger_app.toml", use_cache=False)
+            collector("github.request", "GET /repos/{owner}/{repo}", 0.5)
+            collector("github.request", "GET /repos/{owner}/{repo}", 0.25)
+        with timing.span("manifest.load"):
+            pass
+        report = collector.report()
+        self.assertEqual(report["manifest.load"]["count"], 2)
+        self.assertEqual(report["app.validate"]["count"], 2)
+        self.assertTrue(any(key.startswith("toml.parse [") for key in report))
+        self.assertDictEqual(
+            report["github.request [GET /repos/{owner}/{repo}]"],
+            {"count": 2, "total": 0.75, "max": 0.5},
+        )
+        self.assertLessEqual(report["manifest.load"]["total"], collector.elapsed)
+        summary = collector.summary().splitlines()
+        self.assertTrue(summary[0].startswith("total"))
+        self.assertEqual(len(summary), len(report) + 1)
+
+
+class TestInstrumented(TestCase):
+    def test_arguments(self):
+        parser = ArgumentParser()
+        timing.add_instrumentation_arguments(parser)
+        args = parser.parse_args([])
+        self.assertFalse(args.timings)
+        self.assertIsNone(args.profile)
+        args = parser.parse_args(["--timings", "--profile", "out.prof"])
+        self.assertTrue(args.timings)
+        self.assertEqual(args.profile, Path("out.prof"))
+
+    def test_disabled(self):
+        stream = io.StringIO()
+        with timing.instrumented(stream=stream) as collector:
+            self.assertIsNone(collector)
+            self.assertIs(timing.span("a"), timing.span("b"))
+        self.assertEqual(stream.getvalue(), "")
+
+    def test_timings_and_profile(self):
+        stream = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            profile = Path(directory) / "out.prof"
+            with self.assertRaises(SystemExit):
+                with timing.instrumented(True, profile, stream=stream):
+                    Manifest.from_path(TEST_MANIFEST_DIRECTORY / "minimal.toml", use_cache=False)
+                    raise SystemExit(2)
+            functions = [function for _, _, function in pstats.Stats(str(profile)).stats]
+        self.assertIn("from_path", functions)
+        self.assertIn("manifest.load", stream.getvalue())
+        # the collector is unregistered
+        self.assertIs(timing.span("a"), timing.span("b"))
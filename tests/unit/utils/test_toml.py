@@ -0,0 +1,60 @@
+import io
+import os
+import sys
+from unittest import TestCase
+from unittest.mock import patch
+
+from ledgered.utils import toml
+
+from .. import TEST_MANIFEST_DIRECTORY
+
+CONTENT = '[app]\nsdk = "C"\ndevices = ["nanox", "stax"]\n'
+EXPECTED = {"app": {"sdk": "C", "devices": ["nanox", "stax"]}}
+
+
+class TestToml(TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, toml, "_backend", toml._backend)
+        toml._backend = None
+
+    def test_available_backends(self):
+        backends = toml.available_backends()
+        self.assertTrue(backends)
+        self.assertListEqual(list(backends), [n for n in toml.BACKEND_NAMES if n in backends])
+        if sys.version_info >= (3, 11):
+            self.assertIn("tomllib", backends)
+
+    def test_get_backend_fastest(self):
+        with patch.dict(os.environ, clear=True):
+            self.assertEqual(toml.get_backend(), next(iter(toml.available_backends().values())))
+
+    def test_set_backend(self):
+        for name in toml.available_backends():
+            self.assertEqual(toml.set_backend(name).name, name)
+            self.assertEqual(toml.get_backend().name, name)
+            self.assertEqual(toml.loads(CONTENT), EXPECTED)
+            self.assertEqual(toml.load(io.BytesIO(CONTENT.encode())), EXPECTED)
+            self.assertEqual(toml.load(io.StringIO(CONTENT)), EXPECTED)
+            with self.assertRaises(ValueError):
+                toml.loads("[app")
+
+    def test_set_backend_env(self):
+        name = list(toml.available_backends())[-1]
+        with patch.dict(os.environ, {toml.TOML_BACKEND_ENV: name}):
+            self.assertEqual(toml.get_backend().name, name)
+
+    def test_set_backend_nok(self):
+        with self.assertRaises(ValueError):
+            toml.set_backend("unknown")
+        with patch("importlib.import_module", side_effect=ImportError):
+            with self.assertRaises(ImportError):
+                toml.set_backend("tomli")
+            with self.assertRaises(ImportError):
+                toml.set_backend()
+
+    def test_benchmark(self):
+        paths = sorted(TEST_MANIFEST_DIRECTORY.glob("*.toml"))
+        results = toml.benchmark(paths, number=2)
+        self.assertListEqual(list(results), list(toml.available_backends()))
+        for duration in results.values():
+            self.assertGreater(duration, 0)